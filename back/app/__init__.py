@@ -55,20 +55,22 @@ def create_app(config_name=None):
     init_socketio(socketio, app)
     app.logger.info('채팅 API SocketIO가 초기화되었습니다.')
     
-    # 벡터 DB 초기화 (환경 변수로 제어)
+    # 벡터 DB 초기화 (환경 변수로 제어) — 백그라운드 스레드에서 진행하고 상태는 /health로 보고
     skip_vector_init = os.getenv('SKIP_VECTOR_INIT', 'false').lower() == 'true'
     if not skip_vector_init:
-        app.logger.info('벡터 DB를 초기화합니다.')
+        from app.services.dailycare.vector_registry import get_vector_registry
+        get_vector_registry().start()
+        app.logger.info('벡터 DB 초기화를 백그라운드에서 시작했습니다.')
+    else:
+        app.logger.info('SKIP_VECTOR_INIT=true 설정으로 벡터 DB 초기화를 건너뜁니다. (첫 챗봇 요청 때 시작)')
+
+    # 문서 감시기 (선택) — 문서가 바뀌면 해당 파일의 청크만 다시 반영
+    if app.config['DOCUMENT_WATCHER'] and app.config['DOCUMENTS_PATH']:
+        from app.services.dailycare.document_watcher import get_document_watcher
         try:
-            from app.services.dailycare.vectorstore_service import VectorStoreService
-            vector_service = VectorStoreService()
-            vector_service.initialize_vector_db()
-            app.logger.info('벡터 DB 초기화가 완료되었습니다.')
+            get_document_watcher().start()
         except Exception as e:
-            app.logger.error(f'벡터 DB 초기화 중 오류 발생: {e}')
-            app.logger.warning('벡터 DB 없이 애플리케이션을 계속 실행합니다.')
-    else:
-        app.logger.info('SKIP_VECTOR_INIT=true 설정으로 벡터 DB 초기화를 건너뜁니다.')
+            app.logger.error(f'문서 감시기 시작 실패: {e}')
 
     @app.route('/')
     def index():
@@ -83,8 +85,15 @@ def create_app(config_name=None):
             # 데이터베이스 연결 확인
             from app.models import db
             from sqlalchemy import text
+            from app.services.dailycare.vector_registry import get_vector_registry
+            # 벡터 스토어는 준비 중이어도 웹/챗봇(기록 기반 답변)은 동작하므로 상태만 보고
+            vector_store = get_vector_registry().status()
             db.session.execute(text('SELECT 1'))
-            return {'status': 'healthy', 'database': 'connected'}, 200
+            health = {'status': 'healthy', 'database': 'connected', 'vector_store': vector_store}
+            if app.config['DOCUMENT_WATCHER'] and app.config['DOCUMENTS_PATH']:
+                from app.services.dailycare.document_watcher import get_document_watcher
+                health['document_watcher'] = get_document_watcher().status()
+            return health, 200
         except Exception as e:
             app.logger.error(f'헬스체크 실패: {e}')
             return {'status': 'unhealthy', 'error': str(e)}, 503
@@ -22,16 +22,24 @@ if Config.LANGCHAIN_API_KEY:
 
 class ChatService:
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model='gpt-4o-mini',
-            max_tokens=256,
-            temperature=0.9,
-            api_key=Config.OPENAI_API_KEY
-        )
-        
+        # 모듈 import 시점이 아니라 처음 대화할 때 OpenAI 클라이언트를 만듦
+        # (색인 빌드/벤치마크처럼 app 패키지만 import하는 도구는 API 키 없이도 동작)
+        self._llm = None
+
         # LCEL에서는 ChatMessageHistory 사용
         self.message_histories = {}  # 세션별 메시지 히스토리 저장
 
+    @property
+    def llm(self):
+        if self._llm is None:
+            self._llm = ChatOpenAI(
+                model='gpt-4o-mini',
+                max_tokens=256,
+                temperature=0.9,
+                api_key=Config.OPENAI_API_KEY
+            )
+        return self._llm
+
     # 0. 사용자의 펫 목록을 가져옴.
     def get_user_pets(self, user_id):
         try:
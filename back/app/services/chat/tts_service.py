@@ -9,10 +9,16 @@ logger = logging.getLogger(__name__)
 
 class OpenAITTS:
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=Config.OPENAI_API_KEY)
+        self._client = None   # 처음 음성을 만들 때 생성 (import 시 API 키가 없어도 됨)
         self.voices = ['alloy', 'ash', 'ballad', 'coral', 'echo', 
                        'fable', 'nova', 'onyx', 'sage', 'shimmer']
 
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is None:
+            self._client = AsyncOpenAI(api_key=Config.OPENAI_API_KEY)
+        return self._client
+
     async def generate_speech_stream(self, voice, text):
         async with self.client.audio.speech.with_streaming_response.create(
             model="gpt-4o-mini-tts",
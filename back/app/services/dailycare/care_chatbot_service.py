@@ -8,9 +8,14 @@ from app.services.dailycare.healthcare_service import HealthCareService
 from app.services.dailycare.medicalcare_service import MedicalCareService
 from app.services.dailycare.openAI_service import get_gpt_response
 from app.services.dailycare.vectorstore_service import VectorStoreService
+from app.services.dailycare.retrieval_cache import get_retrieval_cache
+from app.services.dailycare.metadata_index import MetadataFilter
+from app.services.dailycare.vector_registry import get_vector_registry
+from app.services.dailycare.text_chunker import count_text_tokens
 from flask import current_app as app
 from langchain_core.documents import Document
 from back.config import Config
+from typing import Optional
 import os
 
 
@@ -24,9 +29,6 @@ if Config.LANGCHAIN_API_KEY:
 
 
 class CareChatbotService:
-    # 벡터 스토어 인스턴스를 클래스 변수로 관리 (싱글톤)
-    _vector_store = None
-
     ATTRIBUTE_MAP = {
         "health": {"weight_kg": ["몸무게", "체중"], "food": ["음식", "사료"], "water": ["물", "음수"], "excrement_status": ["배변"], "walk_time_minutes": ["산책"]},
         "allergy": {"allergen": ["알러지"], "symptoms": ["증상"], "severity": ["심각도"], "allergy_type": ["알러지 유형"]},
@@ -39,42 +41,18 @@ class CareChatbotService:
     # -----------------------------
     # 벡터 스토어 관리
     # -----------------------------
-   # care_chatbot_service.py에서 VectorStoreService 호출 직후 예시
     @classmethod
-    def get_vector_store(cls) -> VectorStoreService:
-        """벡터 스토어 인스턴스를 안전하게 가져오거나 생성"""
-        if cls._vector_store is None:
-            try:
-                print("벡터 스토어 초기화 시작...")
-                cls._vector_store = VectorStoreService()
-                print("VectorStoreService 객체 생성:", cls._vector_store)
-                
-                # 멀티 콜렉션 벡터 DB 초기화
-                stores = cls._vector_store.initialize_vector_db()
-                print("멀티 콜렉션 벡터 DB 초기화 완료:", stores)
-                
-                # stores 확인
-                if not stores or not any(stores.values()):
-                    print("경고: 모든 콜렉션 초기화가 실패했습니다.")
-                else:
-                    for collection_type, store in stores.items():
-                        if store:
-                            count = cls._get_document_count(store)
-                            print(f"{collection_type} 콜렉션 설정 완료. 문서 수: {count}")
-                        else:
-                            print(f"{collection_type} 콜렉션 초기화 실패")
-                    
-            except Exception as e:
-                print(f"벡터 스토어 초기화 중 오류 발생: {e}")
-                import traceback
-                print(f"상세 오류 정보: {traceback.format_exc()}")
-                # 초기화 실패 시 None으로 설정하여 다음에 다시 시도할 수 있도록 함
-                cls._vector_store = None
-                return None
-        else:
-            print("이미 초기화된 벡터 스토어 사용")
-            
-        return cls._vector_store
+    def get_vector_store(cls, timeout: Optional[float] = None) -> Optional[VectorStoreService]:
+        """
+        프로세스 공유 레지스트리에서 벡터 스토어 가져오기 (create_app이 시작한 것과 같은 인스턴스)
+        준비 중이면 timeout초(기본 VECTOR_WARMUP_WAIT_SECONDS)까지 기다리고, 그래도 안 되면 None (기록 기반 답변)
+        """
+        registry = get_vector_registry()
+        # 아직 시작 전(SKIP_VECTOR_INIT 등)이거나 실패 후 재시도 간격이 지났으면 여기서 시작
+        vector_store = registry.get(Config.VECTOR_WARMUP_WAIT_SECONDS if timeout is None else timeout)
+        if vector_store is None:
+            print(f"벡터 스토어가 준비되지 않았습니다 (상태: {registry.state}). 반려동물 기록만으로 답변합니다.")
+        return vector_store
 
     @classmethod
     def _get_document_count(cls, store) -> int:
@@ -166,158 +144,26 @@ class CareChatbotService:
         return enhanced_query
 
     @staticmethod
-    def _create_metadata_filter(pet_records: dict = None, query: str = "") -> dict:
+    def _create_metadata_filter(pet_records: dict = None, query: str = "") -> MetadataFilter:
         """
-        반려동물 정보와 질문 내용 기반 메타데이터 필터 생성 (더 엄격한 필터링)
+        반려동물 정보와 질문 내용 기반 메타데이터 필터 생성
+        (적재 시 만든 메타데이터 비트맵 색인으로 검색 단계에서 적용)
         """
-        if not pet_records:
-            return {}
-        
-        pet_info = pet_records.get("pet", {})
-        filters = []
-        
-        # 1. 동물 종류별 엄격한 필터링
-        species_filter = None
-        if pet_info.get('species_name'):
-            species = pet_info['species_name']
-            if '강아지' in species or '개' in species or 'dog' in species.lower():
-                # 강아지면 고양이 관련 문서는 완전 제외
-                species_filter = {
-                    "$and": [
-                        # 포함할 조건
-                        {
-                            "$or": [
-                                {"categories": {"$in": ["반려견건강", "강아지", "예방접종", "종합건강관리"]}},
-                                {"keywords": {"$in": ["강아지", "개", "dog", "반려견", "견"]}},
-                                {"data_type": {"$ne": "medication"}},  # 의약품이 아니거나
-                                {
-                                    "$and": [
-                                        {"data_type": "medication"},
-                                        {
-                                            "$or": [
-                                                {"text": {"$contains": "강아지"}},
-                                                {"text": {"$contains": "개"}},
-                                                {"text": {"$contains": "dog"}},
-                                                {"text": {"$contains": "반려견"}}
-                                            ]
-                                        }
-                                    ]
-                                }
-                            ]
-                        },
-                        # 제외할 조건 (고양이 관련)
-                        {
-                            "$not": {
-                                "$or": [
-                                    {"categories": {"$in": ["반려묘건강", "고양이"]}},
-                                    {"keywords": {"$in": ["고양이", "냥이", "cat", "반려묘"]}},
-                                    {"text": {"$contains": "고양이"}},
-                                    {"text": {"$contains": "cat"}}
-                                ]
-                            }
-                        }
-                    ]
-                }
-            elif '고양이' in species or '냥이' in species or 'cat' in species.lower():
-                # 고양이면 강아지 관련 문서는 완전 제외
-                species_filter = {
-                    "$and": [
-                        # 포함할 조건
-                        {
-                            "$or": [
-                                {"categories": {"$in": ["반려묘건강", "고양이", "예방접종", "종합건강관리"]}},
-                                {"keywords": {"$in": ["고양이", "냥이", "cat", "반려묘"]}},
-                                {"data_type": {"$ne": "medication"}},  # 의약품이 아니거나
-                                {
-                                    "$and": [
-                                        {"data_type": "medication"},
-                                        {
-                                            "$or": [
-                                                {"text": {"$contains": "고양이"}},
-                                                {"text": {"$contains": "cat"}},
-                                                {"text": {"$contains": "냥이"}},
-                                                {"text": {"$contains": "반려묘"}}
-                                            ]
-                                        }
-                                    ]
-                                }
-                            ]
-                        },
-                        # 제외할 조건 (강아지 관련)
-                        {
-                            "$not": {
-                                "$or": [
-                                    {"categories": {"$in": ["반려견건강", "강아지"]}},
-                                    {"keywords": {"$in": ["강아지", "개", "dog", "반려견"]}},
-                                    {"text": {"$contains": "강아지"}},
-                                    {"text": {"$contains": "dog"}}
-                                ]
-                            }
-                        }
-                    ]
-                }
-        
-        if species_filter:
-            filters.append(species_filter)
-        
-        # 2. 질문 내용에 따른 추가 필터링
-        if query:
-            query_lower = query.lower()
-            
-            # 예방접종 관련 질문이면 의약품 데이터 제한
-            if any(word in query_lower for word in ['예방접종', '백신', '접종', 'vaccine']):
-                filters.append({
-                    "$or": [
-                        {"data_type": {"$ne": "medication"}},  # 의약품이 아니거나
-                        {
-                            "$and": [
-                                {"data_type": "medication"},
-                                {
-                                    "$or": [
-                                        {"text": {"$contains": "백신"}},
-                                        {"text": {"$contains": "vaccine"}},
-                                        {"text": {"$contains": "예방접종"}}
-                                    ]
-                                }
-                            ]
-                        }
-                    ]
-                })
-            
-            # 건강관리, 사료, 운동 관련이면 의약품 우선순위 낮춤
-            elif any(word in query_lower for word in ['건강관리', '사료', '운동', '산책', '관리', '키우기']):
-                filters.append({
-                    "$or": [
-                        {"data_type": {"$ne": "medication"}},  # 의약품이 아닌 문서 우선
-                        {"categories": {"$in": ["종합건강관리", "사료관리", "기본관리"]}}
-                    ]
-                })
-        
-        # 3. 의약품 데이터 비중 줄이기 (전체적으로)
-        # 질병/약물 관련 질문이 아니면 의약품 데이터 제한
-        disease_related = any(word in query.lower() for word in ['약', '치료', '병', '질병', '아파', 'medication', 'treatment'])
-        
-        if not disease_related:
-            # 질병 관련이 아니면 일반 가이드 문서 우선
-            filters.append({
-                "$or": [
-                    {"data_type": {"$ne": "medication"}},
-                    {
-                        "$and": [
-                            {"data_type": "medication"},
-                            {"item_index": {"$lt": 50}}  # 의약품 중에서도 앞쪽 50개만
-                        ]
-                    }
-                ]
-            })
-        
-        # 최종 필터 조합 (AND 조건: 모든 조건을 만족해야 함)
-        if len(filters) == 1:
-            return filters[0]
-        elif len(filters) > 1:
-            return {"$and": filters}
-        
-        return {}
+        pet_info = (pet_records or {}).get("pet") or {}
+        species = None
+        species_name = pet_info.get('species_name') or ""
+        if '강아지' in species_name or '개' in species_name or 'dog' in species_name.lower():
+            # 강아지면 고양이만 다루는 문서 제외
+            species = "dog"
+        elif '고양이' in species_name or '냥이' in species_name or 'cat' in species_name.lower():
+            # 고양이면 강아지만 다루는 문서 제외
+            species = "cat"
+
+        # 예방접종 관련 질문이면 의약품 중 백신 관련 문서만 사용
+        query_lower = (query or "").lower()
+        vaccine = any(word in query_lower for word in ['예방접종', '백신', '접종', 'vaccine'])
+
+        return MetadataFilter(species=species, vaccine=vaccine)
 
     @staticmethod
     def _debug_vector_metadata(vector_store):
@@ -331,7 +177,7 @@ class CareChatbotService:
 
     @staticmethod
     def _debug_multi_collection_metadata(vector_store, collections_to_search):
-        """멀티 콜렉션 메타데이터 디버깅"""
+        """멀티 콜렉션 메타데이터 디버깅 (콜렉션마다 임베딩+검색을 하므로 요청 경로에서는 호출하지 않음, 수동 점검용)"""
         try:
             print("\n=== 멀티 콜렉션 메타데이터 샘플 확인 ===")
             
@@ -353,6 +199,11 @@ class CareChatbotService:
         except Exception as e:
             print(f"멀티 콜렉션 디버깅 중 오류: {e}")
 
+    @staticmethod
+    def retrieval_cache_stats() -> dict:
+        """검색 결과 캐시 통계 (hit_rate 포함)"""
+        return get_retrieval_cache().stats()
+
     @staticmethod
     def search_knowledge_base(query: str, pet_records: dict = None, k: int = 5, search_type: str = "hybrid") -> str:
         """
@@ -388,20 +239,40 @@ class CareChatbotService:
             # 질문 유형에 따른 콜렉션 선택
             collections_to_search = vector_store.get_collection_by_query_type(query, pet_records)
             print(f"검색할 콜렉션: {collections_to_search}")
-            
-            # 벡터DB 메타데이터 샘플 확인
-            CareChatbotService._debug_multi_collection_metadata(vector_store, collections_to_search)
+
+            # 같은 질문/콜렉션/k/검색 타입이면 캐시된 참고자료 재사용
+            retrieval_cache = get_retrieval_cache()
+            cache_key = retrieval_cache.make_key(enhanced_query, collections_to_search, k, search_type, metadata_filter)
+            cached_context = retrieval_cache.get(cache_key)
+            if cached_context is not None:
+                print(f"검색 결과 캐시 적중 (hit rate: {retrieval_cache.stats()['hit_rate']})")
+                return cached_context
+
 
             # 멀티 콜렉션에서 검색
             try:
                 print(f"실행할 검색 타입: {search_type}")
                 
-                # 멀티 콜렉션 검색 (현재는 벡터 검색만 지원)
-                if search_type in ["vector", "hybrid"]:
+                # 멀티 콜렉션 검색
+                if search_type == "hybrid":
+                    # 벡터 + 키워드 검색을 동시에 실행하고 RRF로 통합
+                    hybrid_results = vector_store.hybrid_search_multi_collections(
+                        enhanced_query,
+                        collections_to_search,
+                        k=k,
+                        metadata_filter=metadata_filter
+                    )
+                    search_results = [doc for doc, _ in hybrid_results]
+                    print(f"멀티 콜렉션 하이브리드 검색 완료")
+                    for i, (doc, score) in enumerate(hybrid_results[:5]):
+                        print(f"RRF 점수 {i+1}: {score:.4f} ({doc.metadata.get('source_collection')})")
+
+                elif search_type == "vector":
                     search_results = vector_store.search_multi_collections(
                         enhanced_query, 
                         collections_to_search, 
-                        k=k
+                        k=k,
+                        metadata_filter=metadata_filter
                     )
                     print(f"멀티 콜렉션 벡터 검색 완료")
                     
@@ -409,7 +280,7 @@ class CareChatbotService:
                     # 키워드 검색은 첫 번째 콜렉션에서만
                     if collections_to_search and vector_store.stores.get(collections_to_search[0]):
                         first_collection = collections_to_search[0]
-                        keyword_results = vector_store.keyword_search(enhanced_query, k=k, collection_type=first_collection)
+                        keyword_results = vector_store.keyword_search(enhanced_query, k=k, collection_type=first_collection, metadata_filter=metadata_filter)
                         search_results = [doc for doc, _ in keyword_results]
                         print(f"{first_collection}에서 키워드 검색 완료")
                         # 키워드 검색 점수 출력
@@ -463,6 +334,7 @@ class CareChatbotService:
                 return ""
 
             knowledge_context = []
+            used_tokens = 0
 
             for i, doc in enumerate(search_results):
                 if not doc or not hasattr(doc, "page_content"):
@@ -490,6 +362,16 @@ class CareChatbotService:
                         source_info = f"[출처: {metadata_dict[key]}]"
                         break
 
+                # 프롬프트 토큰 예산 (청크 분할 때 저장한 token_count 사용, 없으면 계산)
+                tokens = metadata_dict.get("token_count")
+                if not isinstance(tokens, int):
+                    tokens = count_text_tokens(content)
+                budget = Config.KNOWLEDGE_CONTEXT_MAX_TOKENS
+                if budget > 0 and knowledge_context and used_tokens + tokens > budget:
+                    print(f"참고자료 토큰 예산({budget}) 초과로 {i+1}번째부터 제외합니다.")
+                    break
+                used_tokens += tokens
+
                 formatted_content = f"참고자료 {i+1} {source_info}:\n{content}\n"
                 knowledge_context.append(formatted_content)
                 # 더 자세한 미리보기 제거 (위에서 이미 출력함)
@@ -499,7 +381,9 @@ class CareChatbotService:
                 return ""
 
             print(f"총 {len(knowledge_context)}개의 참고자료를 찾았습니다.")
-            return "\n".join(knowledge_context)
+            result = "\n".join(knowledge_context)
+            retrieval_cache.put(cache_key, result)
+            return result
 
         except Exception as e:
             print(f"지식 베이스 검색 중 예상치 못한 오류 발생: {e}")
@@ -0,0 +1,489 @@
+import os
+import re
+import json
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters import MarkdownHeaderTextSplitter
+
+from back.config import Config
+from app.services.dailycare.metadata_index import extract_attributes
+from app.services.dailycare.near_duplicate import NearDuplicateClusterer
+from app.services.dailycare.text_chunker import TokenChunker
+
+
+logger = logging.getLogger(__name__)
+
+# 문서 파싱에 쓰는 정규식 (파일마다 다시 컴파일하지 않도록 모듈에서 한 번만)
+METADATA_BLOCK_PATTERN = re.compile(r"^---\s*\nmetadata:\s*\n(.*?)\n---", re.MULTILINE | re.DOTALL)
+METADATA_BLOCK_STRIP_PATTERN = re.compile(r"^---\s*\nmetadata:\s*\n.*?\n---\s*\n", re.MULTILINE | re.DOTALL)
+BLANK_LINES_PATTERN = re.compile(r"\n\s*\n\s*\n")
+
+# 콜렉션 타입 → 청크 메타데이터 collection_type 값
+COLLECTION_LABELS = {"general_guides": "general_guide", "medications": "medication"}
+
+# 파일 크기 합이 이보다 작으면 프로세스 풀 기동 비용이 파싱보다 커서 순차 처리
+PARALLEL_MIN_BYTES = 1 << 20
+
+# 헤더 분할기/토큰 청크 분할기는 상태가 없으므로 프로세스마다 하나만 만들어 재사용
+_markdown_splitter: Optional[MarkdownHeaderTextSplitter] = None
+_text_chunker: Optional[TokenChunker] = None
+
+_WHITESPACE = " \t\n\r﻿"
+
+
+def iter_json_items(file_path: Path, buffer_size: int = 1 << 16) -> Iterator[Tuple[Optional[int], Any]]:
+    """
+    JSON 파일을 항목 단위로 읽어오는 스트리밍 파서
+    - 최상위가 배열이면 (index, item)을 하나씩 반환 (파일 전체를 메모리에 올리지 않음)
+    - 배열이 아니면 전체 값을 (None, value)로 한 번 반환
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, "r", encoding="utf-8") as f:
+        buf = f.read(buffer_size)
+        eof = len(buf) < buffer_size
+        pos = _skip_whitespace(buf, 0)
+        while pos >= len(buf) and not eof:
+            buf, pos, eof = _read_more(f, buf, pos, buffer_size)
+            pos = _skip_whitespace(buf, pos)
+
+        if pos >= len(buf) or buf[pos] != "[":
+            # 배열이 아닌 JSON은 통째로 파싱
+            rest = buf[pos:] + f.read()
+            yield None, json.loads(rest)
+            return
+
+        pos += 1
+        index = 0
+        while True:
+            pos = _skip_whitespace(buf, pos)
+            if pos >= len(buf) or (not eof and len(buf) - pos < 2):
+                if eof:
+                    raise ValueError(f"JSON 배열이 닫히지 않았습니다: {file_path}")
+                buf, pos, eof = _read_more(f, buf, pos, buffer_size)
+                continue
+
+            char = buf[pos]
+            if char == "]":
+                return
+            if char == ",":
+                pos += 1
+                continue
+
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                buf, pos, eof = _read_more(f, buf, pos, buffer_size)
+                continue
+
+            # 항목 뒤에 구분자(, 또는 ])가 보여야 완성된 값으로 인정
+            # (버퍼 경계에서 잘린 숫자 "1e" 같은 경우는 더 읽고 다시 파싱)
+            next_pos = _skip_whitespace(buf, end)
+            if next_pos >= len(buf) or buf[next_pos] not in ",]":
+                if eof:
+                    raise ValueError(f"JSON 배열 구문 오류 ({file_path}, 항목 {index})")
+                buf, pos, eof = _read_more(f, buf, pos, buffer_size)
+                continue
+
+            yield index, item
+            index += 1
+            pos = end
+
+
+def _skip_whitespace(buf: str, pos: int) -> int:
+    while pos < len(buf) and buf[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def _read_more(f, buf: str, pos: int, buffer_size: int):
+    """이미 처리한 앞부분은 버리고 다음 블록을 이어 붙임"""
+    chunk = f.read(buffer_size)
+    return buf[pos:] + chunk, 0, len(chunk) < buffer_size
+
+
+# -------------------------
+# File → chunk Documents
+# (서비스 객체 없이 동작하는 모듈 함수라 워커 프로세스에서 그대로 실행된다)
+# -------------------------
+def get_markdown_splitter() -> MarkdownHeaderTextSplitter:
+    global _markdown_splitter
+    if _markdown_splitter is None:
+        _markdown_splitter = MarkdownHeaderTextSplitter([("#", "title"), ("##", "subtitle")])
+    return _markdown_splitter
+
+
+def get_text_chunker() -> TokenChunker:
+    global _text_chunker
+    if _text_chunker is None:
+        _text_chunker = TokenChunker()
+    return _text_chunker
+
+
+def iter_file_documents(collection_type: str, file_path: Path,
+                        dedup_threshold: Optional[float] = None) -> Iterator[Document]:
+    """파일 하나를 콜렉션 타입에 맞는 로더로 청크 분할 (JSON은 항목 단위 스트리밍)"""
+    if collection_type == 'general_guides':
+        docs = load_markdown_documents(file_path)
+    else:
+        docs = iter_json_documents(file_path, dedup_threshold)
+    # 메타데이터에 컬렉션 타입 추가
+    label = COLLECTION_LABELS.get(collection_type, 'medication')
+    for doc in docs:
+        doc.metadata['collection_type'] = label
+        yield doc
+
+
+def load_file_documents(collection_type: str, file_path: Path,
+                        dedup_threshold: Optional[float] = None) -> List[Document]:
+    return list(iter_file_documents(collection_type, file_path, dedup_threshold))
+
+
+def resolve_ingest_workers(workers: Optional[int] = None) -> int:
+    """INGEST_WORKERS 설정값 해석 (0 이하면 이 프로세스가 쓸 수 있는 CPU 수 기준 자동, 최대 8)"""
+    workers = Config.INGEST_WORKERS if workers is None else workers
+    if workers <= 0:
+        cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+        workers = min(8, cpus or 1)
+    return workers
+
+
+def _total_size(file_paths: Sequence[Path]) -> int:
+    total = 0
+    for file_path in file_paths:
+        try:
+            total += file_path.stat().st_size
+        except OSError:
+            pass
+    return total
+
+
+def iter_files_documents(collection_type: str, file_paths: Sequence[Path], workers: Optional[int] = None,
+                         dedup_threshold: Optional[float] = None) -> Iterator[Tuple[Path, Iterator[Document]]]:
+    """
+    여러 파일을 청크 분할해 (파일 경로, 청크 Document들)을 파일 순서대로 반환
+    - 워커가 2개 이상이고 파일이 여러 개(합계 PARALLEL_MIN_BYTES 이상)면 프로세스 풀에서 파일 단위로 병렬 파싱
+    - 앞 파일의 청크를 소비(임베딩)하는 동안 뒤 파일들은 계속 파싱되고,
+      미리 제출하는 파일 수를 워커 수의 2배로 묶어 메모리에 쌓이는 청크를 제한
+    - 순차 처리 시에는 JSON 항목 단위 스트리밍을 그대로 유지
+      (근사 중복 병합도 파일을 두 번 스트리밍하므로 파일 전체를 메모리에 올리지 않음,
+       병렬 처리 시에는 워커가 파일 하나의 청크를 목록으로 만들어 돌려줌)
+    결과 순서와 내용은 순차 처리와 동일하므로 청크 ID도 같다.
+    """
+    file_paths = list(file_paths)
+    if dedup_threshold is None:
+        dedup_threshold = Config.MEDICATION_DEDUP_THRESHOLD
+    workers = min(resolve_ingest_workers(workers), len(file_paths))
+    if workers > 1 and _total_size(file_paths) < PARALLEL_MIN_BYTES:
+        workers = 1
+
+    # fork가 아닌 방식(spawn 등)은 워커가 앱 진입 모듈을 다시 import하므로 순차 처리
+    if workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        logger.info("fork를 지원하지 않는 플랫폼이라 문서 파싱을 순차 처리합니다.")
+        workers = 1
+    if workers <= 1:
+        for file_path in file_paths:
+            yield file_path, iter_file_documents(collection_type, file_path, dedup_threshold)
+        return
+
+    logger.info(f"{collection_type} 파일 {len(file_paths)}개를 프로세스 {workers}개로 파싱합니다.")
+    pending = deque()
+    remaining = iter(file_paths)
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+
+    def submit_next() -> bool:
+        file_path = next(remaining, None)
+        if file_path is None:
+            return False
+        pending.append((file_path, executor.submit(load_file_documents, collection_type, file_path, dedup_threshold)))
+        return True
+
+    try:
+        for _ in range(workers * 2):
+            if not submit_next():
+                break
+
+        while pending:
+            file_path, future = pending.popleft()
+            try:
+                docs = future.result()
+            except BrokenProcessPool as e:
+                # 워커가 비정상 종료되면 남은 파일은 현재 프로세스에서 순차 처리
+                logger.warning(f"문서 파싱 프로세스 풀 중단, 순차 처리로 전환합니다: {e}")
+                for rest_path in [file_path] + [path for path, _ in pending] + list(remaining):
+                    yield rest_path, iter_file_documents(collection_type, rest_path, dedup_threshold)
+                return
+            except Exception as e:
+                # 파싱 오류는 순차 처리와 같이 그 파일의 청크를 소비할 때 발생시킴 (호출 측이 파일 단위로 처리)
+                docs = _raising_documents(e)
+            submit_next()
+            yield file_path, iter(docs)
+    finally:
+        # 소비가 중간에 멈춰도 대기 중인 파일 파싱은 취소
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _raising_documents(error: Exception) -> Iterator[Document]:
+    raise error
+    yield  # 제너레이터로 만들어 소비 시점에 오류가 나도록 함
+
+
+# -------------------------
+# Markdown loader
+# -------------------------
+def load_markdown_documents(file_path: Path) -> List[Document]:
+    """Markdown 파일 청크 분할 (읽기 실패는 호출 측으로 전달해 기존 청크를 유지하게 함)"""
+    text = file_path.read_text(encoding="utf-8")
+
+    meta = extract_document_metadata(text)
+    try:
+        sections = get_markdown_splitter().split_text(text)
+    except Exception as e:
+        logger.warning(f"Markdown 분할 실패({file_path}), 전체를 하나로 처리: {e}")
+        sections = [text]
+
+    docs: List[Document] = []
+    for i, sec in enumerate(sections):
+        if isinstance(sec, Document):
+            content = sec.page_content
+            sec_meta = sec.metadata or {}
+        else:
+            content = str(sec)
+            sec_meta = {}
+
+        clean = remove_metadata_blocks(content)
+        if not clean.strip():
+            continue
+
+        # 긴 섹션은 토큰 예산에 맞춰 나눔 (짧은 섹션은 청크 하나)
+        chunks = get_text_chunker().split(clean)
+        for c_i, (chunk, tokens) in enumerate(chunks):
+            metadata = {
+                **meta, **sec_meta, "source_file": file_path.name, "file_path": str(file_path), "section_index": i,
+                "chunk_index": c_i, "total_chunks": len(chunks), "token_count": tokens,
+            }
+            docs.append(Document(page_content=chunk, metadata=sanitize_metadata(metadata)))
+
+    return docs
+
+
+def extract_document_metadata(content: str) -> Dict[str, Any]:
+    metadata: Dict[str, Any] = {}
+    match = METADATA_BLOCK_PATTERN.search(content)
+    if not match:
+        return metadata
+
+    yaml_content = match.group(1)
+    for line in yaml_content.splitlines():
+        line = line.strip()
+        if ":" in line and not line.startswith("-"):
+            key, val = line.split(":", 1)
+            key = key.strip()
+            value = val.strip().strip('"\'')
+            if key == "categories":
+                metadata[key] = parse_yaml_list(value)
+            else:
+                metadata[key] = value
+    return metadata
+
+
+def parse_yaml_list(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return [str(v).strip().strip('"\'') for v in value]
+    if isinstance(value, str) and value.startswith("[") and value.endswith("]"):
+        items = value[1:-1].split(",")
+        return [item.strip().strip('"\'') for item in items]
+    return [str(value).strip().strip('"\'')]
+
+
+def remove_metadata_blocks(content: str) -> str:
+    cleaned = METADATA_BLOCK_STRIP_PATTERN.sub("", content)
+    cleaned = BLANK_LINES_PATTERN.sub("\n\n", cleaned)
+    return cleaned.strip()
+
+
+# -------------------------
+# JSON loader (robust)
+# -------------------------
+def iter_json_documents(file_path: Path, dedup_threshold: Optional[float] = None) -> Iterator[Document]:
+    """
+    JSON 파일을 항목 단위로 스트리밍 파싱하면서 바로 청크 Document를 생성
+    파일 파싱 오류(저장 도중의 잘린 파일 등)는 삼키지 않고 그대로 발생시킨다.
+    호출 측(sync_collection)이 그 파일의 기존 청크를 유지하고 다음 동기화 때 다시 시도한다.
+    """
+    if dedup_threshold is None:
+        dedup_threshold = Config.MEDICATION_DEDUP_THRESHOLD
+    if dedup_threshold > 0:
+        items = collapse_near_duplicates(file_path, dedup_threshold)
+    else:
+        items = iter_json_items(file_path)
+    for idx, item in items:
+        if idx is None:
+            # 배열이 아닌 JSON (단일 객체 등)
+            yield from json_value_documents(file_path, item)
+            return
+        yield from json_item_documents(file_path, idx, item)
+
+
+def collapse_near_duplicates(file_path: Path, threshold: float) -> Iterator[Tuple[Optional[int], Any]]:
+    """
+    파일 안의 거의 같은 의약품 항목(MinHash 추정 Jaccard ≥ threshold)을 대표 하나로 병합해 항목 단위로 반환
+    - 대표는 클러스터에서 가장 먼저 나온 항목 (item_index가 그대로라 청크 ID가 안정적)
+    - 나머지 제품명은 본문 끝 '유사 제품' 줄과 duplicate_members 메타데이터로 남겨 제품명 검색을 유지
+    - 대상 동물(species)이나 백신 여부 라벨이 다른 항목은 본문이 비슷해도 병합하지 않음
+      (대표의 라벨로 메타데이터 필터가 걸리므로 개/고양이용 제품이 섞이면 필터에서 빠짐)
+    파일을 두 번 스트리밍한다: 1차는 MinHash 서명과 클러스터 배정(병합 항목은 제품명/회사만)만 남기고,
+    2차에서 항목을 다시 읽어 대표만 반환하므로 파일 전체를 메모리에 올리지 않는다.
+    파일 단위로 묶으므로 매니페스트의 파일별 증분 동기화와 그대로 맞물린다.
+    """
+    before = _file_signature(file_path)
+    clusterers: Dict[Tuple[str, ...], Tuple[NearDuplicateClusterer, List[int]]] = {}  # 라벨 → (클러스터러, 대표 항목 번호)
+    members_of: Dict[int, List[Dict[str, Any]]] = {}  # 대표 항목 번호 → 병합된 항목 요약
+    merged = set()                                   # 병합되어 빠지는 항목 번호
+    total = 0
+    for idx, item in iter_json_items(file_path):
+        if idx is None:
+            # 배열이 아닌 JSON은 병합 대상이 없음
+            yield idx, item
+            return
+        total += 1
+        text = item.get("text") if isinstance(item, dict) else None
+        if not isinstance(text, str) or not text.strip():
+            continue
+        key = filter_label_key(text, item.get("metadata"))
+        if key not in clusterers:
+            clusterers[key] = (NearDuplicateClusterer(threshold=threshold), [])
+        clusterer, representatives = clusterers[key]
+        representative = clusterer.add(text)
+        if representative is None:
+            representatives.append(idx)
+        else:
+            members_of.setdefault(representatives[representative], []).append(duplicate_member(item))
+            merged.add(idx)
+
+    if not merged:
+        yield from iter_json_items(file_path)
+        return
+    if _file_signature(file_path) != before:
+        raise ValueError(f"근사 중복 병합 중 파일이 바뀌었습니다: {file_path}")
+
+    logger.info(f"의약품 근사 중복 병합 ({file_path.name}): 항목 {total}개 → {total - len(merged)}개")
+    for idx, item in iter_json_items(file_path):
+        if idx in merged:
+            continue
+        if idx in members_of:
+            item = with_duplicate_members(item, members_of[idx])
+        yield idx, item
+
+
+def filter_label_key(text: str, metadata: Any) -> Tuple[str, ...]:
+    """검색 필터(MetadataFilter)에 쓰이는 종/백신 라벨 → 같은 값끼리만 병합"""
+    labels = extract_attributes(text, metadata if isinstance(metadata, dict) else None)
+    return tuple(sorted(label for label in labels if label.startswith("species:") or label == "topic:vaccine"))
+
+
+def _file_signature(file_path: Path) -> Tuple[int, int]:
+    stat = file_path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def duplicate_member(item: Dict[str, Any]) -> Dict[str, Any]:
+    """병합되는 항목에서 대표에 남길 정보만 추림 (1차 스트리밍에서 항목 본문을 들고 있지 않도록)"""
+    meta = item.get("metadata") if isinstance(item.get("metadata"), dict) else {}
+    return {
+        "document_id": item.get("id"),
+        "product_name": meta.get("product_name") or item.get("id", ""),
+        "company": meta.get("company"),
+    }
+
+
+def with_duplicate_members(item: Dict[str, Any], members: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """대표 항목에 병합된 제품 목록(duplicate_member 요약)을 본문/메타데이터로 추가한 사본"""
+    names = ", ".join(f"{m['product_name']} ({m['company']})" if m["company"] else m["product_name"] for m in members)
+    item = dict(item)
+    item["text"] = f"{item['text'].rstrip()}\n\n유사 제품: {names}"
+    item["metadata"] = {
+        **(item.get("metadata") if isinstance(item.get("metadata"), dict) else {}),
+        "duplicate_count": len(members),
+        "duplicate_members": members,
+    }
+    return item
+
+
+def json_item_documents(file_path: Path, idx: int, item: Any) -> Iterator[Document]:
+    """배열의 항목 하나를 청크 Document로 변환"""
+    try:
+        if isinstance(item, dict):
+            # prefer 'text' if present and non-empty
+            content = item.get("text") if isinstance(item.get("text"), str) and item.get("text").strip() else None
+            if content is None:
+                # fallback: serialize entire item
+                content = json.dumps(item, ensure_ascii=False, indent=2)
+            metadata = {
+                "file_path": str(file_path),
+                "data_type": "medication",
+                "item_index": idx,
+            }
+            # merge item metadata if present
+            if "metadata" in item and isinstance(item["metadata"], dict):
+                metadata.update(item["metadata"])
+            if "id" in item:
+                metadata["document_id"] = item["id"]
+
+        else:
+            # non-dict item -> stringify
+            content = json.dumps(item, ensure_ascii=False)
+            metadata = {"file_path": str(file_path), "data_type": "medication", "item_index": idx}
+
+        # 토큰 예산 기준 분할 (RecursiveJsonSplitter 대신 문장 경계 우선)
+        chunks = get_text_chunker().split(content)
+    except Exception as item_e:
+        logger.warning(f"JSON item 처리 실패 ({file_path}, index={idx}): {item_e}")
+        return
+
+    for c_i, (chunk, tokens) in enumerate(chunks):
+        meta_copy = dict(metadata)
+        meta_copy.update({"chunk_index": c_i, "total_chunks": len(chunks), "token_count": tokens})
+        yield Document(page_content=chunk, metadata=sanitize_metadata(meta_copy))
+
+
+def json_value_documents(file_path: Path, data: Any) -> Iterator[Document]:
+    """최상위가 배열이 아닌 JSON을 통째로 직렬화해 청크 분할"""
+    if isinstance(data, dict):
+        # single JSON object: serialize and chunk
+        content = json.dumps(data, ensure_ascii=False, indent=2)
+    else:
+        # fallback: stringify whole file
+        content = str(data)
+    chunks = get_text_chunker().split(content)
+    for c_i, (chunk, tokens) in enumerate(chunks):
+        meta = {"file_path": str(file_path), "data_type": "medication", "chunk_index": c_i, "total_chunks": len(chunks),
+                "token_count": tokens}
+        yield Document(page_content=chunk, metadata=sanitize_metadata(meta))
+
+
+# -------------------------
+# Utilities
+# -------------------------
+def sanitize_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert metadata values to primitives (str/int/float/bool). Lists/dicts -> JSON string.
+    """
+    safe: Dict[str, Any] = {}
+    for k, v in (metadata or {}).items():
+        if isinstance(v, (str, int, float, bool)) or v is None:
+            safe[k] = v
+        else:
+            try:
+                safe[k] = json.dumps(v, ensure_ascii=False) if not isinstance(v, (str, int, float, bool)) else v
+            except Exception:
+                safe[k] = str(v)
+    return safe
@@ -0,0 +1,301 @@
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from back.config import Config
+
+
+logger = logging.getLogger(__name__)
+
+# 감시 대상 문서 확장자 (md: 일반 가이드 / json: 의약품)
+WATCHED_SUFFIXES = ('.md', '.json')
+
+
+class InotifyBackend:
+    """
+    Linux inotify (ctypes로 libc 직접 호출, 추가 의존성 없음)
+    하위 디렉토리마다 watch를 걸고, 새 디렉토리가 생기면 그 아래까지 watch를 추가한다.
+    이벤트 큐가 넘치면(IN_Q_OVERFLOW) 어떤 파일이 바뀌었는지 알 수 없으므로 루트 전체를 변경으로 보고한다.
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    EVENT_HEADER = struct.Struct("iIII")   # wd, mask, cookie, len
+
+    name = "inotify"
+
+    def __init__(self, root: Path):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc를 찾을 수 없습니다.")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify를 지원하지 않는 플랫폼입니다.")
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 실패: {os.strerror(err)}")
+        self.root = Path(root)
+        self._watches: Dict[int, Path] = {}
+        self._add_tree(self.root)
+
+    def _add_watch(self, directory: Path) -> bool:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.WATCH_MASK | self.IN_ONLYDIR)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                logger.warning(f"inotify watch 한도 초과 (fs.inotify.max_user_watches): {directory}")
+            return False
+        self._watches[wd] = directory
+        return True
+
+    def _add_tree(self, directory: Path) -> Set[Path]:
+        """디렉토리와 하위 디렉토리에 watch 추가 → 그 안에 이미 있는 문서 파일 (watch 전에 생긴 파일 누락 방지)"""
+        found: Set[Path] = set()
+        for current, dirnames, filenames in os.walk(directory):
+            self._add_watch(Path(current))
+            found.update(Path(current) / name for name in filenames if name.endswith(WATCHED_SUFFIXES))
+        return found
+
+    def read(self, timeout: float) -> Set[Path]:
+        """timeout초까지 이벤트를 기다려 바뀐 경로 집합 반환"""
+        ready, _, _ = select.select([self._fd], [], [], max(0.0, timeout))
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[Path] = set()
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                logger.warning("inotify 이벤트 큐가 넘쳐 전체 문서를 다시 확인합니다.")
+                changed.add(self.root)
+                continue
+            if mask & self.IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & self.IN_DELETE_SELF:
+                changed.add(directory)
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    changed.update(self._add_tree(path))
+                else:
+                    # 디렉토리가 사라지거나 옮겨지면 그 아래 파일 목록을 알 수 없으므로 디렉토리 단위로 보고
+                    changed.add(path)
+            elif path.name.endswith(WATCHED_SUFFIXES) and not mask & self.IN_CREATE:
+                # IN_CREATE 직후에는 아직 쓰는 중이므로 IN_CLOSE_WRITE를 기다림
+                changed.add(path)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingBackend:
+    """inotify를 쓸 수 없을 때 (macOS/Windows, 네트워크 파일시스템 등) poll_seconds마다 (size, mtime) 비교"""
+
+    name = "poll"
+
+    def __init__(self, root: Path, poll_seconds: float):
+        self.root = Path(root)
+        self.poll_seconds = max(0.1, poll_seconds)
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + self.poll_seconds
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for current, _dirnames, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith(WATCHED_SUFFIXES):
+                    continue
+                path = Path(current) / name
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def read(self, timeout: float) -> Set[Path]:
+        wait = self._next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(max(0.0, timeout))
+            return set()
+        time.sleep(max(0.0, wait))
+        self._next_scan = time.monotonic() + self.poll_seconds
+        snapshot = self._scan()
+        previous, self._snapshot = self._snapshot, snapshot
+        return {path for path in previous.keys() | snapshot.keys() if previous.get(path) != snapshot.get(path)}
+
+    def close(self):
+        pass
+
+
+class DocumentWatcher:
+    """
+    문서 디렉토리 감시 → 변경을 debounce_seconds 동안 모아 on_change(경로 집합) 호출
+    - 편집기 저장처럼 짧은 시간에 이벤트가 몰려도 마지막 변경 후 조용해지면 한 번만 반영
+    - on_change가 False를 반환하면(벡터 스토어 준비 전/교체 중) 모아둔 변경을 유지하고 다음 debounce 뒤 다시 시도
+    backend: auto(inotify, 실패하면 polling) | inotify | poll
+    """
+
+    def __init__(self, root: Path, on_change: Callable[[Set[Path]], Any], debounce_seconds: Optional[float] = None,
+                 poll_seconds: Optional[float] = None, backend: Optional[str] = None):
+        self.root = Path(root)
+        self.on_change = on_change
+        self.debounce_seconds = Config.DOCUMENT_WATCHER_DEBOUNCE_SECONDS if debounce_seconds is None else debounce_seconds
+        self.poll_seconds = Config.DOCUMENT_WATCHER_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.backend_name = (backend or Config.DOCUMENT_WATCHER_BACKEND).lower()
+        self._backend = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._pending: Set[Path] = set()
+        self.applied = 0
+        self.last_applied_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def _create_backend(self):
+        if self.backend_name in ("auto", "inotify"):
+            try:
+                return InotifyBackend(self.root)
+            except (OSError, AttributeError) as e:
+                if self.backend_name == "inotify":
+                    raise
+                logger.info(f"inotify를 사용할 수 없어 polling으로 감시합니다: {e}")
+        return PollingBackend(self.root, self.poll_seconds)
+
+    def start(self) -> bool:
+        if self._thread is not None:
+            return False
+        if not self.root.is_dir():
+            raise ValueError(f"감시할 문서 경로가 없습니다: {self.root}")
+        self._backend = self._create_backend()
+        self._thread = threading.Thread(target=self._run, name="document-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"문서 감시 시작 ({self._backend.name}, debounce {self.debounce_seconds}초): {self.root}")
+        return True
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._backend is not None:
+            self._backend.close()
+
+    def _run(self):
+        deadline = None
+        while not self._stop.is_set():
+            timeout = self.poll_seconds if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                changed = self._backend.read(min(timeout, 1.0))
+            except Exception as e:
+                logger.error(f"문서 감시 중 오류: {e}", exc_info=True)
+                self.last_error = str(e)
+                self._stop.wait(self.poll_seconds)
+                continue
+            if changed:
+                self._pending.update(changed)
+                deadline = time.monotonic() + self.debounce_seconds
+            if self._pending and deadline is not None and time.monotonic() >= deadline:
+                deadline = None if self._flush() else time.monotonic() + self.debounce_seconds
+
+    def _flush(self) -> bool:
+        paths, self._pending = self._pending, set()
+        try:
+            applied = self.on_change(paths) is not False
+        except Exception as e:
+            logger.error(f"문서 변경 반영 실패: {e}", exc_info=True)
+            self.last_error = str(e)
+            applied = False
+        if not applied:
+            self._pending.update(paths)
+            return False
+        self.applied += 1
+        self.last_applied_at = time.time()
+        self.last_error = None
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        """/health 보고용 상태"""
+        status: Dict[str, Any] = {
+            "backend": self._backend.name if self._backend else None,
+            "running": self._thread is not None,
+            "pending_files": len(self._pending),
+            "applied": self.applied,
+        }
+        if self.last_applied_at is not None:
+            status["last_applied_at"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.last_applied_at))
+        if self.last_error:
+            status["error"] = self.last_error
+        return status
+
+
+def apply_document_changes(paths: Set[Path]) -> bool:
+    """
+    공유 벡터 스토어에 문서 변경 반영 (False면 아직 반영할 수 없어 나중에 다시 시도)
+    - 버전 디렉토리(VECTOR_INDEX_ARTIFACT)를 쓰면 활성 버전을 직접 고치지 않고
+      활성 버전 복사본에 바뀐 파일만 반영한 새 버전을 빌드해 무중단 교체
+      (빌드 중이면 False → 감시기가 변경을 모아 두었다가 빌드가 끝난 뒤 한 번에 반영)
+    - 아니면 바뀐 파일의 청크만 현재 서비스에 upsert/delete
+    """
+    from app.services.dailycare.vector_registry import get_vector_registry
+
+    registry = get_vector_registry()
+    if not registry.ready:
+        return False
+    logger.info(f"문서 변경 {len(paths)}건 반영: {sorted(str(path) for path in paths)[:10]}")
+    if Config.VECTOR_INDEX_ARTIFACT:
+        return registry.refresh(rebuild=True, changed_files=paths)
+    registry.service.sync_files(paths)
+    return True
+
+
+_document_watcher = None
+_document_watcher_lock = threading.Lock()
+
+def get_document_watcher() -> DocumentWatcher:
+    global _document_watcher
+    if _document_watcher is None:
+        with _document_watcher_lock:
+            if _document_watcher is None:
+                if not Config.DOCUMENTS_PATH:
+                    raise ValueError("DOCUMENTS_PATH가 설정되지 않아 문서를 감시할 수 없습니다.")
+                _document_watcher = DocumentWatcher(Path(Config.DOCUMENTS_PATH), apply_document_changes)
+    return _document_watcher
@@ -0,0 +1,431 @@
+import os
+import mmap
+import glob
+import pickle
+import struct
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from back.config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class MmapEmbeddingStore:
+    """
+    단일 파일 기반 임베딩 저장소 (append-only float32 행렬 + 해시→행 인덱스)
+
+    - embeddings.f32 : float32 벡터를 행 단위로 이어 붙인 파일 (mmap으로 읽음)
+    - embeddings.idx : 헤더 + 행 순서대로 나열한 md5 digest(16바이트) 목록
+    - embeddings.lock: 여러 프로세스(reloader, build_index.py 등)가 같은 디렉토리에 쓸 때 쓰는 flock 파일
+
+    쓰기는 항상 디렉토리 잠금 안에서 한다: 디스크 인덱스를 다시 읽어 다른 프로세스가 추가한 키를 합치고,
+    행 번호는 메모리 카운터가 아니라 실제 행렬 파일 크기에서 정한 뒤, 행렬 추가 → 인덱스 키 추가 → 헤더 행 수 갱신 순으로 기록한다.
+    헤더의 행 수가 마지막에 바뀌므로 비정상 종료 시에도 헤더에 기록된 행까지만 유효한 상태로 복구된다.
+
+    프로세스 내에서는 쓰기를 _write_lock으로 직렬화하고, 메모리 상태(dim/키/행 번호/매핑)의 교체와 조회는
+    짧게 잡는 _lock 안에서만 한다. 그래서 조회가 다른 프로세스의 쓰기(파일 잠금 대기)를 기다리지 않는다.
+    """
+
+    MATRIX_FILE = "embeddings.f32"
+    INDEX_FILE = "embeddings.idx"
+    LOCK_FILE = "embeddings.lock"
+    INDEX_MAGIC = b"EMBIDX01"
+    HEADER = struct.Struct("<8sIQ")  # magic, dim, rows
+    KEY_SIZE = 16
+
+    _instances: Dict[str, "MmapEmbeddingStore"] = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def open(cls, cache_dir: str) -> "MmapEmbeddingStore":
+        """같은 디렉토리는 프로세스 내에서 하나의 인스턴스를 공유 (open 횟수만큼 close해야 실제로 닫힘)"""
+        key = os.path.abspath(cache_dir)
+        with cls._instances_lock:
+            store = cls._instances.get(key)
+            if store is None:
+                store = cls(key)
+                cls._instances[key] = store
+            store._refs += 1
+            return store
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.matrix_path = os.path.join(cache_dir, self.MATRIX_FILE)
+        self.index_path = os.path.join(cache_dir, self.INDEX_FILE)
+        self.lock_path = os.path.join(cache_dir, self.LOCK_FILE)
+
+        self._lock = threading.RLock()        # 메모리 상태 교체/조회
+        self._write_lock = threading.Lock()   # 프로세스 내 쓰기 직렬화 (프로세스 간은 파일 잠금)
+        self.dim = 0
+        self._keys: List[bytes] = []
+        self._rows: Dict[bytes, int] = {}
+        self._refs = 0
+        self._closed = False
+
+        self._mmap: Optional[mmap.mmap] = None
+        self._matrix: Optional[np.ndarray] = None
+
+        with self._write_lock, self._file_lock():
+            self._load_index()
+            self._recover_matrix()
+        self._migrate_legacy_pickles()
+
+        logger.info(f"임베딩 저장소 로드: {cache_dir} (벡터 {len(self._keys)}개, dim={self.dim})")
+
+    # -------------------------
+    # Public API
+    # -------------------------
+    @staticmethod
+    def make_key(text: str) -> bytes:
+        return hashlib.md5(text.encode("utf-8")).digest()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._rows
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        """캐시된 벡터를 mmap 위의 view로 반환 (복사 없음)"""
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                return None
+            matrix = self._ensure_mapped(row + 1)
+        return matrix[row]
+
+    def get_many(self, keys: List[bytes]) -> Tuple[Optional[np.ndarray], List[int], List[int]]:
+        """
+        여러 키를 인덱스 한 번 훑기로 조회
+        반환: (적중한 벡터 행렬, 적중 위치 목록, 미스 위치 목록)
+        """
+        hit_positions, hit_rows, miss_positions = [], [], []
+        with self._lock:
+            rows = self._rows
+            for pos, key in enumerate(keys):
+                row = rows.get(key)
+                if row is None:
+                    miss_positions.append(pos)
+                else:
+                    hit_positions.append(pos)
+                    hit_rows.append(row)
+            if not hit_rows:
+                return None, hit_positions, miss_positions
+            matrix = self._ensure_mapped(max(hit_rows) + 1)
+        return matrix[hit_rows], hit_positions, miss_positions
+
+    def put(self, key: bytes, vector) -> None:
+        self.put_many([key], [vector])
+
+    def put_many(self, keys: List[bytes], vectors) -> None:
+        """새 벡터들을 행렬 파일 끝에 추가 (이미 있는 키는 무시, 다른 프로세스가 추가한 키 포함)"""
+        if not keys:
+            return
+        block = np.asarray(vectors, dtype=np.float32)
+        if block.ndim != 2:
+            raise ValueError("임베딩 벡터의 차원이 일치하지 않습니다.")
+
+        with self._write_lock, self._file_lock():
+            # 다른 프로세스가 그사이 추가한 행을 먼저 합쳐야 행 번호가 실제 파일과 일치함
+            self._sync_from_disk()
+            if self.dim == 0:
+                with self._lock:
+                    self.dim = block.shape[1]
+            elif block.shape[1] != self.dim:
+                raise ValueError(f"임베딩 차원 불일치: 저장소={self.dim}, 입력={block.shape[1]}")
+
+            new_keys, positions = [], []
+            seen = set()
+            for pos, key in enumerate(keys):
+                if key in self._rows or key in seen:
+                    continue
+                seen.add(key)
+                new_keys.append(key)
+                positions.append(pos)
+            if not new_keys:
+                return
+            if len(positions) != len(keys):
+                block = block[positions]
+
+            with open(self.matrix_path, "ab") as f:
+                f.write(block.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            self._append_index(new_keys)
+
+            with self._lock:
+                for key in new_keys:
+                    self._rows[key] = len(self._keys)
+                    self._keys.append(key)
+
+    def flush(self) -> None:
+        """인덱스 파일이 아직 없으면 만들어 둠 (키는 put_many가 바로 기록하므로 그 외에 남은 작업 없음)"""
+        if self._closed or os.path.exists(self.index_path):
+            return
+        with self._write_lock, self._file_lock():
+            if not os.path.exists(self.index_path):
+                self._write_index(self._keys)
+
+    def close(self) -> None:
+        """
+        열린 횟수만큼 호출되면 mmap/파일 핸들을 정리하고 프로세스 레지스트리에서 제거
+        (교체된 색인 버전/빌드 작업 디렉토리의 매핑이 프로세스가 끝날 때까지 남지 않도록)
+        """
+        with MmapEmbeddingStore._instances_lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+            if MmapEmbeddingStore._instances.get(self.cache_dir) is self:
+                del MmapEmbeddingStore._instances[self.cache_dir]
+        self.flush()
+        with self._lock:
+            self._closed = True
+            mapped, self._mmap, self._matrix = self._mmap, None, None
+            if mapped is not None:
+                try:
+                    mapped.close()
+                except BufferError:
+                    # 아직 호출자가 들고 있는 벡터 view가 있으면 그 view가 사라질 때 GC가 해제
+                    pass
+
+    # -------------------------
+    # Internal
+    # -------------------------
+    @contextmanager
+    def _file_lock(self):
+        """디렉토리 단위 프로세스 간 배타 잠금 (fcntl이 없는 플랫폼에서는 프로세스 내 잠금만 사용)"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a+b") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read_index(self) -> Tuple[int, List[bytes]]:
+        """디스크 인덱스 → (dim, 키 목록), 헤더의 행 수까지만 유효"""
+        with open(self.index_path, "rb") as f:
+            data = f.read()
+        magic, dim, rows = self.HEADER.unpack_from(data, 0)
+        if magic != self.INDEX_MAGIC:
+            raise ValueError("알 수 없는 인덱스 포맷")
+        body = data[self.HEADER.size:]
+        rows = min(rows, len(body) // self.KEY_SIZE)
+        return dim, [body[i * self.KEY_SIZE:(i + 1) * self.KEY_SIZE] for i in range(rows)]
+
+    def _load_index(self):
+        """(쓰기 잠금 안에서) 디스크 인덱스를 읽어 메모리 상태를 한 번에 교체"""
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            dim, keys = self._read_index()
+            broken = False
+        except Exception as e:
+            logger.warning(f"임베딩 인덱스 로드 실패, 빈 캐시로 시작합니다: {e}")
+            dim, keys, broken = 0, [], True
+        rows = {key: i for i, key in enumerate(keys)}
+        with self._lock:
+            self.dim, self._keys, self._rows = dim, keys, rows
+        if broken:
+            self._write_index([])
+
+    def _sync_from_disk(self):
+        """(쓰기 잠금 안에서) 디스크 인덱스가 메모리와 다르면 다시 읽고, 행렬 파일 크기와 맞춤"""
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                header = f.read(self.HEADER.size)
+            if len(header) == self.HEADER.size:
+                _, dim, rows = self.HEADER.unpack(header)
+                if rows != len(self._keys) or (dim and dim != self.dim):
+                    self._load_index()
+        self._recover_matrix()
+
+    def _recover_matrix(self):
+        """
+        (쓰기 잠금 안에서) 인덱스와 행렬 파일 크기를 맞춤
+        - 인덱스에 반영되지 않은 꼬리 행(비정상 종료 흔적)은 잘라냄 (잠금 중이라 다른 프로세스가 쓰는 중인 행은 없음)
+        - 행렬이 인덱스보다 짧으면 있는 행까지만 사용
+        """
+        row_bytes = self.dim * 4
+        size = os.path.getsize(self.matrix_path) if os.path.exists(self.matrix_path) else 0
+        if row_bytes == 0:
+            if size:
+                os.truncate(self.matrix_path, 0)
+            return
+
+        available = size // row_bytes
+        if available < len(self._keys):
+            logger.warning(f"임베딩 행렬이 인덱스보다 짧습니다. {available}행까지만 사용합니다.")
+            keys = self._keys[:available]
+            with self._lock:
+                self._keys, self._rows = keys, {key: i for i, key in enumerate(keys)}
+            self._write_index(keys)
+        expected = len(self._keys) * row_bytes
+        if size != expected:
+            os.truncate(self.matrix_path, expected)
+            # 잘라낸 영역을 가리키던 매핑은 다시 만듦
+            with self._lock:
+                self._matrix = None
+
+    def _write_index(self, keys: List[bytes]):
+        """인덱스 파일 전체를 원자적으로 교체"""
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.HEADER.pack(self.INDEX_MAGIC, self.dim, len(keys)))
+            f.write(b"".join(keys))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+
+    def _append_index(self, new_keys: List[bytes]):
+        """키를 인덱스 끝에 추가한 뒤 헤더의 행 수를 갱신 (헤더가 마지막이라 중간에 죽어도 이전 상태 유지)"""
+        if not os.path.exists(self.index_path):
+            self._write_index(self._keys + new_keys)
+            return
+        with open(self.index_path, "r+b") as f:
+            f.seek(self.HEADER.size + len(self._keys) * self.KEY_SIZE)
+            f.write(b"".join(new_keys))
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+            f.seek(0)
+            f.write(self.HEADER.pack(self.INDEX_MAGIC, self.dim, len(self._keys) + len(new_keys)))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _ensure_mapped(self, rows: int) -> np.ndarray:
+        if self._matrix is not None and self._matrix.shape[0] >= rows:
+            return self._matrix
+        # 행렬이 커졌으면 다시 매핑 (기존 view는 이전 mmap을 계속 참조하므로 안전)
+        with open(self.matrix_path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mmap = mapped
+        self._matrix = np.frombuffer(mapped, dtype=np.float32).reshape(-1, self.dim)
+        return self._matrix
+
+    def _migrate_legacy_pickles(self):
+        """기존 텍스트별 .pkl 캐시 파일을 단일 저장소로 옮기고 삭제"""
+        legacy_files = glob.glob(os.path.join(self.cache_dir, "*.pkl"))
+        if not legacy_files:
+            return
+
+        logger.info(f"기존 pickle 임베딩 캐시 {len(legacy_files)}개를 이전합니다.")
+        keys, vectors, migrated = [], [], []
+        dim = self.dim
+        for path in legacy_files:
+            try:
+                key = bytes.fromhex(os.path.splitext(os.path.basename(path))[0])
+                with open(path, "rb") as f:
+                    vector = pickle.load(f)
+                if len(key) != self.KEY_SIZE or (dim and len(vector) != dim):
+                    continue
+                dim = dim or len(vector)
+                keys.append(key)
+                vectors.append(vector)
+                migrated.append(path)
+            except Exception as e:
+                logger.warning(f"pickle 캐시 이전 실패 ({path}): {e}")
+
+        for start in range(0, len(keys), 1000):
+            self.put_many(keys[start:start + 1000], vectors[start:start + 1000])
+        self.flush()
+
+        for path in migrated:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        logger.info(f"pickle 임베딩 캐시 이전 완료: {len(migrated)}개")
+
+
+class EmbeddingLRUCache:
+    """
+    프로세스 내 메모리 LRU 캐시 (항목 수 + 바이트 예산 기준으로 제거)
+    동일한 쿼리 임베딩을 디스크까지 가지 않고 dict 조회로 돌려주기 위한 1차 캐시
+    """
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._data.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key: bytes, vector) -> None:
+        vector = np.array(vector, dtype=np.float32)
+        if self.max_entries <= 0 or vector.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._data[key] = vector
+            self._bytes += vector.nbytes
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+# 전역 인스턴스 (모든 VectorStoreService가 공유)
+_shared_lru = None
+_shared_lru_lock = threading.Lock()
+
+def get_shared_embedding_lru() -> EmbeddingLRUCache:
+    global _shared_lru
+    if _shared_lru is None:
+        with _shared_lru_lock:
+            if _shared_lru is None:
+                _shared_lru = EmbeddingLRUCache(
+                    max_entries=Config.EMBEDDING_LRU_MAX_ENTRIES,
+                    max_bytes=Config.EMBEDDING_LRU_MAX_BYTES,
+                )
+    return _shared_lru
@@ -0,0 +1,283 @@
+import re
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import tiktoken
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from back.config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucketRateLimiter:
+    """
+    요청 수 / 토큰 수 두 개의 토큰 버킷으로 임베딩 API 호출 속도를 제한
+    OpenAI 응답의 x-ratelimit-* 헤더를 읽어 한도와 남은 양을 실제 값에 맞춘다.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self.request_level = self.request_capacity
+        self.token_level = self.token_capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self.request_level = min(self.request_capacity, self.request_level + elapsed * self.request_capacity / 60.0)
+        self.token_level = min(self.token_capacity, self.token_level + elapsed * self.token_capacity / 60.0)
+
+    def acquire(self, tokens: int = 0):
+        """요청 1건 + tokens 만큼의 여유가 생길 때까지 대기"""
+        # 버킷 용량보다 큰 요청은 용량만큼만 요구 (영원히 대기하지 않도록)
+        tokens = min(float(tokens), self.token_capacity)
+        with self._cond:
+            while True:
+                self._refill()
+                now = time.monotonic()
+                if now < self._paused_until:
+                    self._cond.wait(self._paused_until - now)
+                    continue
+                if self.request_level >= 1 and self.token_level >= tokens:
+                    self.request_level -= 1
+                    self.token_level -= tokens
+                    return
+                need_requests = max(0.0, 1 - self.request_level) * 60.0 / self.request_capacity
+                need_tokens = max(0.0, tokens - self.token_level) * 60.0 / self.token_capacity
+                self._cond.wait(max(need_requests, need_tokens, 0.01))
+
+    def pause(self, seconds: float):
+        """429 등으로 일정 시간 모든 요청을 멈춤"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def update_from_headers(self, headers):
+        """x-ratelimit-limit/remaining/reset 헤더로 버킷 상태 보정"""
+        with self._cond:
+            self._refill()
+            limit_requests = self._to_float(headers.get("x-ratelimit-limit-requests"))
+            limit_tokens = self._to_float(headers.get("x-ratelimit-limit-tokens"))
+            remaining_requests = self._to_float(headers.get("x-ratelimit-remaining-requests"))
+            remaining_tokens = self._to_float(headers.get("x-ratelimit-remaining-tokens"))
+
+            if limit_requests:
+                self.request_capacity = limit_requests
+            if limit_tokens:
+                self.token_capacity = limit_tokens
+            if remaining_requests is not None:
+                self.request_level = min(self.request_level, remaining_requests)
+            if remaining_tokens is not None:
+                self.token_level = min(self.token_level, remaining_tokens)
+            self._cond.notify_all()
+
+    def observe_response(self, response):
+        """httpx response 이벤트 훅 (OpenAI 클라이언트의 모든 응답에서 호출)"""
+        try:
+            self.update_from_headers(response.headers)
+            if response.status_code == 429:
+                retry_after = self._to_float(response.headers.get("retry-after")) \
+                    or self._parse_duration(response.headers.get("x-ratelimit-reset-tokens")) \
+                    or 1.0
+                logger.warning(f"임베딩 API 속도 제한(429), {retry_after:.1f}초 대기")
+                self.pause(retry_after)
+        except Exception as e:
+            logger.debug(f"rate limit 헤더 처리 실패: {e}")
+
+    @staticmethod
+    def _to_float(value) -> Optional[float]:
+        try:
+            return float(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _parse_duration(value) -> Optional[float]:
+        """'6m0s', '1.5s', '20ms' 형식의 reset 값을 초 단위로 변환"""
+        if not value:
+            return None
+        total = 0.0
+        for number, unit in re.findall(r"([\d.]+)(ms|s|m|h)", str(value)):
+            total += float(number) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+        return total or None
+
+
+class UnlimitedRateLimiter:
+    """호출 한도가 없는 임베딩(로컬 제공자)용 — 대기하지 않음"""
+
+    def acquire(self, tokens: int = 0):
+        return
+
+    def pause(self, seconds: float):
+        return
+
+
+# 전역 인스턴스 (임베딩 클라이언트와 파이프라인이 공유)
+_shared_limiter = None
+_shared_limiter_lock = threading.Lock()
+
+def get_shared_rate_limiter() -> TokenBucketRateLimiter:
+    global _shared_limiter
+    if _shared_limiter is None:
+        with _shared_limiter_lock:
+            if _shared_limiter is None:
+                _shared_limiter = TokenBucketRateLimiter(Config.EMBEDDING_RPM, Config.EMBEDDING_TPM)
+    return _shared_limiter
+
+
+# tiktoken 인코딩은 처음 사용할 때 내려받으므로, 오프라인이면 None (바이트 수로 추정)
+_token_encoder = None
+_token_encoder_loaded = False
+_token_encoder_lock = threading.Lock()
+
+def get_token_encoder():
+    global _token_encoder, _token_encoder_loaded
+    if not _token_encoder_loaded:
+        with _token_encoder_lock:
+            if not _token_encoder_loaded:
+                try:
+                    _token_encoder = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    logger.warning(f"tiktoken 인코딩을 불러올 수 없어 토큰 수를 추정합니다: {e}")
+                _token_encoder_loaded = True
+    return _token_encoder
+
+
+class EmbeddingPipeline:
+    """
+    문서 스트림을 토큰/개수 기준 배치로 묶어 N개까지 동시에 임베딩하는 파이프라인
+    - 실제 API 호출마다 rate limiter 통과 (캐시 래퍼면 캐시 미스만 호출/과금), 실패 시 지수 백오프로 재시도
+    - 임베딩이 끝난 배치는 호출한 스레드에서 write_batch로 순서대로 기록 (저장소 쓰기는 직렬)
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        limiter: Optional[TokenBucketRateLimiter] = None,
+        max_in_flight: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_tokens_per_batch: Optional[int] = None,
+        max_retries: Optional[int] = None,
+    ):
+        self.embedding = embedding
+        self.limiter = limiter or get_shared_rate_limiter()
+        self.max_in_flight = max(1, max_in_flight or Config.EMBEDDING_MAX_IN_FLIGHT)
+        self.batch_size = max(1, batch_size or Config.EMBEDDING_BATCH_SIZE)
+        self.max_tokens_per_batch = max_tokens_per_batch or Config.EMBEDDING_MAX_TOKENS_PER_BATCH
+        self.max_retries = Config.EMBEDDING_MAX_RETRIES if max_retries is None else max_retries
+        self.encoder = get_token_encoder()
+        self._stats_lock = threading.Lock()
+
+    def run(
+        self,
+        documents: Iterable[Document],
+        write_batch: Callable[[List[Document], List[List[float]]], None],
+        label: str = "",
+    ) -> Dict[str, Any]:
+        stats = {
+            "batches": 0, "documents": 0, "tokens": 0, "retries": 0,
+            "failed_batches": 0, "failed_documents": 0, "failed_ids": [],
+        }
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            pending = {}
+            batches = self._iter_batches(documents)
+            exhausted = False
+
+            while pending or not exhausted:
+                # 동시 요청 수가 찰 때까지 배치 제출
+                while not exhausted and len(pending) < self.max_in_flight:
+                    batch = next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                        break
+                    docs, tokens, token_counts = batch
+                    pending[executor.submit(self._embed_with_retry, docs, tokens, token_counts, stats)] = (docs, tokens)
+
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    docs, tokens = pending.pop(future)
+                    try:
+                        vectors = future.result()
+                        write_batch(docs, vectors)
+                        stats["batches"] += 1
+                        stats["documents"] += len(docs)
+                        stats["tokens"] += tokens
+                    except Exception as e:
+                        logger.error(f"{label} 배치({len(docs)}개) 최종 실패: {e}")
+                        stats["failed_batches"] += 1
+                        stats["failed_documents"] += len(docs)
+                        stats["failed_ids"].extend(doc.metadata.get("chunk_id") for doc in docs)
+
+        elapsed = time.monotonic() - started
+        stats["elapsed_seconds"] = round(elapsed, 3)
+        stats["documents_per_second"] = round(stats["documents"] / elapsed, 2) if elapsed else 0.0
+        stats["tokens_per_second"] = round(stats["tokens"] / elapsed, 2) if elapsed else 0.0
+        log = logger.info if stats["documents"] or stats["failed_documents"] else logger.debug
+        log(
+            f"{label} 임베딩 파이프라인 완료: 문서 {stats['documents']}개 / 배치 {stats['batches']}개, "
+            f"{elapsed:.1f}초 ({stats['documents_per_second']} docs/s, {stats['tokens_per_second']} tokens/s), "
+            f"재시도 {stats['retries']}회, 실패 문서 {stats['failed_documents']}개"
+        )
+        return stats
+
+    def _iter_batches(self, documents: Iterable[Document]) -> Iterator[tuple]:
+        batch: List[Document] = []
+        token_counts: List[int] = []
+        token_count = 0
+        for doc in documents:
+            tokens = self.count_tokens(doc)
+            if batch and (token_count + tokens > self.max_tokens_per_batch or len(batch) >= self.batch_size):
+                yield batch, token_count, token_counts
+                batch, token_counts, token_count = [], [], 0
+            batch.append(doc)
+            token_counts.append(tokens)
+            token_count += tokens
+        if batch:
+            yield batch, token_count, token_counts
+
+    def count_tokens(self, doc: Document) -> int:
+        # 청크 분할 때 세어 둔 토큰 수가 있으면 다시 인코딩하지 않음
+        token_count = doc.metadata.get("token_count")
+        if isinstance(token_count, int) and token_count > 0:
+            return token_count
+        if self.encoder is None:
+            # 한글 한 글자(3바이트) ≈ 1토큰, 영문은 넉넉하게 3바이트 ≈ 1토큰으로 보수적으로 추정
+            return len(doc.page_content.encode("utf-8")) // 3 + 1
+        return len(self.encoder.encode(doc.page_content))
+
+    def _embed_with_retry(self, docs: List[Document], tokens: int, token_counts: List[int],
+                          stats: Dict[str, Any]) -> List[List[float]]:
+        texts = [doc.page_content for doc in docs]
+        # 캐시 래퍼(CachedEmbeddings)는 캐시 조회 후 실제 API 호출마다 limiter를 통과시킴
+        embed_rate_limited = getattr(self.embedding, "embed_documents_rate_limited", None)
+        attempt = 0
+        while True:
+            try:
+                if embed_rate_limited is not None:
+                    return embed_rate_limited(texts, self.limiter, token_counts)
+                self.limiter.acquire(tokens)
+                return self.embedding.embed_documents(texts)
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                delay = min(60.0, (2 ** (attempt - 1))) + random.uniform(0, 0.5)
+                with self._stats_lock:
+                    stats["retries"] += 1
+                logger.warning(f"임베딩 배치 실패 ({attempt}/{self.max_retries}), {delay:.1f}초 후 재시도: {e}")
+                time.sleep(delay)
@@ -0,0 +1,96 @@
+import logging
+from typing import List, Optional, Tuple
+
+import httpx
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from back.config import Config
+from app.services.dailycare.embedding_pipeline import get_shared_rate_limiter
+
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_PROVIDERS = ("openai", "local")
+LOCAL_EMBEDDING_DEFAULT_DIM = 256
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    문자 n-gram 해싱 임베딩 (결정적, 외부 호출 없음)
+    소문자로 바꾼 본문의 1~3글자 n-gram을 해시해 dim 차원에 ±1로 더하고 L2 정규화한다.
+    파이썬 hash()는 프로세스마다 달라지므로 numpy 정수 연산으로 해시한다.
+    의미 검색 품질은 OpenAI 임베딩보다 낮으므로 오프라인 색인 생성/테스트/부하 테스트용이다.
+    """
+
+    def __init__(self, dim: int = LOCAL_EMBEDDING_DEFAULT_DIM, ngram_range: Tuple[int, int] = (1, 3)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text).tolist()
+
+    def _embed(self, text: str) -> np.ndarray:
+        normalized = " ".join((text or "").lower().split())
+        codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        with np.errstate(over="ignore"):
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+                count = len(codes) - n + 1
+                if count <= 0:
+                    continue
+                hashes = np.full(count, n, dtype=np.uint64)
+                for offset in range(n):
+                    hashes = hashes * np.uint64(1000003) + codes[offset:offset + count]
+                # splitmix64 마무리 단계로 비트를 섞음
+                hashes ^= hashes >> np.uint64(30)
+                hashes *= np.uint64(0xBF58476D1CE4E5B9)
+                hashes ^= hashes >> np.uint64(27)
+                hashes *= np.uint64(0x94D049BB133111EB)
+                hashes ^= hashes >> np.uint64(31)
+                signs = np.where(hashes >> np.uint64(63), -1.0, 1.0).astype(np.float32)
+                np.add.at(vector, (hashes % np.uint64(self.dim)).astype(np.int64), signs)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def _provider_name(provider: Optional[str]) -> str:
+    name = (provider or Config.EMBEDDING_PROVIDER).lower()
+    if name not in EMBEDDING_PROVIDERS:
+        raise ValueError(f"지원하지 않는 임베딩 제공자: {name}")
+    return name
+
+
+def embedding_signature(provider: Optional[str] = None) -> str:
+    """
+    콜렉션/캐시를 구분하는 임베딩 식별자 (제공자·모델·차원)
+    - openai: 모델명 (+ @차원)
+    - local : local-hashing@차원
+    """
+    name = _provider_name(provider)
+    if name == "local":
+        return f"local-hashing@{Config.EMBEDDING_DIMENSIONS or LOCAL_EMBEDDING_DEFAULT_DIM}"
+    return Config.EMBEDDING_MODEL + (f"@{Config.EMBEDDING_DIMENSIONS}" if Config.EMBEDDING_DIMENSIONS else "")
+
+
+def create_embeddings(provider: Optional[str] = None) -> Embeddings:
+    """Config.EMBEDDING_PROVIDER 설정에 맞는 임베딩 생성 (캐시 래퍼는 VectorStoreService에서 씌움)"""
+    name = _provider_name(provider)
+    if name == "local":
+        dim = Config.EMBEDDING_DIMENSIONS or LOCAL_EMBEDDING_DEFAULT_DIM
+        logger.info(f"로컬 해싱 임베딩 사용 (dim={dim}, API 호출 없음)")
+        return HashingEmbeddings(dim)
+
+    if not Config.OPENAI_API_KEY:
+        raise ValueError("EMBEDDING_PROVIDER=openai인데 OPENAI_API_KEY가 설정되지 않았습니다 (오프라인이면 EMBEDDING_PROVIDER=local).")
+    # 응답 헤더의 rate limit 정보를 공유 limiter에 전달
+    return OpenAIEmbeddings(
+        api_key=Config.OPENAI_API_KEY,
+        model=Config.EMBEDDING_MODEL,
+        dimensions=Config.EMBEDDING_DIMENSIONS,
+        http_client=httpx.Client(event_hooks={"response": [get_shared_rate_limiter().observe_response]}),
+    )
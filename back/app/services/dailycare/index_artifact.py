@@ -0,0 +1,287 @@
+"""
+미리 빌드한 벡터 색인 artifact (build_index.py가 생성, 앱은 부팅 시 열기만 함)
+
+<root>/
+    CURRENT                      활성 버전 이름 (원자적으로 교체)
+    <version>/
+        artifact.json            형식/버전, 임베딩·청크 설정, 콜렉션별 문서 수와 content_digest
+        vector_db/               Chroma 디렉토리 + manifests/ + keyword_index/ + vector_index/
+        embedding_cache*/        임베딩 캐시 (다음 빌드/증분 동기화에서 재사용)
+"""
+import os
+import json
+import time
+import hashlib
+import shutil
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from back.config import Config
+from app.services.dailycare.embedding_provider import embedding_signature
+from app.services.dailycare.index_manifest import IndexManifest
+from app.services.dailycare.text_chunker import chunking_signature
+
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 1
+ARTIFACT_FILE = "artifact.json"
+CURRENT_FILE = "CURRENT"
+VECTOR_DB_DIR = "vector_db"
+
+
+def new_version_name(digest: str = "") -> str:
+    """정렬하면 생성 순서가 되는 버전 이름 (시각 + 내용 digest 앞자리)"""
+    name = time.strftime("%Y%m%d-%H%M%S")
+    return f"{name}-{digest[:8]}" if digest else name
+
+
+def current_version(root: Path) -> Optional[str]:
+    current = Path(root) / CURRENT_FILE
+    if not current.exists():
+        return None
+    version = current.read_text(encoding="utf-8").strip()
+    return version or None
+
+
+def resolve_artifact_dir(path: Path) -> Path:
+    """artifact 경로 해석: 버전 디렉토리(artifact.json 포함) 또는 CURRENT 파일이 있는 루트"""
+    path = Path(path)
+    if (path / ARTIFACT_FILE).exists():
+        return path
+    version = current_version(path)
+    if version is None:
+        raise ValueError(f"색인 artifact를 찾을 수 없습니다 (artifact.json/CURRENT 없음): {path}")
+    artifact_dir = path / version
+    if not (artifact_dir / ARTIFACT_FILE).exists():
+        raise ValueError(f"CURRENT가 가리키는 버전이 없습니다: {artifact_dir}")
+    return artifact_dir
+
+
+def activate_version(root: Path, version: str):
+    """CURRENT를 새 버전으로 원자적으로 교체"""
+    root = Path(root)
+    if not (root / version / ARTIFACT_FILE).exists():
+        raise ValueError(f"활성화할 버전이 없습니다: {root / version}")
+    tmp_path = root / (CURRENT_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, root / CURRENT_FILE)
+
+
+def list_versions(root: Path) -> List[str]:
+    root = Path(root)
+    if not root.exists():
+        return []
+    return sorted(p.name for p in root.iterdir() if p.is_dir() and (p / ARTIFACT_FILE).exists())
+
+
+def prune_versions(root: Path, keep: int, protect: Iterable[str] = ()) -> List[str]:
+    """최근 keep개만 남기고 오래된 버전 삭제 (활성 버전과 protect에 있는 버전(아직 열려 있는 버전)은 항상 유지)"""
+    keep_always = {current_version(root), *protect}
+    versions = list_versions(root)
+    removed = []
+    for version in versions[:max(0, len(versions) - max(1, keep))]:
+        if version in keep_always:
+            continue
+        shutil.rmtree(Path(root) / version, ignore_errors=True)
+        removed.append(version)
+    if removed:
+        logger.info(f"오래된 색인 버전 {len(removed)}개 삭제: {removed}")
+    return removed
+
+
+def build_version(root: Path, documents_path: Path, clean: bool = False, activate: bool = True,
+                  keep: Optional[int] = None, changed_files: Optional[Iterable[Path]] = None) -> Optional[str]:
+    """
+    새 색인 버전을 빌드해 버전 이름 반환 (실패하면 None, 작업 디렉토리는 삭제)
+    활성 버전은 건드리지 않고 작업 디렉토리에서 만든 뒤 통째로 버전 디렉토리로 옮기므로,
+    빌드 중에도 기존 버전은 그대로 검색에 쓰인다.
+    keep을 주면 활성화 후 오래된 버전을 정리 (앱에서 교체할 때는 이전 서비스를 닫은 뒤 따로 정리)
+
+    기존 버전이 있으면 버전 디렉토리 전체(Chroma DB, 검색 색인 스냅샷, 임베딩 캐시)를 복사하므로
+    비용이 색인 크기에 비례한다. changed_files(문서 감시기가 모은 경로)를 주면 복사본을 동기화 없이 열고
+    그 파일들만 반영하며, 내용이 기존 버전과 같으면 새 버전을 만들지 않고 기존 버전 이름을 반환한다.
+    """
+    from app.services.dailycare.vectorstore_service import VectorStoreService
+
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    base_version = None if clean else current_version(root)
+    work_dir = root / f".building-{os.getpid()}-{time.monotonic_ns()}"
+    if base_version:
+        # 이전 버전의 Chroma/매니페스트/임베딩 캐시에서 시작 → 바뀐 파일만 다시 임베딩
+        logger.info(f"기존 버전 {base_version}에서 증분 빌드합니다.")
+        shutil.copytree(root / base_version, work_dir, ignore=shutil.ignore_patterns(ARTIFACT_FILE))
+    else:
+        work_dir.mkdir()
+
+    started = time.time()
+    service = VectorStoreService(vector_db=str(work_dir / VECTOR_DB_DIR), documents_path=str(documents_path))
+    base = load_artifact(root / base_version) if base_version and changed_files is not None else None
+    incremental = base is not None and _same_settings(base)
+    try:
+        if incremental:
+            service.open_vector_db()
+            service.sync_files(changed_files)
+            stores = service.stores
+        else:
+            stores = service.initialize_vector_db()
+
+        failed = sum(stats.get("failed_documents", 0) for stats in service.last_pipeline_stats.values())
+        if failed:
+            logger.error(f"임베딩 실패 청크 {failed}개 — 새 버전을 만들지 않습니다.")
+            return None
+        if not any(stores.values()):
+            logger.error(f"색인된 문서가 없습니다: {documents_path}")
+            return None
+
+        pipeline = service.last_pipeline_stats.values()
+        build_info = {
+            "seconds": round(time.time() - started, 3),
+            "base_version": base_version,
+            "documents_path": str(documents_path),
+            "embedded_documents": sum(stats.get("documents", 0) for stats in pipeline),
+            "embedded_tokens": sum(stats.get("tokens", 0) for stats in pipeline),
+        }
+        data = describe_service(service, build=build_info)
+        if incremental and data["content_digest"] == base.get("content_digest"):
+            logger.info(f"문서 변경이 색인 내용을 바꾸지 않아 기존 버전 {base_version}을 유지합니다.")
+            return base_version
+        version = data["version"]
+        problems = verify_artifact(data, service)
+        if problems:
+            logger.error(f"빌드 결과 검증 실패: {problems}")
+            return None
+        write_artifact(work_dir, data)
+    finally:
+        # 작업 디렉토리를 옮기거나 지운 뒤 flush가 사라진 경로에 쓰지 않도록 여기서 닫음
+        service.close()
+        if not (work_dir / ARTIFACT_FILE).exists():
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if (root / version).exists():
+        # 같은 초에 내용이 같은 버전이 이미 있으면 그대로 사용
+        shutil.rmtree(work_dir, ignore_errors=True)
+    else:
+        os.replace(work_dir, root / version)
+    logger.info(
+        f"색인 버전 {version} 생성 ({build_info['seconds']:.1f}초, 임베딩 {build_info['embedded_documents']}개 청크, "
+        + ", ".join(f"{ct} {c['count']}개" for ct, c in data["collections"].items()) + ")"
+    )
+    if activate:
+        activate_version(root, version)
+        logger.info(f"CURRENT → {version}")
+        if keep:
+            prune_versions(root, keep)
+    return version
+
+
+# -------------------------
+# artifact.json
+# -------------------------
+def _same_settings(data: Dict[str, Any]) -> bool:
+    """artifact가 현재 임베딩/청크 분할 설정으로 만들어졌는지 (다르면 모든 파일을 다시 확인해야 함)"""
+    return data.get("embedding") == embedding_signature(Config.EMBEDDING_PROVIDER) and data.get("chunking") == chunking_signature()
+
+
+def describe_service(service, version: str = "", build: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """색인을 만든 서비스 상태로 artifact.json 내용 구성 (version이 비면 시각 + 내용 digest로 이름 생성)"""
+    collections = {}
+    for collection_type, collection_name in service.collections.items():
+        manifest = IndexManifest.load(service._manifest_path(collection_name), collection_name)
+        store = service.stores.get(collection_type)
+        collections[collection_type] = {
+            "collection": collection_name,
+            "count": store._collection.count() if store else 0,
+            "files": len(manifest.files),
+            "content_digest": manifest.content_digest(),
+        }
+    digest = hashlib.sha1("".join(c["content_digest"] for c in collections.values()).encode("ascii")).hexdigest()
+    return {
+        "format": ARTIFACT_FORMAT,
+        "version": version or new_version_name(digest),
+        "content_digest": digest,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "embedding": service.embedding_signature,
+        "chunking": chunking_signature(),
+        "vector_backend": service.vector_backend,
+        "vector_quantization": Config.VECTOR_QUANTIZATION,
+        "collections": collections,
+        "build": build or {},
+    }
+
+
+def write_artifact(artifact_dir: Path, data: Dict[str, Any]):
+    path = Path(artifact_dir) / ARTIFACT_FILE
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_artifact(artifact_dir: Path) -> Dict[str, Any]:
+    data = json.loads((Path(artifact_dir) / ARTIFACT_FILE).read_text(encoding="utf-8"))
+    if data.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"지원하지 않는 색인 artifact 형식: {data.get('format')} ({artifact_dir})")
+    return data
+
+
+def verify_artifact(data: Dict[str, Any], service) -> List[str]:
+    """열린 서비스가 artifact.json 기록과 일치하는지 확인 → 문제 목록 (비어 있으면 정상)"""
+    problems = []
+    if data.get("embedding") != service.embedding_signature:
+        problems.append(f"임베딩 설정 불일치 (artifact {data.get('embedding')}, 현재 {service.embedding_signature})")
+    for collection_type, expected in data.get("collections", {}).items():
+        if collection_type not in service.collections:
+            problems.append(f"알 수 없는 콜렉션: {collection_type}")
+            continue
+        collection_name = service.collections[collection_type]
+        manifest = IndexManifest.load(service._manifest_path(collection_name), collection_name)
+        if manifest.content_digest() != expected.get("content_digest"):
+            problems.append(f"{collection_type} 매니페스트 digest 불일치")
+        store = service.stores.get(collection_type)
+        count = store._collection.count() if store else 0
+        if count != expected.get("count"):
+            problems.append(f"{collection_type} 문서 수 불일치 (artifact {expected.get('count')}, 실제 {count})")
+    return problems
+
+
+def open_index_artifact(path: Path):
+    """
+    artifact를 검증하고 동기화 없이 열어 VectorStoreService 반환 (임베딩 API 호출 없음)
+    임베딩 설정이 다르거나 내용이 기록과 다르면 ValueError
+    """
+    from app.services.dailycare.vectorstore_service import VectorStoreService
+
+    started = time.time()
+    artifact_dir = resolve_artifact_dir(path)
+    data = load_artifact(artifact_dir)
+    # 질의 임베딩 공간이 다르면 검색이 무의미하므로 서비스를 만들기 전에 확인
+    signature = embedding_signature(Config.EMBEDDING_PROVIDER)
+    if data.get("embedding") != signature:
+        raise ValueError(f"색인 artifact 임베딩 설정 불일치 (artifact {data.get('embedding')}, 현재 {signature})")
+    if data.get("chunking") != chunking_signature():
+        logger.warning(
+            f"색인 artifact 청크 분할 설정이 현재 설정과 다릅니다 ({data.get('chunking')} → {chunking_signature()}). "
+            f"검색에는 문제없지만 다음 빌드에서 모든 파일을 다시 파싱합니다."
+        )
+
+    service = VectorStoreService(vector_db=str(artifact_dir / VECTOR_DB_DIR))
+    service.index_version = data["version"]
+    service.open_vector_db()
+    problems = verify_artifact(data, service)
+    if problems:
+        service.close()
+        raise ValueError(f"색인 artifact 검증 실패 ({artifact_dir}): {'; '.join(problems)}")
+
+    logger.info(
+        f"색인 artifact {data['version']} 로드 완료 ({time.time() - started:.2f}초, "
+        + ", ".join(f"{ct} {c['count']}개" for ct, c in data["collections"].items()) + ")"
+    )
+    return service
@@ -0,0 +1,154 @@
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class IndexManifest:
+    """
+    콜렉션별 청크 매니페스트 (증분 재색인용)
+
+    files  : 원본 파일(상대 경로) → 파일 지문(size, mtime_ns) + 해당 파일의 청크 ID 목록
+    chunks : 청크 ID → source_file, section_index, content_hash
+    embedding : 콜렉션을 채운 임베딩 모델/차원 (바뀌면 전체 재색인)
+    chunking  : 청크 분할 설정 (바뀌면 모든 파일을 다시 파싱, ID가 같은 청크는 그대로 유지)
+    청크 ID는 (파일, 파일 내 위치, 내용 해시)로 결정되므로 내용이 바뀌면 ID도 바뀐다.
+    """
+
+    VERSION = 1
+    CONTENT_HASH_VERSION = 2  # 내용 해시 규칙이 바뀌면 올려서(청크 분할 설정에 포함) 모든 파일을 다시 파싱
+    # 문서 위치나 본문에서 파생되는 값이라 내용 해시에서 제외 (DOCUMENTS_PATH를 옮겨도 청크 ID 유지)
+    HASH_EXCLUDED_METADATA = ("file_path", "token_count", "chunk_id")
+
+    def __init__(self, path: Path, collection_name: str):
+        self.path = Path(path)
+        self.collection_name = collection_name
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.chunks: Dict[str, Dict[str, Any]] = {}
+        self.embedding: Optional[str] = None
+        self.chunking: Optional[str] = None
+
+    # -------------------------
+    # Load / Save
+    # -------------------------
+    @classmethod
+    def load(cls, path: Path, collection_name: str) -> "IndexManifest":
+        manifest = cls(path, collection_name)
+        if not manifest.path.exists():
+            return manifest
+        try:
+            data = json.loads(manifest.path.read_text(encoding="utf-8"))
+            if data.get("version") != cls.VERSION or data.get("collection") != collection_name:
+                logger.warning(f"매니페스트 버전/콜렉션 불일치, 새로 작성합니다: {manifest.path}")
+                return manifest
+            manifest.files = data.get("files", {})
+            manifest.chunks = data.get("chunks", {})
+            manifest.embedding = data.get("embedding")
+            manifest.chunking = data.get("chunking")
+        except Exception as e:
+            logger.warning(f"매니페스트 로드 실패, 새로 작성합니다 ({manifest.path}): {e}")
+        return manifest
+
+    def save(self):
+        """임시 파일에 쓴 뒤 교체 (원자적 저장)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": self.VERSION,
+            "collection": self.collection_name,
+            "content_digest": self.content_digest(),
+            "embedding": self.embedding,
+            "chunking": self.chunking,
+            "files": self.files,
+            "chunks": self.chunks,
+        }
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.files = {}
+        self.chunks = {}
+        self.embedding = None
+        self.chunking = None
+
+    # -------------------------
+    # Chunk ID / Hash
+    # -------------------------
+    @classmethod
+    def content_hash(cls, content: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """본문 + 메타데이터 해시 (절대 경로/토큰 수 제외, 파일 위치는 청크 ID의 상대 경로 source_file로 구분)"""
+        hashed = {k: v for k, v in (metadata or {}).items() if k not in cls.HASH_EXCLUDED_METADATA}
+        payload = content + "\x00" + json.dumps(hashed, sort_keys=True, ensure_ascii=False)
+        return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+    def make_chunk_id(self, source_file: str, section_index: str, content_hash: str) -> str:
+        raw = f"{self.collection_name}|{source_file}|{section_index}|{content_hash}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def content_digest(self) -> str:
+        """콜렉션 전체 내용을 대표하는 해시 (청크 ID 집합 기준)"""
+        digest = hashlib.sha1()
+        for chunk_id in sorted(self.chunks):
+            digest.update(chunk_id.encode("ascii"))
+        return digest.hexdigest()
+
+    # -------------------------
+    # Files
+    # -------------------------
+    @staticmethod
+    def file_fingerprint(file_path: Path) -> Dict[str, int]:
+        stat = file_path.stat()
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def is_file_unchanged(self, source_file: str, fingerprint: Dict[str, int]) -> bool:
+        entry = self.files.get(source_file)
+        return bool(entry) and entry.get("fingerprint") == fingerprint
+
+    def invalidate_fingerprints(self):
+        """모든 파일 지문을 비워 다음 동기화 때 다시 파싱하게 함 (청크 목록은 유지해 바뀐 청크만 반영)"""
+        for entry in self.files.values():
+            entry["fingerprint"] = None
+
+    def file_chunk_ids(self, source_file: str) -> List[str]:
+        return list(self.files.get(source_file, {}).get("chunk_ids", []))
+
+    def file_records(self, source_file: str) -> List[Dict[str, Any]]:
+        """파일의 현재 청크 기록 (set_file에 그대로 다시 넣을 수 있는 형태)"""
+        return [
+            {"chunk_id": chunk_id, **self.chunks[chunk_id]}
+            for chunk_id in self.file_chunk_ids(source_file) if chunk_id in self.chunks
+        ]
+
+    def set_file(self, source_file: str, fingerprint: Optional[Dict[str, int]], chunk_records: Iterable[Dict[str, Any]]):
+        """
+        파일의 청크 목록을 교체
+        fingerprint가 None이면 일부 청크 반영에 실패한 것이므로 다음 동기화 때 다시 처리한다.
+        """
+        for chunk_id in self.file_chunk_ids(source_file):
+            self.chunks.pop(chunk_id, None)
+
+        chunk_ids = []
+        for record in chunk_records:
+            chunk_id = record["chunk_id"]
+            chunk_ids.append(chunk_id)
+            self.chunks[chunk_id] = {
+                "source_file": source_file,
+                "section_index": record["section_index"],
+                "content_hash": record["content_hash"],
+            }
+        self.files[source_file] = {"fingerprint": fingerprint, "chunk_ids": chunk_ids}
+
+    def remove_file(self, source_file: str) -> List[str]:
+        removed = self.file_chunk_ids(source_file)
+        for chunk_id in removed:
+            self.chunks.pop(chunk_id, None)
+        self.files.pop(source_file, None)
+        return removed
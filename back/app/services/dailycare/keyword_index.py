@@ -0,0 +1,361 @@
+import os
+import math
+import mmap
+import heapq
+import struct
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.dailycare.text_tokenizer import KeywordTokenizer, get_keyword_tokenizer
+
+
+logger = logging.getLogger(__name__)
+
+
+class KeywordIndexSnapshot:
+    """
+    BM25 역색인의 읽기 전용 디스크 세그먼트 (mmap으로 열어 복사 없이 사용)
+
+    파일 구성 (8바이트 정렬된 섹션)
+    - 헤더: magic, version, 문서/용어/포스팅 수, 전체 길이, 콘텐츠 digest, 토크나이저 이름, 섹션 오프셋
+    - doc_lengths(uint32[n_docs]), doc_id_offsets(uint32[n_docs+1]) + doc_id_blob(utf-8)
+    - term_offsets(uint32[n_terms+1]) + term_blob(utf-8, 바이트 순 정렬 → 이진 탐색)
+    - posting_offsets(uint32[n_terms+1]), posting_docs(uint32[n_postings]), posting_tfs(uint32[n_postings])
+    """
+
+    MAGIC = b"KWIDX001"
+    VERSION = 1
+    HEADER = struct.Struct("<8sIIIQQ40s32s8Q")
+    SECTIONS = ("doc_lengths", "doc_id_offsets", "doc_id_blob", "term_offsets", "term_blob",
+                "posting_offsets", "posting_docs", "posting_tfs")
+
+    def __init__(self, path: Path, mapped: mmap.mmap):
+        self.path = Path(path)
+        self._mm = mapped
+        (magic, version, self.n_docs, self.n_terms, self.n_postings, self.total_length,
+         digest, tokenizer_name, *offsets) = self.HEADER.unpack_from(mapped, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"키워드 색인 스냅샷 형식이 다릅니다: {path}")
+        self.content_digest = digest.rstrip(b"\x00").decode("ascii")
+        self.tokenizer_name = tokenizer_name.rstrip(b"\x00").decode("utf-8")
+        self._offsets = dict(zip(self.SECTIONS, offsets))
+
+        self.doc_lengths = self._array("doc_lengths", self.n_docs)
+        self._doc_id_offsets = self._array("doc_id_offsets", self.n_docs + 1)
+        self._term_offsets = self._array("term_offsets", self.n_terms + 1)
+        self._posting_offsets = self._array("posting_offsets", self.n_terms + 1)
+        self._posting_docs = self._array("posting_docs", self.n_postings)
+        self._posting_tfs = self._array("posting_tfs", self.n_postings)
+
+    def _array(self, section: str, count: int) -> np.ndarray:
+        return np.frombuffer(self._mm, dtype=np.uint32, count=count, offset=self._offsets[section])
+
+    # -------------------------
+    # Read
+    # -------------------------
+    @classmethod
+    def open(cls, path: Path) -> "KeywordIndexSnapshot":
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(path, mapped)
+
+    def read_doc_ids(self) -> List[str]:
+        base = self._offsets["doc_id_blob"]
+        offsets = self._doc_id_offsets.tolist()
+        blob = self._mm[base:base + offsets[-1]] if offsets else b""
+        return [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(self.n_docs)]
+
+    def _term_at(self, i: int) -> bytes:
+        base = self._offsets["term_blob"]
+        return self._mm[base + int(self._term_offsets[i]):base + int(self._term_offsets[i + 1])]
+
+    def _find_term(self, term: str) -> int:
+        """정렬된 용어 사전에서 이진 탐색 (없으면 -1)"""
+        key = term.encode("utf-8")
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.n_terms and self._term_at(lo) == key else -1
+
+    def _postings_at(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = int(self._posting_offsets[i]), int(self._posting_offsets[i + 1])
+        return self._posting_docs[start:end], self._posting_tfs[start:end]
+
+    def postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """용어의 (문서 번호 배열, tf 배열)"""
+        i = self._find_term(term)
+        return self._postings_at(i) if i >= 0 else None
+
+    def iter_postings(self) -> Iterator[Tuple[str, np.ndarray, np.ndarray]]:
+        for i in range(self.n_terms):
+            docs, tfs = self._postings_at(i)
+            yield self._term_at(i).decode("utf-8"), docs, tfs
+
+    # -------------------------
+    # Write
+    # -------------------------
+    @classmethod
+    def write(cls, path: Path, content_digest: str, tokenizer_name: str, doc_ids: List[str],
+              doc_lengths: List[int], postings: Dict[str, Tuple[np.ndarray, np.ndarray]]):
+        """postings: 용어 → (문서 번호 배열, tf 배열), 문서 번호는 doc_ids의 위치"""
+        doc_id_bytes = [doc_id.encode("utf-8") for doc_id in doc_ids]
+        terms = sorted((term.encode("utf-8"), term) for term in postings)
+        posting_lists = [postings[term] for _, term in terms]
+
+        sections = [
+            np.asarray(doc_lengths, dtype=np.uint32).tobytes(),
+            cls._offset_array(len(b) for b in doc_id_bytes).tobytes(),
+            b"".join(doc_id_bytes),
+            cls._offset_array(len(term_bytes) for term_bytes, _ in terms).tobytes(),
+            b"".join(term_bytes for term_bytes, _ in terms),
+            cls._offset_array(len(docs) for docs, _ in posting_lists).tobytes(),
+            cls._concat(docs for docs, _ in posting_lists),
+            cls._concat(tfs for _, tfs in posting_lists),
+        ]
+        n_postings = sum(len(docs) for docs, _ in posting_lists)
+
+        offsets, position = [], cls._align(cls.HEADER.size)
+        for section in sections:
+            offsets.append(position)
+            position = cls._align(position + len(section))
+
+        header = cls.HEADER.pack(
+            cls.MAGIC, cls.VERSION, len(doc_ids), len(terms), n_postings, int(sum(doc_lengths)),
+            content_digest.encode("ascii"), tokenizer_name.encode("utf-8")[:32], *offsets,
+        )
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            for offset, section in zip(offsets, sections):
+                f.write(b"\x00" * (offset - f.tell()))
+                f.write(section)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _align(position: int) -> int:
+        return (position + 7) & ~7
+
+    @staticmethod
+    def _offset_array(lengths: Iterable[int]) -> np.ndarray:
+        lengths = np.fromiter(lengths, dtype=np.uint64)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.uint64)
+        np.cumsum(lengths, out=offsets[1:])
+        return offsets.astype(np.uint32)
+
+    @staticmethod
+    def _concat(arrays: Iterable[np.ndarray]) -> bytes:
+        arrays = list(arrays)
+        if not arrays:
+            return b""
+        return np.concatenate(arrays).astype(np.uint32).tobytes()
+
+
+class BM25Index:
+    """
+    BM25 역색인 (term → {문서 번호: tf}, 문서 길이)
+    청크 ID 단위로 추가/삭제할 수 있어 콜렉션 변경 시 증분 갱신이 가능하다.
+
+    디스크 스냅샷(KeywordIndexSnapshot)에서 열면 스냅샷은 읽기 전용 기본 세그먼트가 되고,
+    이후 추가된 청크는 메모리 postings에, 삭제된 기본 세그먼트 청크는 tombstone으로 관리한다.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, tokenizer: Optional[KeywordTokenizer] = None,
+                 base: Optional[KeywordIndexSnapshot] = None):
+        self.k1 = k1
+        self.b = b
+        self.tokenizer = tokenizer or get_keyword_tokenizer()
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_ids: List[Optional[str]] = []       # 문서 번호 → 청크 ID (삭제되면 None)
+        self.doc_numbers: Dict[str, int] = {}        # 청크 ID → 문서 번호
+        self.doc_lengths: List[int] = []
+        self.doc_terms: List[Tuple[str, ...]] = []   # 삭제 시 postings 정리용
+        self.total_length = 0
+        self._lock = threading.RLock()
+
+        # 디스크 스냅샷 세그먼트 (문서 번호 0..base_count-1)
+        self.base = base
+        self.base_count = 0
+        self._base_live: Optional[np.ndarray] = None  # tombstone이 생기면 생성
+        if base is not None:
+            self.base_count = base.n_docs
+            self.doc_ids = base.read_doc_ids()
+            self.doc_numbers = {chunk_id: doc_no for doc_no, chunk_id in enumerate(self.doc_ids)}
+            self.doc_lengths = base.doc_lengths.tolist()
+            self.doc_terms = [()] * base.n_docs
+            self.total_length = base.total_length
+
+    def __len__(self) -> int:
+        return len(self.doc_numbers)
+
+    @property
+    def term_count(self) -> int:
+        if self.base is None:
+            return len(self.postings)
+        return self.base.n_terms + sum(1 for term in self.postings if self.base.postings(term) is None)
+
+    # -------------------------
+    # Build / Update
+    # -------------------------
+    def add(self, ids: Iterable[str], texts: Iterable[str]):
+        """청크 추가 (이미 있는 ID는 교체)"""
+        with self._lock:
+            for chunk_id, text in zip(ids, texts):
+                if chunk_id in self.doc_numbers:
+                    self._remove_one(chunk_id)
+                counts = Counter(self.tokenizer(text or ""))
+                doc_no = len(self.doc_ids)
+                self.doc_ids.append(chunk_id)
+                self.doc_numbers[chunk_id] = doc_no
+                length = sum(counts.values())
+                self.doc_lengths.append(length)
+                self.doc_terms.append(tuple(counts))
+                self.total_length += length
+                for term, tf in counts.items():
+                    self.postings.setdefault(term, {})[doc_no] = tf
+
+    def remove(self, ids: Iterable[str]):
+        with self._lock:
+            for chunk_id in ids:
+                if chunk_id in self.doc_numbers:
+                    self._remove_one(chunk_id)
+
+    def _remove_one(self, chunk_id: str):
+        doc_no = self.doc_numbers.pop(chunk_id)
+        if doc_no < self.base_count:
+            # 스냅샷은 읽기 전용이므로 tombstone으로 표시
+            if self._base_live is None:
+                self._base_live = np.ones(self.base_count, dtype=bool)
+            self._base_live[doc_no] = False
+        for term in self.doc_terms[doc_no]:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_no, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_length -= self.doc_lengths[doc_no]
+        self.doc_ids[doc_no] = None
+        self.doc_lengths[doc_no] = 0
+        self.doc_terms[doc_no] = ()
+
+    # -------------------------
+    # Search
+    # -------------------------
+    def search(self, query: str, k: int = 5, accept: Optional[Callable[[str], bool]] = None) -> List[Tuple[str, float]]:
+        """BM25 점수 상위 k개 (청크 ID, 점수), accept가 있으면 통과한 청크만"""
+        terms = self.tokenizer(query)
+        if not terms or k <= 0:
+            return []
+
+        with self._lock:
+            n_docs = len(self.doc_numbers)
+            if n_docs == 0:
+                return []
+            avg_length = self.total_length / n_docs or 1.0
+
+            scores: Dict[int, float] = {}
+            base_scores: Optional[np.ndarray] = None
+            for term, query_tf in Counter(terms).items():
+                base_docs, base_tfs = self._base_postings(term)
+                postings = self.postings.get(term) or {}
+                df = len(base_docs) + len(postings)
+                if not df:
+                    continue
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+                if len(base_docs):
+                    # 스냅샷 세그먼트는 배열 연산으로 한 번에 계산
+                    if base_scores is None:
+                        base_scores = np.zeros(self.base_count)
+                    tf = base_tfs.astype(np.float64)
+                    norm = self.k1 * (1 - self.b + self.b * self.base.doc_lengths[base_docs] / avg_length)
+                    base_scores[base_docs] += query_tf * idf * tf * (self.k1 + 1) / (tf + norm)
+
+                for doc_no, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_no] / avg_length)
+                    scores[doc_no] = scores.get(doc_no, 0.0) + query_tf * idf * tf * (self.k1 + 1) / (tf + norm)
+
+            candidates = list(scores.items())
+            if base_scores is not None:
+                hit = np.flatnonzero(base_scores)
+                if len(hit) > k and accept is None:
+                    hit = hit[np.argpartition(-base_scores[hit], k - 1)[:k]]
+                candidates.extend((int(doc_no), float(base_scores[doc_no])) for doc_no in hit)
+            if accept is not None:
+                candidates = [(doc_no, score) for doc_no, score in candidates if accept(self.doc_ids[doc_no])]
+
+            top = heapq.nlargest(k, candidates, key=lambda item: item[1])
+            return [(self.doc_ids[doc_no], score) for doc_no, score in top]
+
+    def _base_postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        found = self.base.postings(term) if self.base is not None else None
+        if found is None:
+            return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.uint32)
+        docs, tfs = found
+        if self._base_live is not None:
+            live = self._base_live[docs]
+            docs, tfs = docs[live], tfs[live]
+        return docs, tfs
+
+    # -------------------------
+    # Snapshot
+    # -------------------------
+    def save(self, path: Path, content_digest: str):
+        """살아있는 문서만 모아 번호를 다시 매긴 스냅샷으로 저장 (tombstone 정리)"""
+        with self._lock:
+            live = [doc_no for doc_no, chunk_id in enumerate(self.doc_ids) if chunk_id is not None]
+            remap = np.full(len(self.doc_ids), -1, dtype=np.int64)
+            remap[live] = np.arange(len(live))
+
+            merged: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+            if self.base is not None:
+                for term, docs, tfs in self.base.iter_postings():
+                    if self._base_live is not None:
+                        mask = self._base_live[docs]
+                        docs, tfs = docs[mask], tfs[mask]
+                    if len(docs):
+                        merged[term] = (remap[docs], tfs)
+            for term, postings in self.postings.items():
+                docs = remap[np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))]
+                tfs = np.fromiter(postings.values(), dtype=np.uint32, count=len(postings))
+                if term in merged:
+                    docs = np.concatenate([merged[term][0], docs])
+                    tfs = np.concatenate([merged[term][1], tfs])
+                merged[term] = (docs, tfs)
+
+            KeywordIndexSnapshot.write(
+                path, content_digest, self.tokenizer.name,
+                [self.doc_ids[doc_no] for doc_no in live],
+                [self.doc_lengths[doc_no] for doc_no in live],
+                merged,
+            )
+
+    @classmethod
+    def load(cls, path: Path, content_digest: str, tokenizer: Optional[KeywordTokenizer] = None) -> Optional["BM25Index"]:
+        """스냅샷이 현재 콘텐츠 digest/토크나이저와 일치할 때만 열기 (아니면 None → 재생성)"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        tokenizer = tokenizer or get_keyword_tokenizer()
+        try:
+            snapshot = KeywordIndexSnapshot.open(path)
+        except Exception as e:
+            logger.warning(f"키워드 색인 스냅샷을 열 수 없습니다 ({path}): {e}")
+            return None
+        if snapshot.content_digest != content_digest or snapshot.tokenizer_name != tokenizer.name:
+            logger.info(f"키워드 색인 스냅샷이 오래되어 다시 생성합니다: {path}")
+            return None
+        return cls(tokenizer=tokenizer, base=snapshot)
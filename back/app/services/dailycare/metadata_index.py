@@ -0,0 +1,248 @@
+import os
+import re
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# 청크 본문/메타데이터에서 속성을 판별하는 패턴
+# '개'는 '개월', '소개' 등과 구분하기 위해 앞뒤가 한글이 아닌 경우(조사 허용)만 인정
+DOG_PATTERN = re.compile(
+    r"강아지|반려견|애견|견종|퍼피|\bdogs?\b|\bpupp(?:y|ies)\b|(?<![가-힣])개(?:가|는|의|를|에게|와|도|용)?(?![가-힣])",
+    re.IGNORECASE,
+)
+CAT_PATTERN = re.compile(r"고양이|반려묘|냥이|묘종|\bcats?\b|\bkittens?\b", re.IGNORECASE)
+VACCINE_PATTERN = re.compile(r"백신|예방접종|접종|vaccin", re.IGNORECASE)
+
+
+def extract_attributes(text: str, metadata: Optional[Dict[str, Any]] = None) -> Set[str]:
+    """
+    청크의 필터용 속성 라벨 추출
+    - species:dog / species:cat : 본문·제목·키워드·카테고리에 언급된 동물 종
+    - data_type:<값>            : data_type (없으면 collection_type)
+    - category:<값>             : categories 목록의 각 항목
+    - topic:vaccine             : 백신/예방접종 관련
+    """
+    metadata = metadata or {}
+    labels: Set[str] = set()
+
+    categories = _parse_list(metadata.get("categories"))
+    chunk_text = " ".join(
+        [text or "", str(metadata.get("title") or ""), str(metadata.get("subtitle") or ""),
+         str(metadata.get("keywords") or "")]
+    )
+    # 종은 문서 단위 카테고리(예: 고양이건강)까지 보고, 주제는 청크 내용으로만 판단
+    species_text = chunk_text + " " + " ".join(categories)
+    if DOG_PATTERN.search(species_text):
+        labels.add("species:dog")
+    if CAT_PATTERN.search(species_text):
+        labels.add("species:cat")
+    if VACCINE_PATTERN.search(chunk_text):
+        labels.add("topic:vaccine")
+
+    data_type = metadata.get("data_type") or metadata.get("collection_type")
+    if data_type:
+        labels.add(f"data_type:{data_type}")
+    for category in categories:
+        labels.add(f"category:{category}")
+    return labels
+
+
+def _parse_list(value: Any) -> List[str]:
+    """JSON 문자열로 저장된 목록 메타데이터 복원"""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    try:
+        parsed = json.loads(value)
+        return [str(v) for v in parsed] if isinstance(parsed, list) else [str(parsed)]
+    except (TypeError, ValueError):
+        return [str(value)]
+
+
+class MetadataBitmapIndex:
+    """
+    청크 속성 비트맵 색인 (라벨 → Python int 비트셋)
+    청크마다 위치 번호를 부여하고, 라벨별로 해당 위치의 비트를 켠다.
+    필터는 비트 연산 몇 번으로 계산되고, 청크 하나의 통과 여부는 비트 확인 한 번이다.
+    """
+
+    VERSION = 1  # 속성 판별 규칙(extract_attributes)이 바뀌면 올려서 스냅샷을 다시 만든다
+
+    def __init__(self):
+        self.ids: List[Optional[str]] = []          # 위치 → 청크 ID (삭제되면 None)
+        self.positions: Dict[str, int] = {}         # 청크 ID → 위치
+        self.bitmaps: Dict[str, int] = {}           # 라벨 → 비트셋
+        self.doc_labels: List[Tuple[str, ...]] = [] # 삭제 시 비트 정리용
+        self.live = 0                               # 살아있는 청크 비트셋
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    # -------------------------
+    # Build / Update
+    # -------------------------
+    def add(self, ids: Iterable[str], texts: Iterable[str], metadatas: Iterable[Dict[str, Any]]):
+        """청크 추가 (이미 있는 ID는 교체)"""
+        with self._lock:
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                self._add_labels(chunk_id, extract_attributes(text, metadata))
+
+    def _add_labels(self, chunk_id: str, labels: Iterable[str]):
+        if chunk_id in self.positions:
+            self._remove_one(chunk_id)
+        position = len(self.ids)
+        bit = 1 << position
+        self.ids.append(chunk_id)
+        self.positions[chunk_id] = position
+        self.doc_labels.append(tuple(labels))
+        self.live |= bit
+        for label in self.doc_labels[position]:
+            self.bitmaps[label] = self.bitmaps.get(label, 0) | bit
+
+    def remove(self, ids: Iterable[str]):
+        with self._lock:
+            for chunk_id in ids:
+                if chunk_id in self.positions:
+                    self._remove_one(chunk_id)
+
+    def _remove_one(self, chunk_id: str):
+        position = self.positions.pop(chunk_id)
+        bit = 1 << position
+        self.live &= ~bit
+        for label in self.doc_labels[position]:
+            self.bitmaps[label] &= ~bit
+        self.ids[position] = None
+        self.doc_labels[position] = ()
+
+    # -------------------------
+    # Query
+    # -------------------------
+    def bitmap(self, label: str) -> int:
+        return self.bitmaps.get(label, 0)
+
+    def count(self, mask: int) -> int:
+        return bin(mask).count("1")
+
+    def ids_in(self, mask: int) -> List[str]:
+        """비트셋에 포함된 청크 ID 목록"""
+        result = []
+        while mask:
+            low = mask & -mask
+            chunk_id = self.ids[low.bit_length() - 1]
+            if chunk_id is not None:
+                result.append(chunk_id)
+            mask ^= low
+        return result
+
+    def accepts(self, mask: int) -> Callable[[str], bool]:
+        """청크 ID가 비트셋에 포함되는지 확인하는 함수 (색인에 없는 청크는 통과)"""
+        positions = self.positions
+
+        def accept(chunk_id: str) -> bool:
+            position = positions.get(chunk_id)
+            return position is None or bool((mask >> position) & 1)
+
+        return accept
+
+    # -------------------------
+    # Snapshot
+    # -------------------------
+    def save(self, path: Path, content_digest: str):
+        """살아있는 청크만 위치를 다시 매겨 JSON으로 저장 (비트셋은 16진수 문자열)"""
+        with self._lock:
+            live_ids = [chunk_id for chunk_id in self.ids if chunk_id is not None]
+            compact = MetadataBitmapIndex()
+            for chunk_id in live_ids:
+                compact._add_labels(chunk_id, self.doc_labels[self.positions[chunk_id]])
+            data = {
+                "version": self.VERSION,
+                "content_digest": content_digest,
+                "ids": compact.ids,
+                "bitmaps": {label: format(bits, "x") for label, bits in compact.bitmaps.items() if bits},
+            }
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path, content_digest: str) -> Optional["MetadataBitmapIndex"]:
+        """digest가 일치할 때만 로드 (아니면 None → 재생성)"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"메타데이터 색인 스냅샷을 읽을 수 없습니다 ({path}): {e}")
+            return None
+        if data.get("version") != cls.VERSION or data.get("content_digest") != content_digest:
+            return None
+
+        index = cls()
+        index.ids = data["ids"]
+        index.positions = {chunk_id: position for position, chunk_id in enumerate(index.ids)}
+        index.bitmaps = {label: int(bits, 16) for label, bits in data["bitmaps"].items()}
+        index.live = (1 << len(index.ids)) - 1
+        labels_by_position: List[List[str]] = [[] for _ in index.ids]
+        for label, bits in index.bitmaps.items():
+            for chunk_id in index.ids_in(bits):
+                labels_by_position[index.positions[chunk_id]].append(label)
+        index.doc_labels = [tuple(labels) for labels in labels_by_position]
+        return index
+
+
+class MetadataFilter:
+    """
+    반려동물 정보/질문으로 만든 검색 필터 (MetadataBitmapIndex 비트 연산으로 적용)
+    - species: 'dog' 또는 'cat' → 다른 종만 언급한 청크 제외 (두 종을 함께 다룬 청크는 유지)
+    - vaccine: 백신 관련 질문 → 의약품 중에서는 백신 관련 청크만 유지
+    - data_type: 'medication', 'general_guide' 등 → 해당 data_type(없으면 collection_type) 청크만 유지
+    - category: 문서 categories 값 → 그 카테고리 청크만 유지
+    """
+
+    def __init__(self, species: Optional[str] = None, vaccine: bool = False,
+                 data_type: Optional[str] = None, category: Optional[str] = None):
+        self.species = species
+        self.vaccine = vaccine
+        self.data_type = data_type
+        self.category = category
+
+    def __bool__(self) -> bool:
+        return bool(self.species or self.vaccine or self.data_type or self.category)
+
+    def __repr__(self) -> str:
+        return (
+            f"MetadataFilter(species={self.species!r}, vaccine={self.vaccine}, "
+            f"data_type={self.data_type!r}, category={self.category!r})"
+        )
+
+    @property
+    def cache_key(self) -> Tuple:
+        return self.species, self.vaccine, self.data_type, self.category
+
+    def mask_for(self, index: MetadataBitmapIndex) -> int:
+        mask = index.live
+        if self.species in ("dog", "cat"):
+            other = "cat" if self.species == "dog" else "dog"
+            only_other = index.bitmap(f"species:{other}") & ~index.bitmap(f"species:{self.species}")
+            mask &= ~only_other
+        if self.vaccine:
+            mask &= ~index.bitmap("data_type:medication") | index.bitmap("topic:vaccine")
+        if self.data_type:
+            mask &= index.bitmap(f"data_type:{self.data_type}")
+        if self.category:
+            mask &= index.bitmap(f"category:{self.category}")
+        return mask
@@ -0,0 +1,103 @@
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class MinHasher:
+    """
+    문자 shingle 집합의 MinHash 서명 (numpy 벡터 연산)
+    - shingle: 공백을 정리한 본문의 연속 shingle_size 글자
+    - 해시 함수: 64비트 multiply-shift 계열 (a·x + b) >> 32 를 num_perm 개
+    두 서명의 같은 칸 비율이 두 shingle 집합의 Jaccard 유사도 추정치다.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """shingle별 64비트 해시 (중복 제거)"""
+        normalized = " ".join((text or "").split())
+        codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        count = len(codes) - self.shingle_size + 1
+        if count <= 0:
+            return np.unique(codes)
+        hashes = np.zeros(count, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for offset in range(self.shingle_size):
+                hashes = hashes * np.uint64(1000003) + codes[offset:offset + count]
+        return np.unique(hashes)
+
+    def signature(self, text: str) -> np.ndarray:
+        shingles = self.shingles(text)
+        if len(shingles) == 0:
+            return np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        with np.errstate(over="ignore"):
+            hashed = (self._a[:, None] * shingles[None, :] + self._b[:, None]) >> np.uint64(32)
+        return hashed.min(axis=1).astype(np.uint32)
+
+    @staticmethod
+    def similarity(left: np.ndarray, right: np.ndarray) -> float:
+        return float(np.count_nonzero(left == right)) / len(left)
+
+
+class NearDuplicateClusterer:
+    """
+    MinHash + LSH(밴드 분할)로 거의 같은 본문을 묶는 온라인 클러스터러
+    - 들어온 순서대로 처리하며, 대표 항목과 추정 Jaccard ≥ threshold 이면 그 클러스터에 합류
+    - 아니면 새 대표가 되어 LSH 버킷에 등록 (대표끼리만 비교하므로 연쇄 병합이 없음)
+    같은 입력 순서면 항상 같은 결과가 나온다.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, bands: int = 16, shingle_size: int = 5):
+        if num_perm % bands:
+            raise ValueError(f"num_perm({num_perm})은 bands({bands})로 나누어떨어져야 합니다.")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._signatures: List[np.ndarray] = []   # 대표 번호 → 서명
+
+    def add(self, text: str) -> Optional[int]:
+        """본문 추가 → 합류한 대표 번호 (새 대표가 되면 None)"""
+        signature = self.hasher.signature(text)
+        keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+        candidates = set()
+        for band, key in enumerate(keys):
+            candidates.update(self._buckets[band].get(key, ()))
+        best, best_score = None, -1.0
+        for candidate in sorted(candidates):
+            score = MinHasher.similarity(signature, self._signatures[candidate])
+            if score > best_score:
+                best, best_score = candidate, score
+        if best is not None and best_score >= self.threshold:
+            return best
+
+        representative = len(self._signatures)
+        self._signatures.append(signature)
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(representative)
+        return None
+
+
+def cluster_near_duplicates(texts: List[str], threshold: float = 0.9, num_perm: int = 128,
+                            bands: int = 16) -> List[List[int]]:
+    """본문 목록을 클러스터로 묶음 → [대표 위치, 구성원 위치...] 목록 (대표가 항상 첫 번째, 입력 순서 유지)"""
+    clusterer = NearDuplicateClusterer(threshold=threshold, num_perm=num_perm, bands=bands)
+    clusters: List[List[int]] = []
+    for position, text in enumerate(texts):
+        representative = clusterer.add(text)
+        if representative is None:
+            clusters.append([position])
+        else:
+            clusters[representative].append(position)
+    return clusters
@@ -0,0 +1,320 @@
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+
+logger = logging.getLogger(__name__)
+
+
+class NumpyVectorStore:
+    """
+    정규화된 float32 행렬 하나로 정확한(exact) 최근접 검색을 하는 벡터 스토어
+    - 질의는 행렬곱 한 번 + argpartition으로 top-k (여러 질의는 한 번의 행렬곱으로 배치 처리)
+    - 점수는 Chroma 기본(l2)과 같은 의미의 거리(2 - 2·cos, 작을수록 유사)로 반환
+    - 스냅샷(.npy + .json)은 np.load(mmap_mode='r')로 열 수 있음
+    - quantization="int8": 행마다 scale을 둔 int8 사본으로 후보를 훑고,
+      상위 k × rescore_factor 후보만 float32 행렬(mmap)로 다시 채점 → 상주 메모리 약 1/4
+    Chroma 콜렉션이 원본 저장소이고, 이 스토어는 검색 전용 사본이다.
+    """
+
+    VERSION = 1
+    QUANTIZATIONS = ("none", "int8")
+    SCAN_BLOCK_ROWS = 4096  # int8 → float32 변환을 블록 단위로 해서 임시 메모리를 제한
+
+    def __init__(self, embedding_function: Optional[Embeddings] = None, dim: int = 0,
+                 quantization: str = "none", rescore_factor: int = 4):
+        if quantization not in self.QUANTIZATIONS:
+            raise ValueError(f"지원하지 않는 벡터 양자화 방식: {quantization}")
+        self.embedding_function = embedding_function
+        self.quantization = quantization
+        self.rescore_factor = max(1, rescore_factor)
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.codes = np.zeros((0, dim), dtype=np.int8)      # int8 모드에서만 사용
+        self.scales = np.zeros(0, dtype=np.float32)
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.rows: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def quantized(self) -> bool:
+        return self.quantization == "int8"
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # -------------------------
+    # Update
+    # -------------------------
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    @staticmethod
+    def quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """행마다 최대 절댓값을 127로 맞춘 int8 코드와 scale (벡터 ≈ 코드 × scale)"""
+        scales = np.abs(vectors).max(axis=1) / 127.0 if vectors.shape[1] else np.zeros(len(vectors))
+        scales[scales == 0] = 1.0
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    @staticmethod
+    def _write_rows(array: np.ndarray, total: int, rows: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """기존 배열을 total 행으로 늘린 새 배열에 rows 위치를 values로 채움 (mmap 배열은 건드리지 않음)"""
+        if array.shape[0] == 0:
+            array = np.zeros((0,) + values.shape[1:], dtype=values.dtype)
+        result = np.empty((total,) + array.shape[1:], dtype=array.dtype)
+        result[:array.shape[0]] = array
+        result[rows] = values
+        return result
+
+    def upsert(self, ids: List[str], embeddings, texts: List[str], metadatas: List[Dict[str, Any]]):
+        """청크 추가/교체 (행렬은 새 배열로 교체하므로 검색 중인 스레드에 영향 없음)"""
+        if not ids:
+            return
+        vectors = self._normalize(embeddings)
+        with self._lock:
+            sources: Dict[int, int] = {}  # 행 → 배치 내 위치 (같은 ID가 두 번 오면 뒤의 것)
+            for position, (chunk_id, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+                row = self.rows.get(chunk_id)
+                if row is None:
+                    # 새 청크는 기존 행 뒤에 순서대로 붙음
+                    row = self.rows[chunk_id] = len(self.ids)
+                    self.ids.append(chunk_id)
+                    self.texts.append(text)
+                    self.metadatas.append(metadata)
+                else:
+                    self.texts[row] = text
+                    self.metadatas[row] = metadata
+                sources[row] = position
+
+            rows = np.fromiter(sources.keys(), dtype=np.int64, count=len(sources))
+            values = vectors[np.fromiter(sources.values(), dtype=np.int64, count=len(sources))]
+            total = len(self.ids)
+            self.matrix = self._write_rows(self.matrix, total, rows, values)
+            if self.quantized:
+                codes, scales = self.quantize(values)
+                self.codes = self._write_rows(self.codes, total, rows, codes)
+                self.scales = self._write_rows(self.scales, total, rows, scales)
+
+    def delete(self, ids: Iterable[str]):
+        with self._lock:
+            remove = sorted({self.rows[chunk_id] for chunk_id in ids if chunk_id in self.rows})
+            if not remove:
+                return
+            keep = np.ones(len(self.ids), dtype=bool)
+            keep[remove] = False
+            self.matrix = self.matrix[keep]
+            if self.quantized:
+                self.codes = self.codes[keep]
+                self.scales = self.scales[keep]
+            self.ids = [chunk_id for chunk_id, kept in zip(self.ids, keep) if kept]
+            self.texts = [text for text, kept in zip(self.texts, keep) if kept]
+            self.metadatas = [metadata for metadata, kept in zip(self.metadatas, keep) if kept]
+            self.rows = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+
+    def memory_usage(self) -> Dict[str, int]:
+        """검색용 배열 크기 (바이트, mmap 행렬은 디스크에 있으므로 따로 표시)"""
+        with self._lock:
+            matrix_bytes = int(self.matrix.nbytes)
+            return {
+                "matrix_bytes": 0 if isinstance(self.matrix, np.memmap) else matrix_bytes,
+                "mmap_matrix_bytes": matrix_bytes if isinstance(self.matrix, np.memmap) else 0,
+                "int8_bytes": int(self.codes.nbytes + self.scales.nbytes) if self.quantized else 0,
+            }
+
+    # -------------------------
+    # Search
+    # -------------------------
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_relevance_scores(self.embedding_function.embed_query(query), k, filter=filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter=filter)]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_relevance_scores(embedding, k, filter=filter)]
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding: List[float], k: int = 4,
+                                                          filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vectors([embedding], k, filter=filter)[0]
+
+    def similarity_search_by_vectors(self, embeddings, k: int = 4,
+                                     filter: Optional[Dict[str, Any]] = None) -> List[List[Tuple[Document, float]]]:
+        """여러 질의 벡터를 한 번의 행렬곱으로 검색 (질의마다 (문서, 거리) 상위 k개)"""
+        queries = self._normalize(embeddings)
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+        with self._lock:
+            # 행렬과 같은 시점의 목록을 잡아 두면 검색 중 갱신이 일어나도 행 번호가 어긋나지 않음
+            matrix, codes, scales = self.matrix, self.codes, self.scales
+            ids, texts, metadatas = self.ids[:], self.texts[:], self.metadatas[:]
+            rows = self._filter_rows(filter)
+        total = len(ids) if rows is None else len(rows)
+        if total == 0:
+            return [[] for _ in range(len(queries))]
+
+        top_k = min(k, total)
+        if self.quantized:
+            top, similarities = self._quantized_top_k(queries, matrix, codes, scales, rows, top_k)
+        else:
+            candidates = matrix if rows is None else matrix[rows]
+            similarities = queries @ candidates.T
+            top = self._top_columns(similarities, top_k)
+            similarities = np.take_along_axis(similarities, top, axis=1)
+
+        results = []
+        for query_no, columns in enumerate(top):
+            scores = similarities[query_no]
+            order = np.argsort(-scores)
+            hits = []
+            for column, similarity in zip(columns[order], scores[order]):
+                row = int(column) if rows is None else int(rows[column])
+                hits.append((
+                    Document(id=ids[row], page_content=texts[row], metadata=dict(metadatas[row])),
+                    float(max(0.0, 2.0 - 2.0 * similarity)),
+                ))
+            results.append(hits)
+        return results
+
+    @staticmethod
+    def _top_columns(similarities: np.ndarray, top_k: int) -> np.ndarray:
+        """질의별 유사도 상위 top_k 열 번호 (정렬 전)"""
+        columns = similarities.shape[1]
+        if top_k < columns:
+            return np.argpartition(-similarities, top_k - 1, axis=1)[:, :top_k]
+        return np.tile(np.arange(columns), (similarities.shape[0], 1))
+
+    def _quantized_top_k(self, queries: np.ndarray, matrix: np.ndarray, codes: np.ndarray, scales: np.ndarray,
+                         rows: Optional[np.ndarray], top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        int8 사본으로 근사 유사도를 구해 후보 top_k × rescore_factor 개를 고르고,
+        후보 행만 float32 행렬에서 읽어 정확한 유사도로 다시 골라냄
+        """
+        if rows is not None:
+            codes, scales = codes[rows], scales[rows]
+        approx = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), self.SCAN_BLOCK_ROWS):
+            block = slice(start, start + self.SCAN_BLOCK_ROWS)
+            approx[:, block] = (queries @ codes[block].T.astype(np.float32)) * scales[block]
+        candidates = self._top_columns(approx, min(len(codes), top_k * self.rescore_factor))
+
+        matrix_rows = candidates if rows is None else rows[candidates]
+        exact = np.einsum("qd,qcd->qc", queries, matrix[matrix_rows])
+        best = self._top_columns(exact, top_k)
+        return np.take_along_axis(candidates, best, axis=1), np.take_along_axis(exact, best, axis=1)
+
+    def get_by_ids(self, ids: List[str]) -> List[Document]:
+        """청크 ID 목록으로 문서 조회 (요청한 순서 유지)"""
+        with self._lock:
+            return [
+                Document(id=chunk_id, page_content=self.texts[row], metadata=dict(self.metadatas[row]))
+                for chunk_id in ids
+                for row in [self.rows.get(chunk_id)] if row is not None
+            ]
+
+    def _filter_rows(self, filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Chroma where 조건 중 {키: 값}, {키: {"$eq"/"$in": ...}} 만 지원
+        chunk_id $in 조건은 행 번호로 바로 변환
+        """
+        if not filter:
+            return None
+        selected = None
+        for key, condition in filter.items():
+            if isinstance(condition, dict):
+                if set(condition) - {"$eq", "$in"}:
+                    raise ValueError(f"NumpyVectorStore에서 지원하지 않는 필터 연산자: {condition}")
+                allowed = set(condition.get("$in", [])) | ({condition["$eq"]} if "$eq" in condition else set())
+            else:
+                allowed = {condition}
+
+            if key == "chunk_id":
+                rows = {self.rows[chunk_id] for chunk_id in allowed if chunk_id in self.rows}
+            else:
+                rows = {row for row, metadata in enumerate(self.metadatas) if metadata.get(key) in allowed}
+            selected = rows if selected is None else selected & rows
+        return np.array(sorted(selected), dtype=np.int64)
+
+    # -------------------------
+    # Snapshot
+    # -------------------------
+    def save(self, path: Path, content_digest: str):
+        """행렬은 .npy, 청크 ID/본문/메타데이터는 .json (둘 다 임시 파일 후 교체)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            matrix, ids, texts, metadatas = self.matrix, list(self.ids), list(self.texts), list(self.metadatas)
+
+        tmp_matrix = path.with_name(path.name + ".npy.tmp")
+        with open(tmp_matrix, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_meta = path.with_name(path.name + ".json.tmp")
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "content_digest": content_digest,
+                       "ids": ids, "texts": texts, "metadatas": metadatas}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_matrix, path.with_name(path.name + ".npy"))
+        os.replace(tmp_meta, path.with_name(path.name + ".json"))
+
+        if self.quantized and not isinstance(matrix, np.memmap):
+            # int8 모드에서는 float32 행렬을 재채점 때만 읽으므로 방금 쓴 파일을 mmap으로 다시 연다
+            mapped = np.load(path.with_name(path.name + ".npy"), mmap_mode="r")
+            with self._lock:
+                if self.matrix is matrix:
+                    self.matrix = mapped
+
+    @classmethod
+    def _quantize_blocks(cls, matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """mmap 행렬 전체를 한 번에 올리지 않도록 블록 단위로 int8 변환"""
+        codes = np.empty(matrix.shape, dtype=np.int8)
+        scales = np.empty(matrix.shape[0], dtype=np.float32)
+        for start in range(0, matrix.shape[0], cls.SCAN_BLOCK_ROWS):
+            block = slice(start, start + cls.SCAN_BLOCK_ROWS)
+            codes[block], scales[block] = cls.quantize(np.asarray(matrix[block], dtype=np.float32))
+        return codes, scales
+
+    @classmethod
+    def load(cls, path: Path, content_digest: str, embedding_function: Optional[Embeddings] = None,
+             mmap: bool = True, quantization: str = "none", rescore_factor: int = 4) -> Optional["NumpyVectorStore"]:
+        """digest가 일치할 때만 로드 (행렬은 mmap 가능, int8 사본은 로드할 때 만듦), 아니면 None → 재생성"""
+        path = Path(path)
+        matrix_path, meta_path = path.with_name(path.name + ".npy"), path.with_name(path.name + ".json")
+        if not matrix_path.exists() or not meta_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta.get("version") != cls.VERSION or meta.get("content_digest") != content_digest:
+                return None
+            matrix = np.load(matrix_path, mmap_mode="r" if mmap else None)
+            if matrix.shape[0] != len(meta["ids"]):
+                return None
+        except Exception as e:
+            logger.warning(f"벡터 행렬 스냅샷을 읽을 수 없습니다 ({path}): {e}")
+            return None
+
+        store = cls(embedding_function, quantization=quantization, rescore_factor=rescore_factor)
+        store.matrix = matrix
+        if store.quantized:
+            store.codes, store.scales = store._quantize_blocks(matrix)
+        store.ids = meta["ids"]
+        store.texts = meta["texts"]
+        store.metadatas = meta["metadatas"]
+        store.rows = {chunk_id: row for row, chunk_id in enumerate(store.ids)}
+        return store
@@ -0,0 +1,116 @@
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from back.config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalCache:
+    """
+    지식 베이스 검색 결과(포맷된 참고자료 문자열) 캐시
+    - 키: (정규화한 향상된 쿼리, 검색 콜렉션 순서, k, search_type, 메타데이터 필터)
+    - 항목 수 기준 LRU 제거 + TTL 만료
+    - 콜렉션 내용이 바뀌면 해당 콜렉션을 포함한 항목만 무효화
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Tuple, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """대소문자/공백/문장부호 차이는 같은 질문으로 취급"""
+        query = re.sub(r"[^\w\s가-힣]", " ", (query or "").lower())
+        return " ".join(query.split())
+
+    @classmethod
+    def make_key(cls, query: str, collection_types: Iterable[str], k: int, search_type: str, metadata_filter=None) -> Tuple:
+        filter_key = metadata_filter.cache_key if metadata_filter else None
+        return cls.normalize_query(query), tuple(collection_types), k, search_type, filter_key
+
+    def get(self, key: Tuple) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple, value: str) -> None:
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, collection_types: Optional[Iterable[str]] = None) -> int:
+        """collection_types를 검색한 항목 제거 (None이면 전체)"""
+        with self._lock:
+            if collection_types is None:
+                removed = len(self._data)
+                self._data.clear()
+            else:
+                targets = set(collection_types)
+                stale = [key for key in self._data if targets.intersection(key[1])]
+                for key in stale:
+                    del self._data[key]
+                removed = len(stale)
+            self.invalidations += removed
+        if removed:
+            logger.info(f"검색 결과 캐시 {removed}개 무효화 (콜렉션: {collection_types or '전체'})")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+# 전역 인스턴스 (챗봇 검색과 벡터 스토어 재색인이 공유)
+_retrieval_cache = None
+_retrieval_cache_lock = threading.Lock()
+
+def get_retrieval_cache() -> RetrievalCache:
+    global _retrieval_cache
+    if _retrieval_cache is None:
+        with _retrieval_cache_lock:
+            if _retrieval_cache is None:
+                _retrieval_cache = RetrievalCache(
+                    max_entries=Config.RETRIEVAL_CACHE_MAX_ENTRIES,
+                    ttl_seconds=Config.RETRIEVAL_CACHE_TTL,
+                )
+    return _retrieval_cache
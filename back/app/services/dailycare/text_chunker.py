@@ -0,0 +1,102 @@
+import re
+import logging
+from typing import List, Optional, Tuple
+
+from back.config import Config
+from app.services.dailycare.embedding_pipeline import get_token_encoder
+from app.services.dailycare.index_manifest import IndexManifest
+
+
+logger = logging.getLogger(__name__)
+
+# 문장 경계 (마침표/물음표/느낌표/줄바꿈 뒤 공백)
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[\.\?\!\n])\s+')
+
+
+def count_text_tokens(text: str) -> int:
+    """캐시된 tiktoken 인코더로 토큰 수 계산 (인코더를 못 쓰면 UTF-8 바이트 수로 추정)"""
+    encoder = get_token_encoder()
+    if encoder is None:
+        # 한글 한 글자(3바이트) ≈ 1토큰, 영문은 넉넉하게 3바이트 ≈ 1토큰으로 보수적으로 추정
+        return len(text.encode("utf-8")) // 3 + 1
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def chunking_signature() -> str:
+    """매니페스트에 기록하는 청크 분할 설정 (토큰 예산/overlap/의약품 중복 병합 기준, 청크 내용 해시 규칙)"""
+    return (
+        f"tokens:{Config.CHUNK_MAX_TOKENS}/{Config.CHUNK_OVERLAP_TOKENS}|dedup:{Config.MEDICATION_DEDUP_THRESHOLD}"
+        f"|hash:{IndexManifest.CONTENT_HASH_VERSION}"
+    )
+
+
+class TokenChunker:
+    """
+    토큰 예산 기준 청크 분할기 (문장 경계 우선, 청크 사이 overlap)
+    - 문장마다 토큰 수를 한 번만 세고, 그 합이 max_tokens를 넘지 않게 문장을 채운다
+    - 다음 청크는 앞 청크 끝 문장들을 overlap_tokens 이내로 다시 포함해 문맥이 끊기지 않게 한다
+    - 한 문장이 예산보다 길면 공백 근처에서 반씩 잘라 예산에 맞춘다
+    청크 본문은 원문을 그대로 잘라낸 구간이라 줄바꿈이 유지된다.
+    반환하는 토큰 수(문장별 합)는 메타데이터 token_count로 저장되어 임베딩 배치/프롬프트 예산 계산에 재사용된다.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None):
+        self.max_tokens = max(1, max_tokens or Config.CHUNK_MAX_TOKENS)
+        overlap_tokens = Config.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        # overlap이 예산의 절반을 넘으면 청크마다 전진하는 양이 너무 적어짐
+        self.overlap_tokens = max(0, min(overlap_tokens, self.max_tokens // 2))
+
+    def split(self, text: str) -> List[Tuple[str, int]]:
+        """본문 → [(청크 본문, 토큰 수)]"""
+        if not text or not text.strip():
+            return []
+
+        units: List[Tuple[int, int, int]] = []   # (시작, 끝, 토큰 수)
+        for start, end in self._sentence_spans(text):
+            units.extend(self._fit_unit(text, start, end, count_text_tokens(text[start:end])))
+
+        chunks: List[Tuple[str, int]] = []
+        first = 0
+        while first < len(units):
+            last, total = first, 0
+            while last < len(units) and (last == first or total + units[last][2] <= self.max_tokens):
+                total += units[last][2]
+                last += 1
+            chunk = text[units[first][0]:units[last - 1][1]].strip()
+            if chunk:
+                chunks.append((chunk, total))
+            if last >= len(units):
+                break
+
+            # 다음 청크는 끝 문장 몇 개를 겹쳐서 시작 (겹친 부분 + 다음 문장이 예산 안에 들어올 때만)
+            next_first, carried = last, 0
+            while next_first - 1 > first:
+                tokens = units[next_first - 1][2]
+                if carried + tokens > self.overlap_tokens or carried + tokens + units[last][2] > self.max_tokens:
+                    break
+                next_first -= 1
+                carried += tokens
+            first = next_first
+        return chunks
+
+    @staticmethod
+    def _sentence_spans(text: str) -> List[Tuple[int, int]]:
+        spans, start = [], 0
+        for match in SENTENCE_BOUNDARY_PATTERN.finditer(text):
+            if match.start() > start:
+                spans.append((start, match.end()))
+            start = match.end()
+        if start < len(text):
+            spans.append((start, len(text)))
+        return spans
+
+    def _fit_unit(self, text: str, start: int, end: int, tokens: int) -> List[Tuple[int, int, int]]:
+        """예산보다 긴 문장은 공백 근처에서 반으로 나누기를 반복"""
+        if tokens <= self.max_tokens or end - start <= 1:
+            return [(start, end, tokens)]
+        middle = (start + end) // 2
+        space = text.rfind(" ", start + 1, middle + 1)
+        if space > start + (middle - start) // 2:
+            middle = space
+        return (self._fit_unit(text, start, middle, count_text_tokens(text[start:middle]))
+                + self._fit_unit(text, middle, end, count_text_tokens(text[middle:end])))
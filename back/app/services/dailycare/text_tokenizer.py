@@ -0,0 +1,102 @@
+import re
+from typing import Dict, List, Type
+
+from back.config import Config
+
+
+STOP_WORDS = {'은', '는', '이', '가', '을', '를', '에', '의', '와', '과', '도', '로', '으로',
+              'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with'}
+
+# 명사 뒤에 붙는 조사 (긴 것부터 매칭)
+PARTICLES = sorted([
+    '으로부터', '에게서는', '에서부터', '로부터', '에게서', '에서는', '에게는', '까지는', '으로는', '이라는',
+    '이라고', '에서도', '에게도', '한테서', '이랑은', '에서', '에게', '까지', '부터', '으로', '처럼', '보다',
+    '이나', '라도', '마다', '조차', '한테', '하고', '이랑', '이며', '이고', '라는', '께서', '에는', '로는',
+    '은', '는', '이', '가', '을', '를', '에', '의', '와', '과', '도', '로', '만', '랑', '나',
+], key=len, reverse=True)
+
+_TOKEN_PATTERN = re.compile(r"[가-힣]+|[a-z0-9]+")
+
+
+class KeywordTokenizer:
+    """키워드 역색인용 토크나이저 기본 클래스 (색인과 질의에 같은 규칙을 적용)"""
+
+    name = "base"
+
+    def __call__(self, text: str) -> List[str]:
+        return self.tokenize(text)
+
+    def tokenize(self, text: str) -> List[str]:
+        raise NotImplementedError
+
+
+class SimpleTokenizer(KeywordTokenizer):
+    """공백 분리 + 불용어 제거 (이전 방식)"""
+
+    name = "simple"
+
+    def tokenize(self, text: str) -> List[str]:
+        text = re.sub(r'[^\w\s가-힣]', ' ', (text or "").lower())
+        return [word for word in text.split() if len(word) > 1 and word not in STOP_WORDS]
+
+
+class KoreanTokenizer(KeywordTokenizer):
+    """
+    한국어 키워드 토크나이저 (외부 형태소 분석기 없이 동작)
+    - 한글 어절은 끝의 조사를 떼어낸 어간을 추가 ("강아지가" → "강아지가", "강아지")
+    - ngram_size > 0 이면 어간의 문자 n-gram도 추가 ("예방접종" ↔ "예방 접종" 매칭)
+    - 영문/숫자는 소문자 단어 단위
+    """
+
+    name = "korean"
+
+    def __init__(self, ngram_size: int = 2):
+        self.ngram_size = ngram_size
+        if ngram_size:
+            self.name = f"korean-{ngram_size}gram"
+
+    def tokenize(self, text: str) -> List[str]:
+        tokens: List[str] = []
+        for word in _TOKEN_PATTERN.findall((text or "").lower()):
+            if word in STOP_WORDS:
+                continue
+            if not ('가' <= word[0] <= '힣'):
+                if len(word) > 1:
+                    tokens.append(word)
+                continue
+
+            # 한 글자 한글 명사(개, 약, 병 등)도 의미가 있으므로 유지
+            tokens.append(word)
+            stem = self.strip_particle(word)
+            if stem != word:
+                tokens.append(stem)
+
+            n = self.ngram_size
+            if n and len(stem) > n:
+                tokens.extend(stem[i:i + n] for i in range(len(stem) - n + 1))
+        return tokens
+
+    @staticmethod
+    def strip_particle(word: str) -> str:
+        """어절 끝 조사 제거 (어간이 두 글자 이상 남을 때만)"""
+        for particle in PARTICLES:
+            if word.endswith(particle) and len(word) - len(particle) >= 2:
+                return word[:-len(particle)]
+        return word
+
+
+TOKENIZERS: Dict[str, Type[KeywordTokenizer]] = {
+    "simple": SimpleTokenizer,
+    "korean": KoreanTokenizer,
+}
+
+
+def get_keyword_tokenizer(name: str = None) -> KeywordTokenizer:
+    """Config.KEYWORD_TOKENIZER 설정에 맞는 토크나이저 생성"""
+    name = (name or Config.KEYWORD_TOKENIZER).lower()
+    if name == "korean":
+        return KoreanTokenizer(ngram_size=Config.KEYWORD_NGRAM_SIZE)
+    tokenizer_cls = TOKENIZERS.get(name)
+    if tokenizer_cls is None:
+        raise ValueError(f"지원하지 않는 키워드 토크나이저: {name}")
+    return tokenizer_cls()
@@ -0,0 +1,278 @@
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from back.config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+def build_vector_store():
+    """
+    기본 초기화 함수: 빌드된 색인 artifact가 설정되어 있으면 열기만 하고,
+    아니면 문서와 동기화해 VectorStoreService 생성 (사용 가능한 콜렉션이 없으면 RuntimeError)
+    """
+    if Config.VECTOR_INDEX_ARTIFACT:
+        from app.services.dailycare.index_artifact import open_index_artifact
+        service = open_index_artifact(Config.VECTOR_INDEX_ARTIFACT)
+    else:
+        from app.services.dailycare.vectorstore_service import VectorStoreService
+        service = VectorStoreService()
+        service.initialize_vector_db()
+    if not any(service.stores.values()):
+        raise RuntimeError("사용 가능한 콜렉션이 없습니다.")
+    return service
+
+
+class VectorStoreRegistry:
+    """
+    프로세스 전체에서 공유하는 VectorStoreService 레지스트리
+    서비스 하나가 Chroma 클라이언트, 콜렉션, 임베딩 제공자(캐시 포함), 키워드/메타데이터/벡터 색인을 모두 소유하고
+    create_app, 챗봇 등 모든 사용처는 get()으로 같은 인스턴스를 받는다.
+
+    초기화는 single-flight: 동시에 여러 요청이 와도 백그라운드 스레드 하나만 초기화하고 나머지는 결과를 기다린다.
+    상태: cold → warming → ready | failed
+    - start()는 초기화 스레드를 한 번만 띄우고, 실패했으면 retry_seconds가 지난 뒤에만 다시 시도
+    - get(timeout)은 필요하면 초기화를 시작하고 최대 timeout초 기다린 뒤 서비스(준비 안 됐으면 None) 반환
+
+    색인 버전 무중단 교체 (VECTOR_INDEX_ARTIFACT 사용 시):
+    - 새 버전은 별도 버전 디렉토리에서 만들어지고(build_index.py 또는 refresh(rebuild=True)), 그동안 기존 버전이 계속 검색을 처리
+    - 새 버전을 열고 검증까지 끝나면 swap()으로 서비스 포인터만 원자적으로 바꿈 (이미 서비스를 받아간 요청은 이전 버전으로 마무리)
+    - 교체된 서비스는 VECTOR_SWAP_GRACE_SECONDS 뒤에 닫고, 그때 오래된 버전 디렉토리를 정리
+    - get()은 VECTOR_INDEX_POLL_SECONDS마다 CURRENT를 확인해 다른 프로세스가 활성화한 버전도 교체
+    """
+
+    COLD, WARMING, READY, FAILED = "cold", "warming", "ready", "failed"
+
+    def __init__(self, factory: Callable[[], Any] = build_vector_store, retry_seconds: Optional[float] = None):
+        self._factory = factory
+        self.retry_seconds = Config.VECTOR_WARMUP_RETRY_SECONDS if retry_seconds is None else retry_seconds
+        self.state = self.COLD
+        self.service = None
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self.started_at: Optional[float] = None     # time.time()
+        self.finished_at: Optional[float] = None
+        self._started = 0.0                         # time.monotonic()
+        self._finished = 0.0
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        # 버전 교체 상태
+        self.swaps = 0
+        self.swapped_at: Optional[float] = None
+        self.swap_error: Optional[str] = None
+        self._swapping = False
+        self._retiring: Dict[int, Any] = {}         # 유예 후 닫을 이전 서비스 (id → 서비스)
+        self._unapplied_files: Set[Path] = set()    # 빌드 실패로 아직 새 버전에 반영되지 않은 문서 경로
+        self._last_poll = time.monotonic()
+
+    def start(self) -> bool:
+        """초기화 스레드 시작 (이미 진행 중/완료이거나 재시도 대기 중이면 False)"""
+        with self._lock:
+            if self.state in (self.WARMING, self.READY):
+                return False
+            if self.state == self.FAILED and time.monotonic() - self._finished < self.retry_seconds:
+                return False
+            self.state = self.WARMING
+            self.error = None
+            self.attempts += 1
+            self.started_at, self.finished_at = time.time(), None
+            self._started = time.monotonic()
+            self._done.clear()
+        threading.Thread(target=self._run, name="vector-warmup", daemon=True).start()
+        logger.info(f"벡터 스토어 백그라운드 초기화 시작 (시도 {self.attempts}회)")
+        return True
+
+    def _run(self):
+        try:
+            service = self._factory()
+        except Exception as e:
+            logger.error(f"벡터 스토어 초기화 실패: {e}", exc_info=True)
+            with self._lock:
+                self.state, self.error = self.FAILED, str(e)
+                self._finish()
+            return
+        with self._lock:
+            self.service = service
+            self.state = self.READY
+            self._finish()
+        logger.info(f"벡터 스토어 준비 완료 ({self._finished - self._started:.2f}초)")
+
+    def _finish(self):
+        self.finished_at = time.time()
+        self._finished = time.monotonic()
+        self._done.set()
+
+    def wait(self, timeout: Optional[float] = None):
+        """준비될 때까지 최대 timeout초 대기 → 서비스 (실패/시간 초과/시작 전이면 None)"""
+        if self.state != self.COLD:
+            self._done.wait(timeout)
+        return self.service if self.state == self.READY else None
+
+    def get(self, timeout: Optional[float] = None):
+        """공유 서비스 가져오기 (시작 전이거나 재시도 간격이 지났으면 초기화 시작, 최대 timeout초 대기)"""
+        if self.state != self.READY:
+            self.start()
+        else:
+            self._poll_current_version()
+        return self.wait(timeout)
+
+    # -------------------------
+    # 버전 교체
+    # -------------------------
+    def swap(self, service):
+        """서비스 포인터를 새 서비스로 원자적으로 교체 → 이전 서비스 (유예 시간 뒤 닫힘)"""
+        with self._lock:
+            previous, self.service = self.service, service
+            self.state, self.error = self.READY, None
+            self.swaps += 1
+            self.swapped_at = time.time()
+            self._done.set()
+        # 이전 버전으로 만든 검색 결과가 캐시에서 나가지 않도록 비움
+        from app.services.dailycare.retrieval_cache import get_retrieval_cache
+        get_retrieval_cache().invalidate()
+        logger.info(
+            f"벡터 스토어 교체 완료 ({getattr(previous, 'index_version', None)} → {getattr(service, 'index_version', None)})"
+        )
+        if previous is not None and previous is not service:
+            self._retire(previous)
+        return previous
+
+    def refresh(self, rebuild: bool = False, clean: bool = False,
+                changed_files: Optional[Iterable[Path]] = None) -> bool:
+        """
+        활성 색인 버전(CURRENT)으로 백그라운드 교체 시작 (rebuild면 문서로 새 버전을 먼저 빌드해 활성화)
+        changed_files를 주면 활성 버전 복사본에 그 파일들만 반영해 빌드 (문서 감시기용)
+        이미 교체 중이거나 초기화 중이면 False
+        """
+        if not Config.VECTOR_INDEX_ARTIFACT:
+            raise ValueError("무중단 색인 교체는 버전 디렉토리를 쓰는 VECTOR_INDEX_ARTIFACT 설정이 필요합니다.")
+        with self._lock:
+            if self._swapping or self.state == self.WARMING:
+                return False
+            self._swapping = True
+        if changed_files is not None:
+            changed_files = set(map(Path, changed_files))
+        threading.Thread(
+            target=self._refresh, args=(rebuild, clean, changed_files), name="vector-swap", daemon=True
+        ).start()
+        return True
+
+    def _refresh(self, rebuild: bool, clean: bool, changed_files: Optional[Set[Path]] = None):
+        from app.services.dailycare import index_artifact
+        root = Path(Config.VECTOR_INDEX_ARTIFACT)
+        try:
+            if rebuild:
+                if not Config.DOCUMENTS_PATH:
+                    raise ValueError("DOCUMENTS_PATH가 설정되지 않아 새 버전을 빌드할 수 없습니다.")
+                with self._lock:
+                    # 이전 빌드가 실패해 반영되지 못한 파일도 함께 다시 반영 (전체 빌드면 모두 포함되므로 비움)
+                    if changed_files is not None:
+                        changed_files |= self._unapplied_files
+                    self._unapplied_files = set()
+                built = None
+                try:
+                    built = index_artifact.build_version(
+                        root, Path(Config.DOCUMENTS_PATH), clean=clean, changed_files=changed_files
+                    )
+                finally:
+                    if built is None and changed_files is not None:
+                        with self._lock:
+                            self._unapplied_files |= changed_files
+                if built is None:
+                    raise RuntimeError("새 색인 버전 빌드 실패")
+            version = index_artifact.current_version(root)
+            if version is None or version == getattr(self.service, "index_version", None):
+                return
+            self.swap(index_artifact.open_index_artifact(root / version))
+            self.swap_error = None
+        except Exception as e:
+            # 새 버전을 못 열어도 기존 버전은 그대로 서비스
+            logger.error(f"색인 버전 교체 실패 (기존 버전 유지): {e}", exc_info=True)
+            self.swap_error = str(e)
+        finally:
+            with self._lock:
+                self._swapping = False
+
+    def _poll_current_version(self):
+        """다른 프로세스(build_index.py)가 CURRENT를 바꿨으면 교체 시작"""
+        interval = Config.VECTOR_INDEX_POLL_SECONDS
+        if not Config.VECTOR_INDEX_ARTIFACT or interval <= 0 or self._swapping:
+            return
+        now = time.monotonic()
+        if now - self._last_poll < interval:
+            return
+        self._last_poll = now
+        from app.services.dailycare.index_artifact import current_version
+        version = current_version(Path(Config.VECTOR_INDEX_ARTIFACT))
+        if version and version != getattr(self.service, "index_version", None):
+            logger.info(f"새 색인 버전 {version} 감지, 백그라운드에서 교체합니다.")
+            self.refresh()
+
+    def _retire(self, service):
+        """교체된 서비스를 유예 시간 뒤 닫고 오래된 버전 정리 (그사이 받아간 요청은 계속 검색 가능)"""
+        with self._lock:
+            self._retiring[id(service)] = service
+        timer = threading.Timer(Config.VECTOR_SWAP_GRACE_SECONDS, self._close_retired, args=(service,))
+        timer.daemon = True
+        timer.start()
+
+    def _close_retired(self, service):
+        try:
+            service.close()
+        except Exception as e:
+            logger.warning(f"이전 벡터 스토어 정리 실패: {e}")
+        with self._lock:
+            self._retiring.pop(id(service), None)
+            in_use = [s.index_version for s in (self.service, *self._retiring.values()) if s and s.index_version]
+        if Config.VECTOR_INDEX_ARTIFACT:
+            from app.services.dailycare.index_artifact import prune_versions
+            prune_versions(Path(Config.VECTOR_INDEX_ARTIFACT), Config.VECTOR_INDEX_KEEP_VERSIONS, protect=in_use)
+
+    @property
+    def ready(self) -> bool:
+        return self.state == self.READY
+
+    def status(self) -> Dict[str, Any]:
+        """/health 보고용 상태"""
+        with self._lock:
+            status: Dict[str, Any] = {"state": self.state, "attempts": self.attempts}
+            if self.started_at is not None:
+                status["started_at"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at))
+                end = self._finished if self.finished_at is not None else time.monotonic()
+                status["elapsed_seconds" if self.state == self.WARMING else "seconds"] = round(end - self._started, 3)
+            if self.error:
+                status["error"] = self.error
+            service = self.service
+            if service is not None and service.index_version:
+                status["version"] = service.index_version
+            if self.swaps:
+                status["swaps"] = self.swaps
+                status["swapped_at"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.swapped_at))
+            if self._swapping:
+                status["swapping"] = True
+            if self.swap_error:
+                status["swap_error"] = self.swap_error
+            if self._unapplied_files:
+                status["unapplied_files"] = len(self._unapplied_files)
+        if service is not None and self.state == self.READY:
+            status["collections"] = {
+                collection_type: store._collection.count() if store else 0
+                for collection_type, store in service.stores.items()
+            }
+        return status
+
+
+_vector_registry = None
+_vector_registry_lock = threading.Lock()
+
+def get_vector_registry() -> VectorStoreRegistry:
+    global _vector_registry
+    if _vector_registry is None:
+        with _vector_registry_lock:
+            if _vector_registry is None:
+                _vector_registry = VectorStoreRegistry()
+    return _vector_registry
@@ -1,104 +1,178 @@
 import os
 import re
-import json
 import time
-import pickle
-import hashlib
+import uuid
+import heapq
 import logging
-from flask import current_app as app
-
-import shutil
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 
-from langchain_text_splitters import MarkdownHeaderTextSplitter
-from langchain_openai import OpenAIEmbeddings
 from langchain_core.embeddings import Embeddings
+import chromadb
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
-import tiktoken
-from collections import Counter
-import numpy as np
 
 from back.config import Config
+from app.services.dailycare.embedding_cache import MmapEmbeddingStore, get_shared_embedding_lru
+from app.services.dailycare.index_manifest import IndexManifest
+from app.services.dailycare.document_loader import iter_file_documents, iter_files_documents, sanitize_metadata
+from app.services.dailycare.embedding_pipeline import EmbeddingPipeline, UnlimitedRateLimiter
+from app.services.dailycare.embedding_provider import create_embeddings, embedding_signature
+from app.services.dailycare.keyword_index import BM25Index
+from app.services.dailycare.metadata_index import MetadataBitmapIndex, MetadataFilter
+from app.services.dailycare.numpy_vector_store import NumpyVectorStore
+from app.services.dailycare.retrieval_cache import get_retrieval_cache
+from app.services.dailycare.text_chunker import chunking_signature
+from app.services.dailycare.text_tokenizer import get_keyword_tokenizer
 
 
 logger = logging.getLogger(__name__)
 
-class CachedOpenAIEmbeddings(Embeddings):
-    """캐시를 지원하는 OpenAI 임베딩 래퍼"""
-    
-    def __init__(self, openai_embeddings: OpenAIEmbeddings, cache_dir: str):
-        self.openai_embeddings = openai_embeddings
+class CachedEmbeddings(Embeddings):
+    """캐시를 지원하는 임베딩 래퍼 (메모리 LRU → 단일 mmap 저장소 → 임베딩 제공자)"""
+
+    def __init__(self, base_embeddings: Embeddings, cache_dir: str, namespace: str = ""):
+        self.base_embeddings = base_embeddings
         self.cache_dir = cache_dir
-        os.makedirs(cache_dir, exist_ok=True)
-    
-    def get_cache_key(self, text: str) -> str:
-        return hashlib.md5(text.encode("utf-8")).hexdigest()
-    
+        self.store = MmapEmbeddingStore.open(cache_dir)
+        # 프로세스 전체에서 공유하는 메모리 캐시 (제공자/모델/차원별로 키 구분)
+        self.memory_cache = get_shared_embedding_lru()
+        self.memory_prefix = namespace.encode("utf-8") + b"|" if namespace else b""
+
+    def get_cache_key(self, text: str) -> bytes:
+        return MmapEmbeddingStore.make_key(text)
+
     def load_cache(self, text: str) -> Optional[List[float]]:
-        cache_file = os.path.join(self.cache_dir, f"{self.get_cache_key(text)}.pkl")
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, "rb") as f:
-                    return pickle.load(f)
-            except Exception as e:
-                logger.warning(f"임베딩 캐시 로드 실패: {e}")
+        try:
+            vector = self.store.get(self.get_cache_key(text))
+            if vector is not None:
+                return vector.tolist()
+        except Exception as e:
+            logger.warning(f"임베딩 캐시 로드 실패: {e}")
         return None
-    
+
     def save_cache(self, text: str, embedding: List[float]):
-        cache_file = os.path.join(self.cache_dir, f"{self.get_cache_key(text)}.pkl")
         try:
-            with open(cache_file, "wb") as f:
-                pickle.dump(embedding, f)
+            self.store.put(self.get_cache_key(text), embedding)
         except Exception as e:
             logger.warning(f"임베딩 캐시 저장 실패: {e}")
-    
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """문서들을 임베딩 (캐시 활용)"""
-        embeddings = []
-        uncached_texts = []
-        uncached_indices = []
-        
-        # 캐시에서 로드 시도
-        for i, text in enumerate(texts):
-            cached_embedding = self.load_cache(text)
-            if cached_embedding is not None:
-                embeddings.append(cached_embedding)
-                logger.debug(f"캐시에서 임베딩 로드: {text[:50]}...")
-            else:
-                embeddings.append(None)  # 플레이스홀더
-                uncached_texts.append(text)
-                uncached_indices.append(i)
-        
-        # 캐시에 없는 텍스트들만 OpenAI API 호출
-        if uncached_texts:
-            logger.info(f"새로운 임베딩 생성: {len(uncached_texts)}개 텍스트")
-            new_embeddings = self.openai_embeddings.embed_documents(uncached_texts)
-            
-            # 새 임베딩을 결과에 삽입하고 캐시에 저장
-            for idx, new_embedding in zip(uncached_indices, new_embeddings):
-                embeddings[idx] = new_embedding
-                self.save_cache(texts[idx], new_embedding)
-        
+        """문서들을 임베딩 (캐시 일괄 조회 + 미스 분할 배치 병렬 호출)"""
+        return self._embed_documents(texts, max_workers=Config.EMBEDDING_MAX_WORKERS)
+
+    def embed_documents_rate_limited(self, texts: List[str], limiter, token_counts: List[int]) -> List[List[float]]:
+        """
+        색인 파이프라인용 임베딩: 캐시를 먼저 조회하고, 실제 API 호출(미스 분할 배치)마다 그 배치의 토큰 수로 limiter 통과
+        - 캐시에서 모두 채워지면 limiter를 거치지 않음 (재동기화/재빌드가 RPM/TPM에 묶이지 않게)
+        - 파이프라인이 이미 EMBEDDING_MAX_IN_FLIGHT개 배치를 동시에 돌리므로 여기서는 분할 배치를 순차 호출
+          (동시 API 요청 수 = limiter가 세는 요청 수)
+        """
+        return self._embed_documents(texts, max_workers=1, limiter=limiter, token_counts=token_counts)
+
+    def _embed_documents(self, texts: List[str], max_workers: int, limiter=None,
+                         token_counts: Optional[List[int]] = None) -> List[List[float]]:
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        keys = [self.get_cache_key(text) for text in texts]
+
+        # 캐시 일괄 조회
+        try:
+            cached, hit_positions, miss_positions = self.store.get_many(keys)
+        except Exception as e:
+            logger.warning(f"임베딩 캐시 로드 실패: {e}")
+            cached, hit_positions, miss_positions = None, [], list(range(len(texts)))
+
+        if cached is not None:
+            for pos, vector in zip(hit_positions, cached.tolist()):
+                embeddings[pos] = vector
+
+        if not miss_positions:
+            return embeddings
+
+        # 같은 텍스트는 한 번만 요청
+        positions_by_key: Dict[bytes, List[int]] = {}
+        for pos in miss_positions:
+            positions_by_key.setdefault(keys[pos], []).append(pos)
+        miss_keys = list(positions_by_key.keys())
+        logger.info(f"새로운 임베딩 생성: {len(miss_keys)}개 텍스트")
+
+        size = max(1, Config.EMBEDDING_SUBBATCH_SIZE)
+        sub_batches = [miss_keys[i:i + size] for i in range(0, len(miss_keys), size)]
+
+        def embed_sub_batch(batch_keys: List[bytes]) -> List[List[float]]:
+            if limiter is not None:
+                limiter.acquire(sum(token_counts[positions_by_key[k][0]] for k in batch_keys) if token_counts else 0)
+            return self.base_embeddings.embed_documents([texts[positions_by_key[k][0]] for k in batch_keys])
+
+        def collect(batch_keys: List[bytes], vectors: List[List[float]]):
+            for key, vector in zip(batch_keys, vectors):
+                for pos in positions_by_key[key]:
+                    embeddings[pos] = vector
+            # 끝난 분할 배치는 나머지 요청이 진행 중일 때 바로 캐시에 기록
+            try:
+                self.store.put_many(batch_keys, vectors)
+            except Exception as e:
+                logger.warning(f"임베딩 캐시 저장 실패: {e}")
+
+        workers = min(max(1, max_workers), len(sub_batches))
+        if workers == 1:
+            for batch_keys in sub_batches:
+                collect(batch_keys, embed_sub_batch(batch_keys))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(embed_sub_batch, batch_keys): batch_keys for batch_keys in sub_batches}
+                for future in as_completed(futures):
+                    collect(futures[future], future.result())
+
         return embeddings
     
     def embed_query(self, text: str) -> List[float]:
-        """쿼리를 임베딩 (캐시 활용)"""
+        """쿼리를 임베딩 (메모리 캐시 → 디스크 캐시 순으로 활용)"""
+        key = self.memory_prefix + self.get_cache_key(text)
+        vector = self.memory_cache.get(key)
+        if vector is not None:
+            return vector.tolist()
+
         cached_embedding = self.load_cache(text)
         if cached_embedding is not None:
             logger.debug(f"캐시에서 쿼리 임베딩 로드: {text[:50]}...")
+            self.memory_cache.put(key, cached_embedding)
             return cached_embedding
-        
+
         logger.debug(f"새 쿼리 임베딩 생성: {text[:50]}...")
-        embedding = self.openai_embeddings.embed_query(text)
+        embedding = self.base_embeddings.embed_query(text)
         self.save_cache(text, embedding)
+        self.memory_cache.put(key, embedding)
         return embedding
 
+    def cache_stats(self) -> Dict[str, Any]:
+        """메모리 캐시 적중/미스/제거 통계와 디스크 캐시 크기"""
+        return {
+            "memory": self.memory_cache.stats(),
+            "disk_entries": len(self.store),
+        }
+
+
+# 하위 호환 이름
+CachedOpenAIEmbeddings = CachedEmbeddings
+
 class VectorStoreService:
-    def __init__(self, persist_directory: str = "./vector_db"):
-        self.documents_path = Path(Config.DOCUMENTS_PATH)
-        self.vector_db = Path(Config.VECTOR_DB)
+    # Reciprocal Rank Fusion 상수 (순위 1위와 하위 순위 간 점수 차이 완화)
+    RRF_K = 60
+    # 메타데이터 필터 통과 청크가 이 수 이하이면 Chroma에 청크 ID 목록으로 사전 필터링
+    FILTER_PREFILTER_LIMIT = 500
+    # 매니페스트에 임베딩 정보가 없던 시기의 기본 모델 (기존 콜렉션/캐시를 그대로 사용)
+    LEGACY_EMBEDDING_SIGNATURE = "text-embedding-ada-002"
+
+    def __init__(self, persist_directory: str = "./vector_db", vector_db: Optional[str] = None,
+                 documents_path: Optional[str] = None):
+        # 색인 artifact만 여는 배포에서는 문서 경로가 없을 수 있음 (None이면 동기화하지 않음)
+        documents_path = documents_path or Config.DOCUMENTS_PATH
+        self.documents_path = Path(documents_path) if documents_path else None
+        # vector_db를 넘기면 Config.VECTOR_DB 대신 사용 (빌드된 색인 artifact 등)
+        self.vector_db = Path(vector_db or Config.VECTOR_DB)
         self.persist_directory = persist_directory
         
         # 멀티 콜렉션 설정
@@ -107,16 +181,48 @@ class VectorStoreService:
             'medications': 'mypetsvoice_medications'           # 의약품 정보
         }
         
+        # 모든 콜렉션이 공유하는 Chroma 클라이언트 (처음 열 때 한 번만 생성)
+        self._client: Optional[chromadb.ClientAPI] = None
+        self._client_lock = threading.Lock()
+        # 문서 감시기의 부분 동기화를 한 번에 하나씩 실행
+        self._sync_lock = threading.Lock()
+
         # 각 콜렉션별 스토어
         self.stores: Dict[str, Optional[Chroma]] = {
             'general_guides': None,
             'medications': None
         }
         
-        # 캐시를 지원하는 임베딩 래퍼 생성
-        openai_embeddings = OpenAIEmbeddings(api_key=Config.OPENAI_API_KEY)
-        self.cache_dir = os.path.join(os.path.dirname(str(self.vector_db)), "embedding_cache")
-        self.embedding = CachedOpenAIEmbeddings(openai_embeddings, self.cache_dir)
+        # 설정된 임베딩 제공자(openai | local)에 캐시 래퍼를 씌움
+        self.embedding_provider = Config.EMBEDDING_PROVIDER.lower()
+        # 제공자/모델/차원이 다르면 캐시 벡터를 섞어 쓸 수 없으므로 디렉토리를 분리
+        self.embedding_signature = embedding_signature(self.embedding_provider)
+        cache_name = "embedding_cache"
+        if self.embedding_signature != self.LEGACY_EMBEDDING_SIGNATURE:
+            cache_name += "-" + re.sub(r"[^\w.-]", "_", self.embedding_signature)
+        self.cache_dir = os.path.join(os.path.dirname(str(self.vector_db)), cache_name)
+        self.embedding = CachedEmbeddings(
+            create_embeddings(self.embedding_provider), self.cache_dir, namespace=self.embedding_signature
+        )
+
+        # 콜렉션별 BM25 키워드 역색인 / 메타데이터 비트맵 색인
+        self.keyword_indexes: Dict[str, BM25Index] = {}
+        self.metadata_indexes: Dict[str, MetadataBitmapIndex] = {}
+
+        # 벡터 검색 백엔드 (chroma: Chroma 직접 검색 / numpy: 정규화 행렬 정확 검색, Chroma는 저장소로만 사용)
+        self.vector_backend = Config.VECTOR_BACKEND.lower()
+        self.numpy_stores: Dict[str, NumpyVectorStore] = {}
+
+        # 콜렉션 동시 검색용 스레드 풀
+        self._search_executor = ThreadPoolExecutor(
+            max_workers=max(1, Config.SEARCH_MAX_WORKERS), thread_name_prefix="vector-search"
+        )
+
+        # 콜렉션별 마지막 임베딩 파이프라인 처리량 통계
+        self.last_pipeline_stats: Dict[str, Dict[str, Any]] = {}
+
+        # 빌드된 색인 artifact에서 열었으면 그 버전 이름 (open_index_artifact가 설정)
+        self.index_version: Optional[str] = None
 
         logger.info(f"VectorStoreService initialized. documents_path={self.documents_path}, vector_db={self.vector_db}")
 
@@ -132,7 +238,7 @@ class VectorStoreService:
         logger.info(f"벡터 DB 경로: {self.vector_db}")
         
         # 문서 경로 검증
-        if not self.documents_path.exists():
+        if not self.documents_path or not self.documents_path.exists():
             logger.error(f"문서 경로가 존재하지 않습니다: {self.documents_path}")
             return self.stores
         
@@ -142,32 +248,31 @@ class VectorStoreService:
                 self.vector_db.mkdir(parents=True, exist_ok=True)
                 logger.info("벡터 DB 디렉토리 생성")
             
-            # 각 콜렉션별 초기화
+            # 각 콜렉션별 초기화 (매니페스트 기준 증분 동기화)
             for collection_type, collection_name in self.collections.items():
                 logger.info(f"{collection_type} 콜렉션 초기화 중...")
                 
                 try:
-                    # 기존 콜렉션 로드 시도
-                    store = Chroma(
-                        collection_name=collection_name,
-                        embedding_function=self.embedding,
-                        persist_directory=str(self.vector_db),
-                    )
-                    
-                    # 건강 체크
+                    # 검색 색인 스냅샷을 먼저 열어두면 동기화 중 변경분만 반영됨
+                    self._load_index_snapshots(collection_type)
+                    store, stats = self.sync_collection(collection_type)
                     count = store._collection.count()
-                    if count == 0:
-                        logger.info(f"{collection_type} 콜렉션이 비어있어서 새로 생성합니다.")
-                        store = self.create_collection_vector_db(collection_type)
-                    else:
-                        logger.info(f"{collection_type} 콜렉션 로딩 성공 (문서 수: {count})")
-                    
-                    self.stores[collection_type] = store
+                    logger.info(
+                        f"{collection_type} 콜렉션 로딩 성공 (문서 수: {count}, "
+                        f"변경 파일 {stats['changed_files']}개, 추가 {stats['added']}, 삭제 {stats['deleted']})"
+                    )
+                    self.stores[collection_type] = store if count else None
+                    if count and not self._search_indexes_ready(collection_type, count):
+                        self._build_search_indexes(collection_type, store)
+                    elif count and (stats['added'] or stats['deleted']):
+                        self._save_index_snapshots(collection_type)
                     
                 except Exception as e:
-                    logger.warning(f"{collection_type} 콜렉션 로딩 실패: {e}")
+                    logger.warning(f"{collection_type} 콜렉션 동기화 실패: {e}")
                     logger.info(f"{collection_type} 콜렉션을 새로 생성합니다.")
                     self.stores[collection_type] = self.create_collection_vector_db(collection_type)
+                    if self.stores[collection_type]:
+                        self._build_search_indexes(collection_type, self.stores[collection_type])
 
             return self.stores
 
@@ -175,39 +280,319 @@ class VectorStoreService:
             logger.error(f"멀티 콜렉션 초기화 중 치명적 오류: {e}", exc_info=True)
             return self.stores
 
+    def open_vector_db(self) -> Dict[str, Optional[Chroma]]:
+        """
+        이미 만들어진 벡터 DB를 문서 동기화 없이 열기 (빌드된 색인 artifact용, 임베딩 API 호출 없음)
+        검색 색인 스냅샷이 없거나 맞지 않으면 Chroma에 저장된 임베딩으로 다시 만든다.
+        """
+        for collection_type, collection_name in self.collections.items():
+            store = self._open_chroma_store(collection_name)
+            count = store._collection.count()
+            self.stores[collection_type] = store if count else None
+            if not count:
+                logger.warning(f"{collection_type} 콜렉션이 비어 있습니다: {self.vector_db}")
+                continue
+            self._load_index_snapshots(collection_type)
+            if not self._search_indexes_ready(collection_type, count):
+                self._build_search_indexes(collection_type, store)
+            logger.info(f"{collection_type} 콜렉션 열기 완료 (문서 수: {count})")
+        return self.stores
+
     def create_collection_vector_db(self, collection_type: str) -> Optional[Chroma]:
         """
-        특정 타입의 콜렉션을 생성
+        특정 타입의 콜렉션을 처음부터 다시 생성 (매니페스트 초기화 후 전체 동기화)
         """
         logger.info(f"{collection_type} 콜렉션 생성 시작...")
         
-        if collection_type == 'general_guides':
-            documents = self.load_general_guide_documents()
-        elif collection_type == 'medications':
-            documents = self.load_medication_documents()
-        else:
+        if collection_type not in self.collections:
             logger.error(f"알 수 없는 콜렉션 타입: {collection_type}")
             return None
-        
-        if not documents:
+
+        collection_name = self.collections[collection_type]
+        self._drop_search_indexes(collection_type)
+        get_retrieval_cache().invalidate([collection_type])
+        try:
+            self._open_chroma_store(collection_name).delete_collection()
+        except Exception as e:
+            logger.warning(f"{collection_type} 기존 콜렉션 삭제 실패: {e}")
+        manifest_path = self._manifest_path(collection_name)
+        if manifest_path.exists():
+            manifest_path.unlink()
+
+        store, stats = self.sync_collection(collection_type)
+        if not stats['added']:
             logger.error(f"{collection_type}에 해당하는 문서가 없습니다.")
             return None
-        
-        return self._create_chroma_store(documents, self.collections[collection_type])
+        return store
+
+    # -------------------------
+    # Incremental sync (manifest)
+    # -------------------------
+    def sync_collection(self, collection_type: str, store: Optional[Chroma] = None,
+                        source_files: Optional[Iterable[str]] = None) -> Tuple[Chroma, Dict[str, int]]:
+        """
+        매니페스트와 현재 문서를 비교해 바뀐 청크만 반영
+        - 지문(size, mtime)이 같은 파일은 다시 읽지 않음
+        - 새로 생기거나 내용이 바뀐 청크만 upsert, 사라진 청크는 delete
+        - source_files(문서 경로 기준 상대 경로)를 주면 그 파일들만 확인 (문서 감시기용, 나머지 파일은 그대로 둠)
+        """
+        collection_name = self.collections[collection_type]
+        manifest = IndexManifest.load(self._manifest_path(collection_name), collection_name)
+        if store is None:
+            store = self._open_chroma_store(collection_name)
+
+        count = store._collection.count()
+        if count and not manifest.chunks:
+            # 매니페스트 도입 전에 만든 콜렉션은 청크 ID를 알 수 없으므로 비우고 다시 채움 (임베딩은 캐시 재사용)
+            logger.info(f"{collection_type} 콜렉션에 매니페스트가 없어 한 번 전체 재색인합니다.")
+            store.delete_collection()
+            store = self._open_chroma_store(collection_name)
+            self._drop_search_indexes(collection_type)
+        elif count and (manifest.embedding or self.LEGACY_EMBEDDING_SIGNATURE) != self.embedding_signature:
+            # 임베딩 모델/차원이 바뀌면 기존 벡터와 차원·공간이 달라 전체 재색인
+            logger.info(
+                f"{collection_type} 콜렉션 임베딩 설정 변경 ({manifest.embedding or self.LEGACY_EMBEDDING_SIGNATURE} → "
+                f"{self.embedding_signature}), 전체 재색인합니다."
+            )
+            store.delete_collection()
+            store = self._open_chroma_store(collection_name)
+            manifest.clear()
+            self._drop_search_indexes(collection_type)
+            get_retrieval_cache().invalidate([collection_type])
+        elif manifest.chunks and count == 0:
+            logger.info(f"{collection_type} 콜렉션이 비어있어 매니페스트를 초기화합니다.")
+            manifest.clear()
+            self._drop_search_indexes(collection_type)
+
+        chunking = chunking_signature()
+        if manifest.files and manifest.chunking != chunking:
+            # 청크 분할 설정이 바뀌면 파일 지문과 무관하게 모두 다시 파싱 (내용이 같은 청크는 ID가 같아 그대로 유지)
+            logger.info(f"{collection_type} 청크 분할 설정 변경 ({manifest.chunking} → {chunking}), 모든 파일을 다시 파싱합니다.")
+            manifest.invalidate_fingerprints()
+
+        stats = {"changed_files": 0, "unchanged_files": 0, "removed_files": 0, "added": 0, "deleted": 0, "failed": 0,
+                 "failed_files": 0}
+        if source_files is None:
+            current_files = {self._relative_source(path): path for path in self._collection_files(collection_type)}
+            known_files = list(manifest.files)
+        else:
+            source_files = set(source_files)
+            current_files = {
+                source_file: self.documents_path / source_file
+                for source_file in sorted(source_files) if (self.documents_path / source_file).is_file()
+            }
+            known_files = [source_file for source_file in manifest.files if source_file in source_files]
+
+        to_delete: List[str] = []
+        for source_file in known_files:
+            if source_file not in current_files:
+                to_delete.extend(manifest.remove_file(source_file))
+                stats["removed_files"] += 1
+
+        changed = []  # (source_file, fingerprint, records, old_ids)
+
+        def iter_new_documents() -> Iterator[Document]:
+            """바뀐 파일만 (병렬로) 파싱하며 새 청크를 흘려보냄 (임베딩은 파싱이 끝나기 전에 시작됨)"""
+            fingerprints = {}
+            for source_file, path in current_files.items():
+                fingerprint = IndexManifest.file_fingerprint(path)
+                if manifest.is_file_unchanged(source_file, fingerprint):
+                    stats["unchanged_files"] += 1
+                else:
+                    fingerprints[source_file] = fingerprint
+
+            changed_paths = [current_files[source_file] for source_file in fingerprints]
+            for source_file, (path, docs) in zip(fingerprints, self._iter_files_documents(collection_type, changed_paths)):
+                stats["changed_files"] += 1
+                old_ids = set(manifest.file_chunk_ids(source_file))
+                records = []
+                try:
+                    for doc in docs:
+                        section_index = self._chunk_locator(doc.metadata)
+                        content_hash = IndexManifest.content_hash(doc.page_content, doc.metadata)
+                        chunk_id = manifest.make_chunk_id(source_file, section_index, content_hash)
+                        doc.metadata["chunk_id"] = chunk_id
+                        records.append({"chunk_id": chunk_id, "section_index": section_index, "content_hash": content_hash})
+                        if chunk_id not in old_ids:
+                            yield doc
+                except Exception as e:
+                    # 저장 도중의 잘린 파일 등: 기존 청크를 유지하고 지문을 비워 다음 동기화 때 다시 시도
+                    logger.error(f"{collection_type} 파일 파싱 실패, 기존 청크를 유지합니다 ({source_file}): {e}")
+                    stats["failed_files"] += 1
+                    # 실패 전에 흘려보낸 새 청크는 upsert 뒤 삭제
+                    to_delete.extend(record["chunk_id"] for record in records if record["chunk_id"] not in old_ids)
+                    changed.append((source_file, None, manifest.file_records(source_file), old_ids))
+                    continue
+
+                changed.append((source_file, fingerprints[source_file], records, old_ids))
+                new_ids = {record["chunk_id"] for record in records}
+                to_delete.extend(old_ids - new_ids)
+
+        written = self._upsert_documents(store, iter_new_documents(), collection_name)
+        stats["added"] = len(written)
+
+        # 새 청크를 먼저 반영한 뒤 사라진 청크를 삭제 (검색 공백 최소화)
+        if to_delete:
+            for start in range(0, len(to_delete), 500):
+                store.delete(ids=to_delete[start:start + 500])
+            if collection_type in self.keyword_indexes:
+                self.keyword_indexes[collection_type].remove(to_delete)
+            if collection_type in self.metadata_indexes:
+                self.metadata_indexes[collection_type].remove(to_delete)
+            if collection_type in self.numpy_stores:
+                self.numpy_stores[collection_type].delete(to_delete)
+            get_retrieval_cache().invalidate([collection_type])
+            stats["deleted"] = len(to_delete)
+            logger.info(f"{collection_type} 콜렉션에서 청크 {len(to_delete)}개 삭제")
+
+        for source_file, fingerprint, records, old_ids in changed:
+            kept = [r for r in records if r["chunk_id"] in written or r["chunk_id"] in old_ids]
+            stats["failed"] += len(records) - len(kept)
+            # 일부 청크 반영에 실패한 파일은 지문을 비워 다음 동기화 때 다시 처리
+            manifest.set_file(source_file, fingerprint if len(kept) == len(records) else None, kept)
+
+        if changed or to_delete:
+            manifest.embedding = self.embedding_signature
+            manifest.chunking = chunking
+            manifest.save()
+        return store, stats
+
+    def sync_files(self, file_paths: Iterable[Path]) -> Dict[str, Dict[str, int]]:
+        """
+        바뀐 문서 파일만 다시 청크 분할해 반영 (문서 감시기용)
+        - 파일이 사라졌으면 그 파일의 청크만 삭제, 내용이 같은 청크는 ID가 같아 다시 임베딩하지 않음
+        - 벡터/키워드/메타데이터 색인을 함께 갱신하고 스냅샷 저장
+        - 있는 디렉토리가 바뀌었으면 전체 콜렉션을 동기화
+        - 사라진 경로는 매니페스트에서 그 경로 아래의 파일을 찾아 삭제 (v1.2/처럼 점이 있는 디렉토리도 확장자로 추측하지 않음)
+        반환: 콜렉션별 동기화 통계
+        """
+        if not self.documents_path:
+            raise ValueError("DOCUMENTS_PATH가 설정되지 않아 문서를 읽을 수 없습니다.")
+        suffixes = {'.md': 'general_guides', '.json': 'medications'}
+        targets: Dict[str, Optional[set]] = {collection_type: set() for collection_type in self.collections}
+        known_files: Dict[str, List[str]] = {}
+
+        def add_target(collection_type: str, source_file: str):
+            if targets[collection_type] is not None:
+                targets[collection_type].add(source_file)
+
+        results = {}
+        with self._sync_lock:
+            for path in map(Path, file_paths):
+                try:
+                    source_file = path.relative_to(self.documents_path).as_posix()
+                except ValueError:
+                    continue
+                if path.is_dir():
+                    targets = {collection_type: None for collection_type in self.collections}
+                    continue
+                if path.suffix in suffixes:
+                    add_target(suffixes[path.suffix], source_file)
+                if path.exists():
+                    continue
+                prefix = f"{source_file}/"
+                for collection_type, collection_name in self.collections.items():
+                    if collection_type not in known_files:
+                        known_files[collection_type] = list(
+                            IndexManifest.load(self._manifest_path(collection_name), collection_name).files
+                        )
+                    for known_file in known_files[collection_type]:
+                        if known_file.startswith(prefix):
+                            add_target(collection_type, known_file)
+
+            for collection_type, source_files in targets.items():
+                if source_files is not None and not source_files:
+                    continue
+                store, stats = self.sync_collection(collection_type, self.stores.get(collection_type), source_files)
+                count = store._collection.count()
+                self.stores[collection_type] = store if count else None
+                if count and not self._search_indexes_ready(collection_type, count):
+                    self._build_search_indexes(collection_type, store)
+                elif count and (stats['added'] or stats['deleted']):
+                    self._save_index_snapshots(collection_type)
+                results[collection_type] = stats
+                logger.info(
+                    f"{collection_type} 문서 변경 반영 (변경 파일 {stats['changed_files']}개, 삭제 파일 {stats['removed_files']}개, "
+                    f"추가 {stats['added']}, 삭제 {stats['deleted']}, 문서 수 {count})"
+                )
+        return results
+
+    def _manifest_path(self, collection_name: str) -> Path:
+        return self.vector_db / "manifests" / f"{collection_name}.json"
+
+    def _manifest_digest(self, collection_type: str) -> str:
+        collection_name = self.collections[collection_type]
+        return IndexManifest.load(self._manifest_path(collection_name), collection_name).content_digest()
+
+    @property
+    def client(self) -> chromadb.ClientAPI:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self.vector_db.mkdir(parents=True, exist_ok=True)
+                    self._client = chromadb.PersistentClient(path=str(self.vector_db))
+        return self._client
+
+    def close(self):
+        """
+        교체되어 더 이상 쓰지 않는 서비스 정리 (검색 스레드 풀 종료, 임베딩 캐시 mmap 해제, Chroma 클라이언트 해제)
+        진행 중인 검색이 끝날 때까지 기다린 뒤 닫는다.
+        """
+        self._search_executor.shutdown(wait=True)
+        # 같은 캐시 디렉토리를 쓰는 다른 서비스가 남아 있으면 저장소는 열린 채로 유지됨 (open/close 참조 수)
+        self.embedding.store.close()
+        with self._client_lock:
+            client, self._client = self._client, None
+        # chromadb 1.x부터 close() 지원 (이전 버전은 GC에 맡김)
+        close_client = getattr(client, "close", None)
+        if close_client is not None:
+            close_client()
+        logger.info(f"VectorStoreService closed. vector_db={self.vector_db}")
+
+    def _open_chroma_store(self, collection_name: str) -> Chroma:
+        # 콜렉션을 열 때마다 클라이언트를 새로 만들지 않고 서비스가 가진 하나를 공유
+        return Chroma(
+            collection_name=collection_name,
+            embedding_function=self.embedding,
+            client=self.client,
+        )
+
+    def _collection_files(self, collection_type: str) -> List[Path]:
+        pattern = "**/*.md" if collection_type == 'general_guides' else "**/*.json"
+        if not self.documents_path:
+            # 빈 목록으로 처리하면 동기화가 모든 청크를 삭제하므로 중단
+            raise ValueError("DOCUMENTS_PATH가 설정되지 않아 문서를 읽을 수 없습니다.")
+        return sorted(self.documents_path.glob(pattern))
+
+    def _relative_source(self, file_path: Path) -> str:
+        try:
+            return file_path.relative_to(self.documents_path).as_posix()
+        except ValueError:
+            return file_path.as_posix()
+
+    def _iter_file_documents(self, collection_type: str, file_path: Path) -> Iterator[Document]:
+        """파일 하나를 콜렉션 타입에 맞는 로더로 청크 분할 (JSON은 항목 단위 스트리밍)"""
+        return iter_file_documents(collection_type, file_path)
+
+    def _iter_files_documents(self, collection_type: str, file_paths: List[Path]) -> Iterator[Tuple[Path, Iterator[Document]]]:
+        """여러 파일을 INGEST_WORKERS 프로세스로 병렬 청크 분할 → 파일 순서대로 (경로, 청크들)"""
+        return iter_files_documents(collection_type, file_paths, workers=Config.INGEST_WORKERS)
+
+    @staticmethod
+    def _chunk_locator(metadata: Dict[str, Any]) -> str:
+        """파일 내 청크 위치 (섹션 / 항목:청크 번호)"""
+        parts = [str(metadata[key]) for key in ("section_index", "item_index", "chunk_index") if key in metadata]
+        return ":".join(parts)
 
     def load_general_guide_documents(self) -> List[Document]:
         """일반 가이드 문서들만 로드 (.md 파일)"""
         documents: List[Document] = []
         
-        md_files = list(self.documents_path.glob("**/*.md"))
+        md_files = self._collection_files('general_guides')
         logger.info(f"일반 가이드 Markdown 파일 수: {len(md_files)}")
         
-        for md_file in md_files:
+        for md_file, docs in self._iter_files_documents('general_guides', md_files):
             try:
-                docs = self.load_markdown(md_file)
-                # 메타데이터에 컬렉션 타입 추가
-                for doc in docs:
-                    doc.metadata['collection_type'] = 'general_guide'
                 documents.extend(docs)
             except Exception as e:
                 logger.warning(f"일반 가이드 파일 처리 실패 ({md_file}): {e}")
@@ -219,15 +604,11 @@ class VectorStoreService:
         """의약품 문서들만 로드 (.json 파일)"""
         documents: List[Document] = []
         
-        json_files = list(self.documents_path.glob("**/*.json"))
+        json_files = self._collection_files('medications')
         logger.info(f"의약품 JSON 파일 수: {len(json_files)}")
         
-        for json_file in json_files:
+        for json_file, docs in self._iter_files_documents('medications', json_files):
             try:
-                docs = self.load_json(json_file)
-                # 메타데이터에 컬렉션 타입 추가
-                for doc in docs:
-                    doc.metadata['collection_type'] = 'medication'
                 documents.extend(docs)
             except Exception as e:
                 logger.warning(f"의약품 파일 처리 실패 ({json_file}): {e}")
@@ -237,203 +618,251 @@ class VectorStoreService:
 
     def _create_chroma_store(self, documents: List[Document], collection_name: str) -> Optional[Chroma]:
         """공통 Chroma 스토어 생성 함수"""
-        texts = [doc.page_content for doc in documents]
-        metadatas = [doc.metadata for doc in documents]
-
-        BATCH_SIZE = 50   # 배치 크기 감소 (rate limiting 대응)
-        MAX_TOKENS_PER_BATCH = 50_000  # 토큰 수 감소
-        DELAY_BETWEEN_BATCHES = 2  # 배치 간 2초 대기
-        encoder = tiktoken.get_encoding("cl100k_base")
-
-        store = None
-        batch_texts, batch_metadatas = [], []
-        token_count = 0
-
-        for i, (text, metadata) in enumerate(zip(texts, metadatas)):
-            text_tokens = len(encoder.encode(text))
-            
-            if token_count + text_tokens > MAX_TOKENS_PER_BATCH or len(batch_texts) >= BATCH_SIZE:
-                try:
-                    if store is None:
-                        logger.info(f"{collection_name} 첫 배치({i-len(batch_texts)}~{i})로 생성")
-                        store = Chroma.from_texts(
-                            texts=batch_texts,
-                            embedding=self.embedding,
-                            metadatas=batch_metadatas,
-                            persist_directory=str(self.vector_db),
-                            collection_name=collection_name
-                        )
-                    else:
-                        logger.info(f"{collection_name} 추가 배치({i-len(batch_texts)}~{i}) 저장")
-                        store.add_texts(
-                            texts=batch_texts,
-                            metadatas=batch_metadatas,
-                        )
-                    
-                    batch_texts, batch_metadatas = [], []
-                    token_count = 0
-                    
-                    # Rate limiting 대응을 위한 대기
-                    time.sleep(DELAY_BETWEEN_BATCHES)
-                    
-                except Exception as e:
-                    logger.error(f"{collection_name} 배치 {i//BATCH_SIZE} 임베딩 실패: {e}")
-                    batch_texts, batch_metadatas = [], []
-                    token_count = 0
-                    continue
-
-            batch_texts.append(text)
-            batch_metadatas.append(metadata)
-            token_count += text_tokens
-
-        # 남은 배치 처리
-        if batch_texts:
-            try:
-                if store is None:
-                    logger.info(f"{collection_name} 마지막 배치로 생성")
-                    store = Chroma.from_texts(
-                        texts=batch_texts,
-                        embedding=self.embedding,
-                        metadatas=batch_metadatas,
-                        persist_directory=str(self.vector_db),
-                        collection_name=collection_name
-                    )
-                else:
-                    logger.info(f"{collection_name} 마지막 배치 저장")
-                    store.add_texts(
-                        texts=batch_texts,
-                        metadatas=batch_metadatas,
-                    )
-                    
-            except Exception as e:
-                logger.error(f"{collection_name} 마지막 배치 임베딩 실패: {e}")
+        store = self._open_chroma_store(collection_name)
+        written = self._upsert_documents(store, documents, collection_name)
 
-        if store:
-            logger.info(f"{collection_name} 콜렉션 생성 완료 (총 {len(documents)}개 문서)")
-        else:
-            logger.error(f"{collection_name} 콜렉션 생성 실패")
+        if written:
+            logger.info(f"{collection_name} 콜렉션 생성 완료 (총 {len(written)}/{len(documents)}개 문서)")
+            return store
+        logger.error(f"{collection_name} 콜렉션 생성 실패")
+        return None
 
-        return store
+    def _upsert_documents(self, store: Chroma, documents: Iterable[Document], collection_name: str) -> set:
+        """
+        임베딩 파이프라인으로 문서를 동시에 임베딩해 저장 (청크 ID 기준 upsert)
+        반환: 실제로 저장된 청크 ID 집합 (재시도 후에도 실패한 배치는 제외)
+        """
+        written = set()
+        collection_type = self._collection_type_of(collection_name)
+
+        def write_batch(batch: List[Document], vectors: List[List[float]]):
+            ids = [doc.metadata.get("chunk_id") or str(uuid.uuid4()) for doc in batch]
+            texts = [doc.page_content for doc in batch]
+            store._collection.upsert(
+                ids=ids,
+                embeddings=vectors,
+                metadatas=[doc.metadata for doc in batch],
+                documents=texts,
+            )
+            written.update(ids)
+            # 키워드 역색인 / 메타데이터 색인 / numpy 행렬도 함께 갱신
+            if collection_type in self.keyword_indexes:
+                self.keyword_indexes[collection_type].add(ids, texts)
+            if collection_type in self.metadata_indexes:
+                self.metadata_indexes[collection_type].add(ids, texts, [doc.metadata for doc in batch])
+            if collection_type in self.numpy_stores:
+                self.numpy_stores[collection_type].upsert(ids, vectors, texts, [doc.metadata for doc in batch])
+
+        # 로컬 임베딩은 API 한도가 없으므로 속도 제한 없이 실행
+        limiter = UnlimitedRateLimiter() if self.embedding_provider == "local" else None
+        stats = EmbeddingPipeline(self.embedding, limiter=limiter).run(documents, write_batch, label=collection_name)
+        self.last_pipeline_stats[collection_name] = stats
+        if written and collection_type:
+            # 콜렉션 내용이 바뀌었으므로 이 콜렉션을 검색한 캐시 결과 폐기
+            get_retrieval_cache().invalidate([collection_type])
+        if stats["failed_documents"]:
+            logger.error(f"{collection_name} 임베딩 실패 문서 {stats['failed_documents']}개 (다음 동기화 때 재시도)")
+        return written
+
+    def add_texts(self, collection_type: str, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None,
+                  ids: Optional[List[str]] = None) -> List[str]:
+        """콜렉션에 텍스트 추가 (벡터 + 키워드/메타데이터 색인 동시 반영)"""
+        store = self.stores.get(collection_type) or self._open_chroma_store(self.collections[collection_type])
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        documents = []
+        for text, metadata, chunk_id in zip(texts, metadatas, ids):
+            documents.append(Document(page_content=text, metadata={**sanitize_metadata(metadata), "chunk_id": chunk_id}))
+
+        written = self._upsert_documents(store, documents, self.collections[collection_type])
+        if written and not self.stores.get(collection_type):
+            self.stores[collection_type] = store
+            self._build_search_indexes(collection_type, store)
+        return [chunk_id for chunk_id in ids if chunk_id in written]
+
+    def _collection_type_of(self, collection_name: str) -> Optional[str]:
+        for collection_type, name in self.collections.items():
+            if name == collection_name:
+                return collection_type
+        return None
 
     def create_vector_db(self):
-        all_documents = self.load_documents()
-        if not all_documents:
-            logger.error("문서가 없어 벡터 DB를 생성할 수 없습니다.")
-            return None
-
-        texts = [doc.page_content for doc in all_documents]
-        metadatas = [doc.metadata for doc in all_documents]
+        """전체 콜렉션을 처음부터 다시 생성 (하위 호환성)"""
+        for collection_type in self.collections:
+            self.stores[collection_type] = self.create_collection_vector_db(collection_type)
+        return self.stores
 
-        BATCH_SIZE = 50   # 배치 크기 감소 (rate limiting 대응)
-        MAX_TOKENS_PER_BATCH = 50_000  # 토큰 수 감소
-        DELAY_BETWEEN_BATCHES = 2  # 배치 간 2초 대기
-        encoder = tiktoken.get_encoding("cl100k_base")
-
-        self.store = None
-        batch_texts, batch_metadatas = [], []
-        token_count = 0
+    # -------------------------
+    # Multi-Collection Search Methods
+    # -------------------------
+    def search_multi_collections(self, query: str, collection_types: List[str], k: int = 5,
+                                 metadata_filter: Optional[MetadataFilter] = None) -> List[Document]:
+        """
+        여러 콜렉션에서 검색하여 결과 통합
+        """
+        return [doc for doc, _ in self.search_multi_collections_with_score(query, collection_types, k=k, metadata_filter=metadata_filter)]
 
-        for i, (text, metadata) in enumerate(zip(texts, metadatas)):
-            text_tokens = len(encoder.encode(text))
-            # 토큰 수 또는 배열 길이 초과 시 현재 배치 전송
-            if token_count + text_tokens > MAX_TOKENS_PER_BATCH or len(batch_texts) >= BATCH_SIZE:
-                try:
-                    if self.store is None:
-                        logger.info(f"첫 배치({i-len(batch_texts)}~{i})로 벡터 DB 생성")
-                        self.store = Chroma.from_texts(
-                            texts=batch_texts,
-                            embedding=self.embedding,
-                            metadatas=batch_metadatas,
-                            persist_directory=str(self.vector_db),
-                            collection_name=self.collection_name
-                        )
-                    else:
-                        logger.info(f"추가 배치({i-len(batch_texts)}~{i}) 저장")
-                        self.store.add_texts(
-                            texts=batch_texts,
-                            metadatas=batch_metadatas,
-                            collection_name=self.collection_name, 
-                            persist_directory=str(self.vector_db),
-                        )
-                    # 배치 초기화
-                    batch_texts, batch_metadatas = [], []
-                    token_count = 0
-                    
-                    # Rate limiting 대응을 위한 대기
-                    time.sleep(DELAY_BETWEEN_BATCHES)
-                except Exception as e:
-                    logger.error(f"배치 {i//BATCH_SIZE} Embedding 실패: {e}")
-                    batch_texts, batch_metadatas = [], []
-                    token_count = 0
-                    continue
+    def search_multi_collections_with_score(self, query: str, collection_types: List[str], k: int = 5,
+                                            metadata_filter: Optional[MetadataFilter] = None) -> List[Tuple[Document, float]]:
+        """
+        질문을 한 번만 임베딩한 뒤 모든 콜렉션을 동시에 벡터 검색
+        반환: (문서, 거리) 상위 k개 (거리가 작을수록 유사도 높음)
+        """
+        stores = self._available_stores(collection_types)
+        if not stores:
+            return []
 
-            batch_texts.append(text)
-            batch_metadatas.append(metadata)
-            token_count += text_tokens
+        query_vector = self.embedding.embed_query(query)
+        futures = {
+            self._search_executor.submit(self._vector_search, collection_type, store, query_vector, k, metadata_filter): collection_type
+            for collection_type, store in stores
+        }
 
-        # 남은 배치 처리
-        if batch_texts:
+        all_results = []
+        for future in as_completed(futures):
+            collection_type = futures[future]
             try:
-                if self.store is None:
-                    logger.info(f"마지막 배치({len(all_documents)-len(batch_texts)}~{len(all_documents)})로 벡터 DB 생성")
-                    self.store = Chroma.from_texts(
-                        texts=batch_texts,
-                        embedding=self.embedding,
-                        metadatas=batch_metadatas,
-                        persist_directory=self.persist_directory,
-                        collection_name=self.collection_name, 
-                        #colloection_name,persi..설정해야 DB찾을 수 있음!
-                    )
-                else:
-                    logger.info(f"마지막 배치({len(all_documents)-len(batch_texts)}~{len(all_documents)}) 저장")
-                    self.store.add_texts(
-                        texts=batch_texts,
-                        metadatas=batch_metadatas,
-                        persist_directory=str(self.vector_db),        # ✅ 수정
-                        collection_name=self.collection_name, 
-                    )
+                results = future.result()
             except Exception as e:
-                logger.error(f"마지막 배치 Embedding 실패: {e}")
+                logger.error(f"{collection_type} 콜렉션 검색 실패: {e}")
+                continue
 
-        if self.store:
-            logger.info(f"총 {len(all_documents)}개 문서를 벡터 DB에 저장 완료")
-        else:
-            logger.error("벡터 DB 생성 실패")
+            # 점수와 함께 결과 저장 (콜렉션 정보 포함)
+            for doc, score in results:
+                doc.metadata['search_score'] = score
+                doc.metadata['source_collection'] = collection_type
+                all_results.append((doc, score))
+            logger.info(f"{collection_type} 콜렉션에서 {len(results)}개 결과 검색")
 
-        return self.store
+        # 콜렉션별 결과를 합쳐 거리 기준 상위 k개
+        return heapq.nsmallest(k, all_results, key=lambda x: x[1])
 
-    # -------------------------
-    # Multi-Collection Search Methods
-    # -------------------------
-    def search_multi_collections(self, query: str, collection_types: List[str], k: int = 5) -> List[Document]:
+    def hybrid_search_multi_collections(self, query: str, collection_types: List[str], k: int = 5,
+                                        vector_weight: float = 1.0, keyword_weight: float = 1.0,
+                                        metadata_filter: Optional[MetadataFilter] = None) -> List[Tuple[Document, float]]:
         """
-        여러 콜렉션에서 검색하여 결과 통합
+        여러 콜렉션 하이브리드 검색 (벡터 + BM25 키워드, Reciprocal Rank Fusion)
+        - 질문은 한 번만 임베딩하고, 콜렉션별 벡터/키워드 검색을 모두 동시에 실행
+        - 콜렉션 × 검색 방식별 순위 목록을 청크 ID 기준으로 RRF 통합 (점수 정규화/내용 해시 불필요)
+        - vector_weight/keyword_weight: 순위 기여 weight / (RRF_K + rank)에 곱하는 배수 (둘 다 1.0이면 표준 RRF)
+        반환: (문서, RRF 점수) 상위 k개 (점수가 클수록 관련도 높음)
         """
-        all_results = []
-        
+        stores = self._available_stores(collection_types)
+        if not stores:
+            return []
+
+        depth = max(k * 3, 10)
+        query_vector = self.embedding.embed_query(query)
+        futures = {}
+        for collection_type, store in stores:
+            futures[self._search_executor.submit(
+                self._vector_search, collection_type, store, query_vector, depth, metadata_filter
+            )] = (collection_type, "vector")
+            futures[self._search_executor.submit(
+                self._keyword_hits, collection_type, query, depth, metadata_filter
+            )] = (collection_type, "keyword")
+
+        fused: Dict[Tuple[str, str], float] = {}
+        documents: Dict[Tuple[str, str], Document] = {}
+        for future in as_completed(futures):
+            collection_type, leg = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                logger.error(f"{collection_type} 콜렉션 {leg} 검색 실패: {e}")
+                continue
+
+            weight = vector_weight if leg == "vector" else keyword_weight
+            for rank, (item, _) in enumerate(results, start=1):
+                # 벡터 검색은 Document, 키워드 검색은 청크 ID를 돌려줌
+                chunk_id = item.id if leg == "vector" else item
+                if not chunk_id:
+                    continue
+                key = (collection_type, chunk_id)
+                fused[key] = fused.get(key, 0.0) + weight / (self.RRF_K + rank)
+                if leg == "vector":
+                    documents[key] = item
+
+        top = heapq.nlargest(k, fused.items(), key=lambda item: item[1])
+
+        # 키워드 검색에서만 나온 청크는 최종 k개에 대해서만 본문 조회
+        missing: Dict[str, List[str]] = {}
+        for (collection_type, chunk_id), _ in top:
+            if (collection_type, chunk_id) not in documents:
+                missing.setdefault(collection_type, []).append(chunk_id)
+        for collection_type, ids in missing.items():
+            for doc in self._get_documents_by_ids(self._search_store(collection_type), ids):
+                documents[(collection_type, doc.id)] = doc
+
+        results = []
+        for key, score in top:
+            doc = documents.get(key)
+            if doc is None:
+                continue
+            doc.metadata['search_score'] = score
+            doc.metadata['source_collection'] = key[0]
+            results.append((doc, score))
+        logger.info(f"하이브리드 검색 완료 (콜렉션 {[c for c, _ in stores]}, 후보 {len(fused)}개 → {len(results)}개)")
+        return results
+
+    def _available_stores(self, collection_types: List[str]) -> List[Tuple[str, Any]]:
+        stores = []
         for collection_type in collection_types:
             if collection_type not in self.stores or not self.stores[collection_type]:
                 logger.warning(f"{collection_type} 콜렉션이 초기화되지 않았습니다.")
                 continue
-                
-            try:
-                # 각 콜렉션에서 검색
-                results = self.stores[collection_type].similarity_search_with_score(query, k=k)
-                
-                # 점수와 함께 결과 저장 (콜렉션 정보 포함)
-                for doc, score in results:
-                    doc.metadata['search_score'] = score
-                    doc.metadata['source_collection'] = collection_type
-                    all_results.append((doc, score))
-                    
-                logger.info(f"{collection_type} 콜렉션에서 {len(results)}개 결과 검색")
-                
-            except Exception as e:
-                logger.error(f"{collection_type} 콜렉션 검색 실패: {e}")
-        
-        # 점수순 정렬 후 상위 k개 반환
-        all_results.sort(key=lambda x: x[1])  # 거리가 작을수록 유사도 높음
-        return [doc for doc, _ in all_results[:k]]
+            stores.append((collection_type, self._search_store(collection_type)))
+        return stores
+
+    def _search_store(self, collection_type: str):
+        """검색에 사용할 스토어 (numpy 백엔드가 준비되어 있으면 NumpyVectorStore, 아니면 Chroma)"""
+        if self.vector_backend == "numpy" and collection_type in self.numpy_stores:
+            return self.numpy_stores[collection_type]
+        return self.stores[collection_type]
+
+    def _keyword_hits(self, collection_type: str, query: str, k: int,
+                      metadata_filter: Optional[MetadataFilter] = None) -> List[Tuple[str, float]]:
+        """BM25 역색인 상위 k개 (청크 ID, 점수) - 본문 조회 없음"""
+        index = self.keyword_indexes.get(collection_type)
+        if index is None:
+            index = self._build_search_indexes(collection_type, self.stores[collection_type])
+        mask = self._filter_mask(collection_type, metadata_filter)
+        if mask is None:
+            return index.search(query, k=k)
+        return index.search(query, k=k, accept=self.metadata_indexes[collection_type].accepts(mask))
+
+    def _filter_mask(self, collection_type: str, metadata_filter: Optional[MetadataFilter]) -> Optional[int]:
+        """메타데이터 필터를 콜렉션 비트셋으로 변환 (필터가 없거나 색인이 없으면 None)"""
+        if not metadata_filter or collection_type not in self.metadata_indexes:
+            return None
+        return metadata_filter.mask_for(self.metadata_indexes[collection_type])
+
+    def _vector_search(self, collection_type: str, store, query_vector: List[float], k: int,
+                       metadata_filter: Optional[MetadataFilter] = None) -> List[Tuple[Document, float]]:
+        """
+        벡터 검색 + 메타데이터 비트맵 필터
+        - 통과하는 청크가 적으면 청크 ID 목록을 Chroma where 조건으로 넘겨 먼저 거른 뒤 검색
+        - 많으면 통과 비율만큼 더 가져온 뒤 비트 확인으로 거름
+        """
+        mask = self._filter_mask(collection_type, metadata_filter)
+        if mask is None:
+            return store.similarity_search_by_vector_with_relevance_scores(query_vector, k)
+
+        metadata_index = self.metadata_indexes[collection_type]
+        selected, total = metadata_index.count(mask), len(metadata_index)
+        if selected == 0:
+            return []
+        if selected == total:
+            return store.similarity_search_by_vector_with_relevance_scores(query_vector, k)
+        if selected <= self.FILTER_PREFILTER_LIMIT:
+            return store.similarity_search_by_vector_with_relevance_scores(
+                query_vector, k, filter={"chunk_id": {"$in": metadata_index.ids_in(mask)}}
+            )
+
+        fetch = min(total, k * total // selected + k)
+        accept = metadata_index.accepts(mask)
+        results = store.similarity_search_by_vector_with_relevance_scores(query_vector, fetch)
+        return [(doc, score) for doc, score in results if accept(doc.id)][:k]
 
     def get_collection_by_query_type(self, query: str, pet_records: dict = None) -> List[str]:
         """
@@ -472,412 +901,158 @@ class VectorStoreService:
             
         return collections_to_search
 
-    # -------------------------
-    # Load documents (md + json)
-    # -------------------------
-    def load_documents(self) -> List[Document]:
-        if not self.documents_path.exists():
-            logger.error(f"문서 경로가 존재하지 않습니다: {self.documents_path}")
-            return []
-
-        all_documents: List[Document] = []
-
-        md_files = list(self.documents_path.glob("**/*.md"))
-        json_files = list(self.documents_path.glob("**/*.json"))
-
-        logger.info(f"Markdown 파일 수: {len(md_files)}, JSON 파일 수: {len(json_files)}")
-
-        for md_file in md_files:
-            try:
-                docs = self.load_markdown(md_file)
-                all_documents.extend(docs)
-            except Exception as e:
-                logger.warning(f"Markdown 파일 처리 실패 ({md_file}): {e}")
-
-        for json_file in json_files:
-            try:
-                docs = self.load_json(json_file)
-                all_documents.extend(docs)
-            except Exception as e:
-                logger.warning(f"JSON 파일 처리 실패 ({json_file}): {e}")
-
-        logger.info(f"총 {len(all_documents)}개 문서 청크 로딩 완료")
-        return all_documents
-
-    # -------------------------
-    # Markdown loader
-    # -------------------------
-    def load_markdown(self, file_path: Path) -> List[Document]:
-        try:
-            text = file_path.read_text(encoding="utf-8")
-        except Exception as e:
-            logger.warning(f"Markdown 파일 읽기 실패 ({file_path}): {e}")
-            return []
-
-        meta = self.extract_document_metadata(text)
-        splitter = MarkdownHeaderTextSplitter([("#", "title"), ("##", "subtitle")])
-
-        try:
-            sections = splitter.split_text(text)
-        except Exception as e:
-            logger.warning(f"Markdown 분할 실패({file_path}), 전체를 하나로 처리: {e}")
-            sections = [text]
-
-        docs: List[Document] = []
-        for i, sec in enumerate(sections):
-            if isinstance(sec, Document):
-                content = sec.page_content
-                sec_meta = sec.metadata or {}
-            else:
-                content = str(sec)
-                sec_meta = {}
-
-            clean = self.remove_metadata_blocks(content)
-            if not clean.strip():
-                continue
-
-            metadata = {**meta, **sec_meta, "source_file": file_path.name, "file_path": str(file_path), "section_index": i}
-            metadata = self._sanitize_metadata(metadata)
-            docs.append(Document(page_content=clean, metadata=metadata))
-
-        return docs
-
-    # -------------------------
-    # JSON loader (robust)
-    # -------------------------
-    def load_json(self, file_path: Path) -> List[Document]:
-        try:
-            data = json.loads(file_path.read_text(encoding="utf-8"))
-        except Exception as e:
-            logger.warning(f"JSON 파일 읽기 실패 ({file_path}): {e}")
-            return []
-
-        docs: List[Document] = []
-
-        # If data is a list of items (common in your medication files)
-        if isinstance(data, list):
-            for idx, item in enumerate(data):
-                try:
-                    if isinstance(item, dict):
-                        # prefer 'text' if present and non-empty
-                        content = item.get("text") if isinstance(item.get("text"), str) and item.get("text").strip() else None
-                        if content is None:
-                            # fallback: serialize entire item
-                            content = json.dumps(item, ensure_ascii=False, indent=2)
-                        metadata = {
-                            "file_path": str(file_path),
-                            "data_type": "medication",
-                            "item_index": idx,
-                        }
-                        # merge item metadata if present
-                        if "metadata" in item and isinstance(item["metadata"], dict):
-                            metadata.update(item["metadata"])
-                        if "id" in item:
-                            metadata["document_id"] = item["id"]
-
-                    else:
-                        # non-dict item -> stringify
-                        content = json.dumps(item, ensure_ascii=False)
-                        metadata = {"file_path": str(file_path), "data_type": "medication", "item_index": idx}
-
-                    # safe chunking (avoids RecursiveJsonSplitter crashes)
-                    chunks = self._safe_chunk_text(content, max_chunk_size=1000)
-                    for c_i, chunk in enumerate(chunks):
-                        meta_copy = dict(metadata)
-                        meta_copy.update({"chunk_index": c_i, "total_chunks": len(chunks)})
-                        docs.append(Document(page_content=chunk, metadata=self._sanitize_metadata(meta_copy)))
-
-                except Exception as item_e:
-                    logger.warning(f"JSON item 처리 실패 ({file_path}, index={idx}): {item_e}")
-                    continue
-
-        elif isinstance(data, dict):
-            # single JSON object: serialize and chunk
-            content = json.dumps(data, ensure_ascii=False, indent=2)
-            chunks = self._safe_chunk_text(content, max_chunk_size=1000)
-            for c_i, chunk in enumerate(chunks):
-                meta = {"file_path": str(file_path), "data_type": "medication", "chunk_index": c_i, "total_chunks": len(chunks)}
-                docs.append(Document(page_content=chunk, metadata=self._sanitize_metadata(meta)))
-        else:
-            # fallback: stringify whole file
-            content = str(data)
-            chunks = self._safe_chunk_text(content, max_chunk_size=1000)
-            for c_i, chunk in enumerate(chunks):
-                meta = {"file_path": str(file_path), "data_type": "medication", "chunk_index": c_i, "total_chunks": len(chunks)}
-                docs.append(Document(page_content=chunk, metadata=self._sanitize_metadata(meta)))
-
-        return docs
-
-    # -------------------------
-    # Utilities
-    # -------------------------
-    def _safe_chunk_text(self, text: str, max_chunk_size: int = 1000) -> List[str]:
-        """
-        Split text into chunks of <= max_chunk_size by sentence boundaries (best-effort).
-        """
-        if not text:
-            return []
-
-        text = text.strip()
-        if len(text) <= max_chunk_size:
-            return [text]
-
-        # Split into sentences (preserve punctuation)
-        sentences = re.split(r'(?<=[\.\?\!\n])\s+', text)
-        chunks = []
-        current = ""
-        for sent in sentences:
-            if not sent:
-                continue
-            if len(current) + len(sent) + 1 <= max_chunk_size:
-                current += (sent if current == "" else " " + sent)
-            else:
-                if current:
-                    chunks.append(current.strip())
-                # if single sentence itself too long, break by characters
-                if len(sent) > max_chunk_size:
-                    for i in range(0, len(sent), max_chunk_size):
-                        part = sent[i:i + max_chunk_size].strip()
-                        if part:
-                            chunks.append(part)
-                    current = ""
-                else:
-                    current = sent
-        if current:
-            chunks.append(current.strip())
-        return chunks
-
-    def extract_document_metadata(self, content: str) -> Dict[str, Any]:
-        metadata: Dict[str, Any] = {}
-        yaml_pattern = r"^---\s*\nmetadata:\s*\n(.*?)\n---"
-        match = re.search(yaml_pattern, content, flags=re.MULTILINE | re.DOTALL)
-        if not match:
-            return metadata
-
-        yaml_content = match.group(1)
-        for line in yaml_content.splitlines():
-            line = line.strip()
-            if ":" in line and not line.startswith("-"):
-                key, val = line.split(":", 1)
-                key = key.strip()
-                value = val.strip().strip('"\'')
-                if key == "categories":
-                    metadata[key] = self.parse_yaml_list(value)
-                else:
-                    metadata[key] = value
-        return metadata
-
-    def parse_yaml_list(self, value: Any) -> List[str]:
-        if isinstance(value, list):
-            return [str(v).strip().strip('"\'') for v in value]
-        if isinstance(value, str) and value.startswith("[") and value.endswith("]"):
-            items = value[1:-1].split(",")
-            return [item.strip().strip('"\'') for item in items]
-        return [str(value).strip().strip('"\'')]
-
-    def remove_metadata_blocks(self, content: str) -> str:
-        yaml_pattern = r"^---\s*\nmetadata:\s*\n.*?\n---\s*\n"
-        cleaned = re.sub(yaml_pattern, "", content, flags=re.MULTILINE | re.DOTALL)
-        cleaned = re.sub(r"\n\s*\n\s*\n", "\n\n", cleaned)
-        return cleaned.strip()
-
-    def _sanitize_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Convert metadata values to primitives (str/int/float/bool). Lists/dicts -> JSON string.
-        """
-        safe: Dict[str, Any] = {}
-        for k, v in (metadata or {}).items():
-            if isinstance(v, (str, int, float, bool)) or v is None:
-                safe[k] = v
-            else:
-                try:
-                    safe[k] = json.dumps(v, ensure_ascii=False) if not isinstance(v, (str, int, float, bool)) else v
-                except Exception:
-                    safe[k] = str(v)
-        return safe
-
     # -------------------------
     # Keyword Search Methods
     # -------------------------
-    def keyword_search(self, query: str, k: int = 5, collection_type: str = 'general_guides') -> List[Tuple[Document, float]]:
-        """키워드 기반 검색 (TF-IDF 스코어링)"""
+    def keyword_search(self, query: str, k: int = 5, collection_type: str = 'general_guides',
+                       metadata_filter: Optional[MetadataFilter] = None) -> List[Tuple[Document, float]]:
+        """키워드 기반 검색 (BM25 역색인)"""
         if collection_type not in self.stores or not self.stores[collection_type]:
             logger.warning(f"{collection_type} 콜렉션이 초기화되지 않았습니다.")
             return []
         
-        store = self.stores[collection_type]
+        store = self._search_store(collection_type)
         
         try:
-            # 해당 콜렉션의 모든 문서 가져오기
-            all_docs = self._get_all_documents_from_store(store)
-            if not all_docs:
-                return []
-            
-            # 키워드 전처리
-            query_keywords = self._preprocess_keywords(query)
-            if not query_keywords:
+            hits = self._keyword_hits(collection_type, query, k, metadata_filter)
+            if not hits:
                 return []
-            
-            # TF-IDF 계산
-            scored_docs = []
-            for doc in all_docs:
-                score = self._calculate_keyword_score(doc.page_content, query_keywords)
-                if score > 0:
-                    scored_docs.append((doc, score))
-            
-            # 점수순 정렬 후 상위 k개 반환
-            scored_docs.sort(key=lambda x: x[1], reverse=True)
-            return scored_docs[:k]
+
+            # 상위 k개 청크만 콜렉션에서 가져옴
+            documents = self._get_documents_by_ids(store, [chunk_id for chunk_id, _ in hits])
+            by_id = {doc.id: doc for doc in documents}
+            return [(by_id[chunk_id], score) for chunk_id, score in hits if chunk_id in by_id]
             
         except Exception as e:
             logger.error(f"키워드 검색 중 오류 발생: {e}")
             return []
 
-    def _get_all_documents(self) -> List[Document]:
-        """벡터 스토어에서 모든 문서 가져오기 (하위 호환성)"""
-        # 첫 번째 사용 가능한 스토어에서 문서 가져오기
-        for store in self.stores.values():
-            if store:
-                return self._get_all_documents_from_store(store)
-        return []
-
-    def _get_all_documents_from_store(self, store) -> List[Document]:
-        """특정 스토어에서 모든 문서 가져오기"""
+    def _keyword_snapshot_path(self, collection_type: str) -> Path:
+        return self.vector_db / "keyword_index" / f"{self.collections[collection_type]}.kwi"
+
+    def _metadata_snapshot_path(self, collection_type: str) -> Path:
+        return self.vector_db / "keyword_index" / f"{self.collections[collection_type]}.meta.json"
+
+    def _numpy_snapshot_path(self, collection_type: str) -> Path:
+        return self.vector_db / "vector_index" / self.collections[collection_type]
+
+    def _search_indexes_ready(self, collection_type: str, count: int) -> bool:
+        """검색 색인이 모두 있고 콜렉션 문서 수와 일치하는지"""
+        index = self.keyword_indexes.get(collection_type)
+        if index is None or len(index) != count or collection_type not in self.metadata_indexes:
+            return False
+        if self.vector_backend == "numpy":
+            numpy_store = self.numpy_stores.get(collection_type)
+            return numpy_store is not None and len(numpy_store) == count
+        return True
+
+    def _load_index_snapshots(self, collection_type: str) -> bool:
+        """매니페스트 digest가 일치하는 디스크 스냅샷이 있으면 열기 (키워드 색인/벡터 행렬은 mmap, 재생성 없음)"""
+        started = time.time()
+        digest = self._manifest_digest(collection_type)
+        index = BM25Index.load(self._keyword_snapshot_path(collection_type), digest)
+        metadata_index = MetadataBitmapIndex.load(self._metadata_snapshot_path(collection_type), digest)
+        numpy_store = None
+        if self.vector_backend == "numpy":
+            numpy_store = NumpyVectorStore.load(
+                self._numpy_snapshot_path(collection_type), digest, self.embedding, mmap=Config.NUMPY_INDEX_MMAP,
+                quantization=Config.VECTOR_QUANTIZATION, rescore_factor=Config.VECTOR_RESCORE_FACTOR,
+            )
+            if numpy_store is None:
+                return False
+        if index is None or metadata_index is None:
+            return False
+        self.keyword_indexes[collection_type] = index
+        self.metadata_indexes[collection_type] = metadata_index
+        if numpy_store is not None:
+            self.numpy_stores[collection_type] = numpy_store
+        logger.info(f"{collection_type} 검색 색인 스냅샷 로드 (문서 {len(index)}개, {(time.time() - started) * 1000:.1f}ms)")
+        return True
+
+    def _save_index_snapshots(self, collection_type: str):
+        index = self.keyword_indexes.get(collection_type)
+        metadata_index = self.metadata_indexes.get(collection_type)
+        if index is None or metadata_index is None:
+            return
         try:
-            # Chroma에서 모든 문서 ID 가져오기
-            collection = store._collection
-            all_data = collection.get()
-            
-            documents = []
-            if all_data and 'documents' in all_data and 'metadatas' in all_data:
-                for i, (content, metadata) in enumerate(zip(all_data['documents'], all_data['metadatas'])):
-                    doc = Document(page_content=content, metadata=metadata or {})
-                    documents.append(doc)
-            
-            return documents
-            
+            digest = self._manifest_digest(collection_type)
+            index.save(self._keyword_snapshot_path(collection_type), digest)
+            metadata_index.save(self._metadata_snapshot_path(collection_type), digest)
+            if collection_type in self.numpy_stores:
+                self.numpy_stores[collection_type].save(self._numpy_snapshot_path(collection_type), digest)
         except Exception as e:
-            logger.error(f"모든 문서 가져오기 실패: {e}")
+            logger.warning(f"{collection_type} 검색 색인 스냅샷 저장 실패: {e}")
+
+    def _drop_search_indexes(self, collection_type: str):
+        self.keyword_indexes.pop(collection_type, None)
+        self.metadata_indexes.pop(collection_type, None)
+        self.numpy_stores.pop(collection_type, None)
+
+    def _build_search_indexes(self, collection_type: str, store: Chroma) -> BM25Index:
+        """
+        콜렉션 전체를 한 번 훑어 BM25 역색인 + 메타데이터 비트맵 색인 생성 (디스크 스냅샷도 갱신)
+        numpy 백엔드면 저장된 임베딩으로 정규화 행렬도 함께 만든다 (임베딩 API 호출 없음)
+        """
+        started = time.time()
+        index = BM25Index()
+        metadata_index = MetadataBitmapIndex()
+        numpy_store = None
+        if self.vector_backend == "numpy":
+            numpy_store = NumpyVectorStore(
+                self.embedding, quantization=Config.VECTOR_QUANTIZATION, rescore_factor=Config.VECTOR_RESCORE_FACTOR
+            )
+        include = ["documents", "metadatas"] + (["embeddings"] if numpy_store is not None else [])
+        offset, page_size = 0, 1000
+        while True:
+            data = store._collection.get(include=include, limit=page_size, offset=offset)
+            ids = data.get("ids") or []
+            if not ids:
+                break
+            texts = data.get("documents") or []
+            metadatas = data.get("metadatas") or []
+            index.add(ids, texts)
+            metadata_index.add(ids, texts, metadatas)
+            if numpy_store is not None:
+                numpy_store.upsert(ids, data["embeddings"], texts, metadatas)
+            offset += len(ids)
+
+        self.keyword_indexes[collection_type] = index
+        self.metadata_indexes[collection_type] = metadata_index
+        if numpy_store is not None:
+            self.numpy_stores[collection_type] = numpy_store
+        logger.info(
+            f"{collection_type} 검색 색인 생성 완료 (문서 {len(index)}개, 용어 {index.term_count}개, "
+            f"속성 {len(metadata_index.bitmaps)}개, {time.time() - started:.2f}초)"
+        )
+        self._save_index_snapshots(collection_type)
+        return index
+
+    def _get_documents_by_ids(self, store, ids: List[str]) -> List[Document]:
+        """청크 ID 목록으로 문서 조회 (요청한 순서 유지)"""
+        if not ids:
             return []
+        if isinstance(store, NumpyVectorStore):
+            return store.get_by_ids(ids)
+        data = store._collection.get(ids=ids, include=["documents", "metadatas"])
+        by_id = {
+            chunk_id: Document(id=chunk_id, page_content=content or "", metadata=metadata or {})
+            for chunk_id, content, metadata in zip(data.get("ids") or [], data.get("documents") or [], data.get("metadatas") or [])
+        }
+        return [by_id[chunk_id] for chunk_id in ids if chunk_id in by_id]
 
     def _preprocess_keywords(self, query: str) -> List[str]:
-        """키워드 전처리 (한국어/영어 지원)"""
-        # 소문자 변환 및 특수문자 제거
-        query = re.sub(r'[^\w\s가-힣]', ' ', query.lower())
-        
-        # 단어 분리 및 불용어 제거
-        stop_words = {'은', '는', '이', '가', '을', '를', '에', '의', '와', '과', '도', '로', '으로', 
-                     'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with'}
-        
-        keywords = [word.strip() for word in query.split() if len(word.strip()) > 1 and word.strip() not in stop_words]
-        return keywords
-
-    def _calculate_keyword_score(self, content: str, keywords: List[str]) -> float:
-        """TF-IDF 기반 키워드 스코어 계산"""
-        if not content or not keywords:
-            return 0.0
-        
-        content_lower = content.lower()
-        score = 0.0
-        
-        for keyword in keywords:
-            # 단순 TF 계산 (빈도)
-            tf = content_lower.count(keyword.lower())
-            if tf > 0:
-                # 키워드 길이에 따른 가중치 (긴 키워드에 더 높은 점수)
-                weight = len(keyword) / 10.0 + 1.0
-                score += tf * weight
-        
-        return score
+        """키워드 전처리 (한국어/영어 지원, 역색인과 같은 토크나이저 사용)"""
+        return get_keyword_tokenizer()(query)
 
     # -------------------------
     # Hybrid Search Methods
     # -------------------------
-    def hybrid_search(self, query: str, k: int = 5, vector_weight: float = 0.5, keyword_weight: float = 0.5, collection_type: str = 'general_guides') -> List[Document]:
-        """하이브리드 검색 (벡터 + 키워드) - 단일 콜렉션"""
-        if collection_type not in self.stores or not self.stores[collection_type]:
-            logger.warning(f"{collection_type} 콜렉션이 초기화되지 않았습니다.")
-            return []
-            
-        store = self.stores[collection_type]
-        
-        try:
-            # 벡터 검색 결과
-            vector_results = []
-            try:
-                vector_docs = store.similarity_search_with_score(query, k=k*2)
-                # 점수 정규화 (유사도를 0-1 범위로)
-                if vector_docs:
-                    max_score = max(score for _, score in vector_docs)
-                    min_score = min(score for _, score in vector_docs)
-                    score_range = max_score - min_score if max_score > min_score else 1
-                    
-                    for doc, score in vector_docs:
-                        # 거리를 유사도로 변환 (거리가 작을수록 유사도가 높음)
-                        normalized_score = 1 - ((score - min_score) / score_range)
-                        vector_results.append((doc, normalized_score))
-            except Exception as e:
-                logger.warning(f"벡터 검색 실패: {e}")
-            
-            # 키워드 검색 결과
-            keyword_results = self.keyword_search(query, k=k*2, collection_type=collection_type)
-            
-            # 키워드 검색 점수 정규화
-            if keyword_results:
-                max_kw_score = max(score for _, score in keyword_results)
-                min_kw_score = min(score for _, score in keyword_results)
-                kw_score_range = max_kw_score - min_kw_score if max_kw_score > min_kw_score else 1
-                
-                normalized_kw_results = []
-                for doc, score in keyword_results:
-                    normalized_score = (score - min_kw_score) / kw_score_range if kw_score_range > 0 else 0
-                    normalized_kw_results.append((doc, normalized_score))
-                keyword_results = normalized_kw_results
-            
-            # 문서별 점수 통합
-            doc_scores = {}
-            
-            # 벡터 검색 점수 추가
-            for doc, score in vector_results:
-                doc_key = self._get_doc_key(doc)
-                doc_scores[doc_key] = doc_scores.get(doc_key, {'doc': doc, 'vector_score': 0, 'keyword_score': 0})
-                doc_scores[doc_key]['vector_score'] = score
-            
-            # 키워드 검색 점수 추가
-            for doc, score in keyword_results:
-                doc_key = self._get_doc_key(doc)
-                if doc_key not in doc_scores:
-                    doc_scores[doc_key] = {'doc': doc, 'vector_score': 0, 'keyword_score': 0}
-                doc_scores[doc_key]['keyword_score'] = score
-            
-            # 최종 점수 계산 및 정렬
-            final_results = []
-            for doc_key, data in doc_scores.items():
-                final_score = (data['vector_score'] * vector_weight + 
-                             data['keyword_score'] * keyword_weight)
-                final_results.append((data['doc'], final_score))
-            
-            # 점수순 정렬
-            final_results.sort(key=lambda x: x[1], reverse=True)
-            
-            # 상위 k개 문서만 반환
-            return [doc for doc, _ in final_results[:k]]
-            
-        except Exception as e:
-            logger.error(f"하이브리드 검색 중 오류 발생: {e}")
-            # 실패 시 벡터 검색만 사용
-            try:
-                if store:
-                    return store.similarity_search(query, k=k)
-            except:
-                pass
-            return []
-
-    def _get_doc_key(self, doc: Document) -> str:
-        """문서의 고유 키 생성"""
-        content_hash = hashlib.md5(doc.page_content.encode('utf-8')).hexdigest()
-        metadata_str = json.dumps(doc.metadata, sort_keys=True) if doc.metadata else ""
-        metadata_hash = hashlib.md5(metadata_str.encode('utf-8')).hexdigest()
-        return f"{content_hash}_{metadata_hash}"
-
-    # 캐시 기능은 CachedOpenAIEmbeddings 클래스로 이동됨
+    def hybrid_search(self, query: str, k: int = 5, vector_weight: float = 1.0, keyword_weight: float = 1.0, collection_type: str = 'general_guides') -> List[Document]:
+        """
+        하이브리드 검색 (벡터 + 키워드) - 단일 콜렉션 (하위 호환성)
+        vector_weight/keyword_weight는 점수 선형 결합 비율이 아니라 각 순위 목록의 RRF 가중치 (기본 1.0 = 동일 비중)
+        """
+        results = self.hybrid_search_multi_collections(
+            query, [collection_type], k=k, vector_weight=vector_weight, keyword_weight=keyword_weight
+        )
+        return [doc for doc, _ in results]
@@ -0,0 +1,254 @@
+"""
+오프라인 검색 벤치마크 (storage/documents 기준)
+
+임베딩 API 대신 결정적인 로컬 해싱 임베딩(EMBEDDING_PROVIDER=local)으로 임시 디렉토리에 색인을 만든 뒤,
+queries.json 질의로 vector / keyword / hybrid 검색의 recall@k, MRR, 지연시간(p50/p95)과
+색인 생성 시간을 측정한다. 네트워크 없이 실행된다.
+
+사용법 (back 디렉토리에서):
+    python -m benchmarks.retrieval_benchmark
+    python -m benchmarks.retrieval_benchmark --k 5 --backends chroma,numpy,numpy-int8 --dim 256 --json result.json
+
+- 같은 질의 세트/차원이면 결과가 매번 같으므로 청킹, 하이브리드 가중치, k 변경 전후를 비교할 수 있다.
+- overlap@k 는 numpy(정확 검색) 벡터 결과와 겹치는 비율 (chroma HNSW, int8 양자화의 근사 손실 확인용)
+"""
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+BACK_DIR = Path(__file__).resolve().parents[1]
+for import_path in (BACK_DIR, BACK_DIR.parent):
+    if str(import_path) not in sys.path:
+        sys.path.insert(0, str(import_path))
+
+from back.config import Config
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERIES = Path(__file__).with_name("queries.json")
+DEFAULT_DOCUMENTS = BACK_DIR / "storage" / "documents"
+COLLECTION_TYPES = ["general_guides", "medications"]
+MODES = ("vector", "keyword", "hybrid")
+
+# 벡터 백엔드 설정 (이름 → VECTOR_BACKEND, VECTOR_QUANTIZATION)
+BACKENDS = {
+    "chroma": ("chroma", "none"),
+    "numpy": ("numpy", "none"),
+    "numpy-int8": ("numpy", "int8"),
+}
+
+
+# -------------------------
+# Metrics
+# -------------------------
+def hit_keys(metadata: Dict[str, Any], documents_path: Path) -> List[str]:
+    """검색 결과 청크가 만족시키는 정답 키 (파일 상대 경로, 의약품은 '파일#document_id'도, 병합된 제품 포함)"""
+    file_path = metadata.get("file_path")
+    if not file_path:
+        return []
+    try:
+        source = Path(file_path).resolve().relative_to(documents_path.resolve()).as_posix()
+    except ValueError:
+        source = Path(file_path).name
+    keys = [source]
+    if metadata.get("document_id"):
+        keys.append(f"{source}#{metadata['document_id']}")
+    # 근사 중복으로 병합된 제품은 대표 청크가 대신 찾아준 것으로 인정
+    for member in json.loads(metadata.get("duplicate_members") or "[]"):
+        keys.append(f"{source}#{member['document_id']}")
+    return keys
+
+
+def score_query(results: List[List[str]], relevant: List[str], k: int) -> Tuple[float, float]:
+    """(recall@k, reciprocal rank) — results는 순위별 정답 키 목록"""
+    relevant_set = set(relevant)
+    found = set()
+    reciprocal_rank = 0.0
+    for rank, keys in enumerate(results[:k], start=1):
+        matched = relevant_set.intersection(keys)
+        if matched and not reciprocal_rank:
+            reciprocal_rank = 1.0 / rank
+        found |= matched
+    return len(found) / len(relevant_set), reciprocal_rank
+
+
+def percentile(samples: List[float], q: float) -> float:
+    return float(np.percentile(samples, q)) if samples else 0.0
+
+
+# -------------------------
+# Runner
+# -------------------------
+class RetrievalBenchmark:
+    def __init__(self, documents_path: Path, queries_path: Path, k: int = 5, dim: int = 256, repeat: int = 3):
+        self.documents_path = Path(documents_path)
+        self.queries = json.loads(Path(queries_path).read_text(encoding="utf-8"))["queries"]
+        self.k = k
+        self.dim = dim
+        self.repeat = max(1, repeat)
+        self.work_dir = Path(tempfile.mkdtemp(prefix="retrieval-benchmark-"))
+        self.services = []
+
+    def close(self):
+        # 임시 디렉토리를 지우기 전에 서비스를 닫아 임베딩 캐시 매핑과 종료 시 flush가 남지 않게 함
+        for service in self.services:
+            service.close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def make_service(self, backend: str):
+        """백엔드 설정을 적용한 VectorStoreService (임베딩은 로컬 해싱, 벡터 DB는 임시 디렉토리)"""
+        Config.VECTOR_BACKEND, Config.VECTOR_QUANTIZATION = BACKENDS[backend]
+        Config.EMBEDDING_PROVIDER = "local"
+        Config.EMBEDDING_DIMENSIONS = self.dim
+        Config.DOCUMENTS_PATH = str(self.documents_path)
+        Config.VECTOR_DB = str(self.work_dir / "vector_db")
+
+        from app.services.dailycare.vectorstore_service import VectorStoreService
+        service = VectorStoreService()
+        self.services.append(service)
+        return service
+
+    def run(self, backends: List[str]) -> Dict[str, Any]:
+        report: Dict[str, Any] = {
+            "k": self.k, "dim": self.dim, "queries": len(self.queries), "repeat": self.repeat,
+            "builds": [], "results": [],
+        }
+        reference: Dict[str, List[str]] = {}   # numpy 벡터 검색 결과 (overlap 기준)
+        vector_ids: Dict[str, Dict[str, List[str]]] = {}
+
+        for position, backend in enumerate(backends):
+            service = self.make_service(backend)
+            started = time.perf_counter()
+            service.initialize_vector_db()
+            build = {
+                "backend": backend,
+                "seconds": round(time.perf_counter() - started, 3),
+                "cold": position == 0,
+                "chunks": {ct: store._collection.count() for ct, store in service.stores.items() if store},
+            }
+            if service.numpy_stores:
+                build["memory"] = {ct: store.memory_usage() for ct, store in service.numpy_stores.items()}
+            report["builds"].append(build)
+
+            # 키워드 검색은 벡터 백엔드와 무관하므로 한 번만 측정
+            modes = [mode for mode in MODES if mode != "keyword" or position == 0]
+            for mode in modes:
+                result, ids = self.measure(service, mode)
+                result["backend"] = backend if mode != "keyword" else "-"
+                report["results"].append(result)
+                if mode == "vector":
+                    vector_ids[backend] = ids
+                    if backend == "numpy":
+                        reference = ids
+
+        if reference:
+            for result in report["results"]:
+                if result["mode"] == "vector" and result["backend"] in vector_ids:
+                    ids = vector_ids[result["backend"]]
+                    overlaps = [
+                        len(set(ids[query_id]) & set(reference[query_id])) / max(1, len(reference[query_id]))
+                        for query_id in reference
+                    ]
+                    result["overlap"] = round(float(np.mean(overlaps)), 4)
+        return report
+
+    def search(self, service, mode: str, query: str):
+        if mode == "vector":
+            return service.search_multi_collections_with_score(query, COLLECTION_TYPES, k=self.k)
+        if mode == "hybrid":
+            return service.hybrid_search_multi_collections(query, COLLECTION_TYPES, k=self.k)
+        # 콜렉션별 BM25 결과를 점수 기준으로 통합
+        hits = []
+        for collection_type in COLLECTION_TYPES:
+            hits.extend(service.keyword_search(query, k=self.k, collection_type=collection_type))
+        return sorted(hits, key=lambda item: item[1], reverse=True)[:self.k]
+
+    def measure(self, service, mode: str) -> Tuple[Dict[str, Any], Dict[str, List[str]]]:
+        recalls, reciprocal_ranks, latencies = [], [], []
+        ids: Dict[str, List[str]] = {}
+        for item in self.queries:
+            self.search(service, mode, item["query"])  # 워밍업 (질의 임베딩 캐시 등)
+            for _ in range(self.repeat):
+                started = time.perf_counter()
+                results = self.search(service, mode, item["query"])
+                latencies.append((time.perf_counter() - started) * 1000)
+            recall, reciprocal_rank = score_query(
+                [hit_keys(doc.metadata, self.documents_path) for doc, _ in results], item["relevant"], self.k
+            )
+            recalls.append(recall)
+            reciprocal_ranks.append(reciprocal_rank)
+            ids[item["id"]] = [doc.id for doc, _ in results]
+
+        return {
+            "mode": mode,
+            f"recall@{self.k}": round(float(np.mean(recalls)), 4),
+            "mrr": round(float(np.mean(reciprocal_ranks)), 4),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+        }, ids
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    k = report["k"]
+    lines = [f"질의 {report['queries']}개, k={k}, 임베딩 차원 {report['dim']}, 반복 {report['repeat']}회", ""]
+    lines.append(f"{'backend':<12}{'초기화(s)':>10}  청크 수 / 검색 행렬 메모리")
+    for build in report["builds"]:
+        memory = ""
+        if "memory" in build:
+            resident = sum(m["matrix_bytes"] + m["int8_bytes"] for m in build["memory"].values())
+            mapped = sum(m["mmap_matrix_bytes"] for m in build["memory"].values())
+            memory = f" / 상주 {resident / 1024:.0f}KB, mmap {mapped / 1024:.0f}KB"
+        label = " (cold)" if build["cold"] else ""
+        lines.append(f"{build['backend']:<12}{build['seconds']:>10.2f}  {build['chunks']}{memory}{label}")
+    lines.append("")
+    lines.append(f"{'backend':<12}{'mode':<9}{'recall@' + str(k):>10}{'MRR':>8}{'p50(ms)':>10}{'p95(ms)':>10}{'overlap':>9}")
+    for result in report["results"]:
+        overlap = f"{result['overlap']:.3f}" if "overlap" in result else "-"
+        lines.append(
+            f"{result['backend']:<12}{result['mode']:<9}{result[f'recall@{k}']:>10.3f}{result['mrr']:>8.3f}"
+            f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{overlap:>9}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="오프라인 검색 벤치마크 (recall@k, MRR, 지연시간, 색인 생성 시간)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=256, help="로컬 해싱 임베딩 차원")
+    parser.add_argument("--repeat", type=int, default=3, help="질의별 지연시간 측정 반복 횟수")
+    parser.add_argument("--backends", default="chroma,numpy,numpy-int8",
+                        help=f"쉼표로 구분한 벡터 백엔드 ({', '.join(BACKENDS)})")
+    parser.add_argument("--documents", type=Path, default=DEFAULT_DOCUMENTS)
+    parser.add_argument("--queries", type=Path, default=DEFAULT_QUERIES)
+    parser.add_argument("--json", type=Path, help="결과를 JSON으로 저장할 경로")
+    parser.add_argument("--verbose", action="store_true", help="서비스 로그 출력")
+    args = parser.parse_args(argv)
+
+    backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    unknown = [name for name in backends if name not in BACKENDS]
+    if unknown:
+        parser.error(f"알 수 없는 백엔드: {unknown}")
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+
+    benchmark = RetrievalBenchmark(args.documents, args.queries, k=args.k, dim=args.dim, repeat=args.repeat)
+    try:
+        report = benchmark.run(backends)
+    finally:
+        benchmark.close()
+
+    print(format_report(report))
+    if args.json:
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+벡터 색인 artifact 빌드 CLI
+
+문서(DOCUMENTS_PATH)를 청크 분할/임베딩해 Chroma + 임베딩 캐시 + 키워드/메타데이터 색인 + 매니페스트를
+버전 디렉토리 하나로 만들고, 검증이 끝나면 CURRENT를 새 버전으로 교체한다.
+앱은 VECTOR_INDEX_ARTIFACT=<출력 루트> 로 실행하면 부팅 시 임베딩 호출 없이 CURRENT 버전을 열기만 한다.
+
+사용법 (back 디렉토리에서):
+    python build_index.py --output /srv/vector-index
+    python build_index.py --output /srv/vector-index --documents storage/documents --keep 3
+    python build_index.py --output /srv/vector-index --verify
+
+- 기본적으로 현재 활성 버전을 복사해 바뀐 파일만 다시 임베딩한다 (--clean 이면 처음부터).
+- 임베딩에 실패한 청크가 있으면 새 버전을 활성화하지 않고 실패 코드로 종료한다.
+"""
+import sys
+import logging
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+BACK_DIR = Path(__file__).resolve().parent
+for import_path in (BACK_DIR, BACK_DIR.parent):
+    if str(import_path) not in sys.path:
+        sys.path.insert(0, str(import_path))
+
+from back.config import Config
+
+
+logger = logging.getLogger("build_index")
+
+
+def build(output: Path, documents: Path, clean: bool = False, activate: bool = True, keep: int = 3) -> Optional[str]:
+    """새 버전을 빌드해 버전 이름 반환 (실패하면 None, 작업 디렉토리는 삭제)"""
+    from app.services.dailycare.index_artifact import build_version
+    return build_version(output, documents, clean=clean, activate=activate, keep=keep)
+
+
+def verify(output: Path) -> bool:
+    """활성 버전을 앱과 같은 방식으로 열어 검증"""
+    from app.services.dailycare.index_artifact import open_index_artifact
+    try:
+        service = open_index_artifact(output)
+    except Exception as e:
+        logger.error(f"검증 실패: {e}")
+        return False
+    service.close()
+    return True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="벡터 색인 artifact 빌드 (Chroma + 임베딩 캐시 + 키워드 색인 + 매니페스트)")
+    parser.add_argument("--output", type=Path, default=Config.VECTOR_INDEX_ARTIFACT or None,
+                        help="artifact 루트 (기본: VECTOR_INDEX_ARTIFACT)")
+    parser.add_argument("--documents", type=Path, default=Config.DOCUMENTS_PATH or None,
+                        help="문서 경로 (기본: DOCUMENTS_PATH)")
+    parser.add_argument("--clean", action="store_true", help="이전 버전을 재사용하지 않고 처음부터 빌드")
+    parser.add_argument("--no-activate", action="store_true", help="빌드만 하고 CURRENT는 바꾸지 않음")
+    parser.add_argument("--keep", type=int, default=Config.VECTOR_INDEX_KEEP_VERSIONS,
+                        help="남겨둘 버전 수 (활성 버전 포함, 기본: VECTOR_INDEX_KEEP_VERSIONS)")
+    parser.add_argument("--verify", action="store_true", help="빌드하지 않고 활성 버전만 검증")
+    parser.add_argument("--quiet", action="store_true", help="경고 이상만 출력")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.output is None:
+        parser.error("--output 또는 VECTOR_INDEX_ARTIFACT가 필요합니다.")
+    if Config.EMBEDDING_PROVIDER.lower() == "openai" and not Config.OPENAI_API_KEY:
+        parser.error("EMBEDDING_PROVIDER=openai에는 OPENAI_API_KEY가 필요합니다 (오프라인 빌드는 EMBEDDING_PROVIDER=local).")
+    if args.verify:
+        return 0 if verify(args.output) else 1
+
+    if args.documents is None or not args.documents.exists():
+        parser.error(f"문서 경로가 없습니다: {args.documents}")
+
+    version = build(args.output, args.documents, clean=args.clean, activate=not args.no_activate, keep=args.keep)
+    if version is None:
+        return 1
+    print(version)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
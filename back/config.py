@@ -18,6 +18,79 @@ class Config:
     # 벡터DB 설정
     VECTOR_DB = os.getenv('VECTOR_DB', './vector_db')
     DOCUMENTS_PATH = os.getenv('DOCUMENTS_PATH')
+    # build_index.py로 미리 빌드한 색인 artifact 루트 (설정하면 부팅 시 문서 동기화/임베딩 없이 검증 후 열기만 함)
+    VECTOR_INDEX_ARTIFACT = os.getenv('VECTOR_INDEX_ARTIFACT', '')
+
+    # 벡터 스토어 백그라운드 초기화: 챗봇 요청이 준비를 기다리는 최대 시간(초, 넘으면 기록 기반 답변), 실패 후 재시도 간격(초)
+    VECTOR_WARMUP_WAIT_SECONDS = float(os.getenv('VECTOR_WARMUP_WAIT_SECONDS', '3'))
+    VECTOR_WARMUP_RETRY_SECONDS = float(os.getenv('VECTOR_WARMUP_RETRY_SECONDS', '60'))
+
+    # 색인 버전 무중단 교체: CURRENT 변경 확인 주기(초, 0이면 확인 안 함), 교체된 서비스를 닫기 전 유예 시간(초), 남겨둘 버전 수
+    VECTOR_INDEX_POLL_SECONDS = float(os.getenv('VECTOR_INDEX_POLL_SECONDS', '30'))
+    VECTOR_SWAP_GRACE_SECONDS = float(os.getenv('VECTOR_SWAP_GRACE_SECONDS', '30'))
+    VECTOR_INDEX_KEEP_VERSIONS = int(os.getenv('VECTOR_INDEX_KEEP_VERSIONS', '3'))
+
+    # 문서 감시기 (DOCUMENTS_PATH 변경을 벡터/키워드/메타데이터 색인에 자동 반영)
+    # backend: auto(inotify, 안 되면 polling) | inotify | poll, 변경을 모으는 시간(초), polling 주기(초)
+    DOCUMENT_WATCHER = os.getenv('DOCUMENT_WATCHER', 'false').lower() == 'true'
+    DOCUMENT_WATCHER_BACKEND = os.getenv('DOCUMENT_WATCHER_BACKEND', 'auto')
+    DOCUMENT_WATCHER_DEBOUNCE_SECONDS = float(os.getenv('DOCUMENT_WATCHER_DEBOUNCE_SECONDS', '2'))
+    DOCUMENT_WATCHER_POLL_SECONDS = float(os.getenv('DOCUMENT_WATCHER_POLL_SECONDS', '5'))
+
+    # 임베딩 제공자 (openai | local: API 호출 없는 해싱 임베딩, 오프라인 색인/테스트/부하 테스트용)
+    EMBEDDING_PROVIDER = os.getenv('EMBEDDING_PROVIDER', 'openai')
+
+    # 임베딩 모델 / 출력 차원 (openai: 차원 축소는 text-embedding-3 계열만 지원, 0이면 모델 기본 차원 / local: 기본 256)
+    EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'text-embedding-ada-002')
+    EMBEDDING_DIMENSIONS = int(os.getenv('EMBEDDING_DIMENSIONS', '0')) or None
+
+    # 임베딩 메모리 캐시(LRU) 설정
+    EMBEDDING_LRU_MAX_ENTRIES = int(os.getenv('EMBEDDING_LRU_MAX_ENTRIES', '2048'))
+    EMBEDDING_LRU_MAX_BYTES = int(os.getenv('EMBEDDING_LRU_MAX_BYTES', str(64 * 1024 * 1024)))
+
+    # 임베딩 API 병렬 호출 설정 (캐시 미스 분할 배치 크기 / 동시 요청 수)
+    EMBEDDING_SUBBATCH_SIZE = int(os.getenv('EMBEDDING_SUBBATCH_SIZE', '100'))
+    EMBEDDING_MAX_WORKERS = int(os.getenv('EMBEDDING_MAX_WORKERS', '4'))
+
+    # 색인용 임베딩 파이프라인 설정 (분당 요청/토큰 한도, 동시 배치 수, 배치 크기, 재시도)
+    EMBEDDING_RPM = int(os.getenv('EMBEDDING_RPM', '3000'))
+    EMBEDDING_TPM = int(os.getenv('EMBEDDING_TPM', '1000000'))
+    EMBEDDING_MAX_IN_FLIGHT = int(os.getenv('EMBEDDING_MAX_IN_FLIGHT', '4'))
+    EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '100'))
+    EMBEDDING_MAX_TOKENS_PER_BATCH = int(os.getenv('EMBEDDING_MAX_TOKENS_PER_BATCH', '50000'))
+    EMBEDDING_MAX_RETRIES = int(os.getenv('EMBEDDING_MAX_RETRIES', '5'))
+
+    # 의약품 근사 중복 병합 기준 (MinHash 추정 Jaccard, 0이면 병합하지 않음)
+    MEDICATION_DEDUP_THRESHOLD = float(os.getenv('MEDICATION_DEDUP_THRESHOLD', '0.85'))
+
+    # 청크 분할 토큰 예산, 이웃 청크와 겹치는 토큰 수
+    CHUNK_MAX_TOKENS = int(os.getenv('CHUNK_MAX_TOKENS', '800'))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv('CHUNK_OVERLAP_TOKENS', '80'))
+
+    # 챗봇 프롬프트에 넣을 참고자료 토큰 예산 (0이면 제한 없음, 검색된 k개를 모두 사용)
+    KNOWLEDGE_CONTEXT_MAX_TOKENS = int(os.getenv('KNOWLEDGE_CONTEXT_MAX_TOKENS', '0'))
+
+    # 문서 파싱/청크 분할 프로세스 수 (0이면 CPU 수 기준 자동, 1이면 순차 처리)
+    INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', '0'))
+
+    # 키워드 역색인 토크나이저 (korean: 조사 제거 + 문자 n-gram / simple: 공백 분리)
+    KEYWORD_TOKENIZER = os.getenv('KEYWORD_TOKENIZER', 'korean')
+    KEYWORD_NGRAM_SIZE = int(os.getenv('KEYWORD_NGRAM_SIZE', '2'))
+
+    # 벡터 검색 백엔드 (chroma | numpy), numpy 행렬 스냅샷을 mmap으로 열지 여부
+    VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'chroma')
+    NUMPY_INDEX_MMAP = os.getenv('NUMPY_INDEX_MMAP', 'true').lower() == 'true'
+
+    # numpy 백엔드 벡터 양자화 (none | int8), int8 후보를 float32로 재채점할 배수 (k × 배수)
+    VECTOR_QUANTIZATION = os.getenv('VECTOR_QUANTIZATION', 'none')
+    VECTOR_RESCORE_FACTOR = int(os.getenv('VECTOR_RESCORE_FACTOR', '4'))
+
+    # 멀티 콜렉션 동시 검색 스레드 수
+    SEARCH_MAX_WORKERS = int(os.getenv('SEARCH_MAX_WORKERS', '4'))
+
+    # 지식 베이스 검색 결과 캐시 (항목 수, 유효 시간(초))
+    RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv('RETRIEVAL_CACHE_MAX_ENTRIES', '512'))
+    RETRIEVAL_CACHE_TTL = float(os.getenv('RETRIEVAL_CACHE_TTL', '600'))
 
     # 파일 저장 경로
     STORAGE_PATH=os.getenv('STORAGE_PATH', os.path.join(os.path.dirname(__file__), 'app', 'static', 'uploads'))
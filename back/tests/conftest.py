@@ -0,0 +1,77 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# build_index.py와 같이 back/와 저장소 루트를 import 경로에 추가 (from back.config / from app.services ...)
+BACK_DIR = Path(__file__).resolve().parents[1]
+for import_path in (BACK_DIR, BACK_DIR.parent):
+    if str(import_path) not in sys.path:
+        sys.path.insert(0, str(import_path))
+
+# 테스트는 외부 API 없이 로컬 해싱 임베딩으로 실행 (Config가 import될 때 읽힘)
+os.environ.setdefault("EMBEDDING_PROVIDER", "local")
+os.environ.setdefault("EMBEDDING_DIMENSIONS", "32")
+
+
+def count_words(text: str) -> int:
+    """공백 단위 토큰 수 (tiktoken 설치/다운로드 여부와 무관하게 예산 계산을 예측할 수 있게 함)"""
+    return len(text.split())
+
+
+@pytest.fixture
+def word_tokens(monkeypatch):
+    """청크 분할/임베딩 배치의 토큰 수를 단어 수로 고정"""
+    from app.services.dailycare import embedding_pipeline, text_chunker
+
+    monkeypatch.setattr(text_chunker, "count_text_tokens", count_words)
+    monkeypatch.setattr(embedding_pipeline, "_token_encoder", None)
+    monkeypatch.setattr(embedding_pipeline, "_token_encoder_loaded", True)
+    return count_words
+
+
+def write_guide(path: Path, *sections: str) -> Path:
+    """섹션마다 '## 제목' 하나씩 있는 일반 가이드 Markdown 작성"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    body = "\n\n".join(f"## 섹션 {i}\n\n{text}" for i, text in enumerate(sections))
+    path.write_text(f"# {path.stem}\n\n{body}\n", encoding="utf-8")
+    return path
+
+
+def write_medications(path: Path, *texts: str) -> Path:
+    """항목마다 청크 하나가 되는 의약품 JSON 배열 작성"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    items = [{"id": f"{path.stem}_{i}", "text": text, "metadata": {"product_name": text.split()[0]}}
+             for i, text in enumerate(texts)]
+    path.write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def vector_service(tmp_path, monkeypatch, word_tokens):
+    """
+    임시 vector_db에 로컬 해싱 임베딩 + Chroma로 VectorStoreService를 여는 함수
+    (같은 vector_db로 여러 번 열 수 있고, 테스트가 끝나면 모두 닫음)
+    """
+    from back.config import Config
+    from app.services.dailycare.vectorstore_service import VectorStoreService
+
+    settings = {
+        "EMBEDDING_PROVIDER": "local", "EMBEDDING_DIMENSIONS": 32, "VECTOR_BACKEND": "chroma",
+        "INGEST_WORKERS": 1, "MEDICATION_DEDUP_THRESHOLD": 0,
+    }
+    for name, value in settings.items():
+        monkeypatch.setattr(Config, name, value)
+
+    services = []
+
+    def open_service(documents_path: Path):
+        service = VectorStoreService(vector_db=str(tmp_path / "vector_db"), documents_path=str(documents_path))
+        services.append(service)
+        return service
+
+    yield open_service
+    for service in services:
+        service.close()
@@ -0,0 +1,74 @@
+import shutil
+import threading
+import time
+
+from conftest import write_guide, write_medications
+
+from app.services.dailycare.document_watcher import DocumentWatcher, PollingBackend
+from app.services.dailycare.index_manifest import IndexManifest
+
+
+def read_changes(backend: PollingBackend) -> set:
+    """다음 스캔까지 기다려 바뀐 경로 집합을 반환"""
+    return backend.read(backend.poll_seconds + 1.0)
+
+
+def test_polling_backend_reports_created_modified_and_deleted(tmp_path):
+    guide = write_guide(tmp_path / "guide.md", "산책은 하루 두 번.")
+    backend = PollingBackend(tmp_path, poll_seconds=0.1)
+
+    medications = write_medications(tmp_path / "sub" / "meds.json", "백신 주사제")
+    (tmp_path / "notes.txt").write_text("감시 대상 아님", encoding="utf-8")
+    assert read_changes(backend) == {medications}
+
+    write_guide(guide, "산책은 하루 세 번.")
+    assert read_changes(backend) == {guide}
+
+    shutil.rmtree(tmp_path / "sub")
+    assert read_changes(backend) == {medications}
+    assert read_changes(backend) == set()
+    backend.close()
+
+
+def test_watcher_debounces_changes_into_one_call(tmp_path):
+    calls = []
+    applied = threading.Event()
+
+    def on_change(paths):
+        calls.append(paths)
+        applied.set()
+
+    watcher = DocumentWatcher(tmp_path, on_change, debounce_seconds=1.0, poll_seconds=0.1, backend="poll")
+    watcher.start()
+    try:
+        first = write_guide(tmp_path / "a.md", "첫 번째.")
+        time.sleep(0.15)
+        second = write_guide(tmp_path / "b.md", "두 번째.")
+        assert applied.wait(5)
+    finally:
+        watcher.stop(timeout=5)
+
+    assert calls == [{first, second}]
+    assert watcher.status()["applied"] == 1
+
+
+def test_sync_files_removes_deleted_dotted_directory(tmp_path, vector_service):
+    docs = tmp_path / "docs"
+    write_guide(docs / "v1.2" / "guide.md", "버전 디렉토리 안의 가이드.")
+    write_guide(docs / "v1.2" / "nested" / "care.md", "하위 디렉토리 가이드.")
+    write_medications(docs / "v1.2" / "meds.json", "피부 연고")
+    write_guide(docs / "keep.md", "남아야 하는 가이드.")
+
+    service = vector_service(docs)
+    for collection_type in service.collections:
+        service.sync_collection(collection_type)
+
+    shutil.rmtree(docs / "v1.2")
+    results = service.sync_files([docs / "v1.2"])
+
+    assert results["general_guides"]["removed_files"] == 2
+    assert results["medications"]["removed_files"] == 1
+    guides = IndexManifest.load(service._manifest_path(service.collections["general_guides"]), "mypetsvoice_general_guides")
+    assert list(guides.files) == ["keep.md"]
+    assert set(service.stores["general_guides"]._collection.get()["ids"]) == set(guides.chunks)
+    assert service.stores["medications"] is None
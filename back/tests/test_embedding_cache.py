@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from app.services.dailycare.embedding_cache import MmapEmbeddingStore
+
+
+DIM = 4
+
+
+def vector_for(text: str) -> np.ndarray:
+    """키마다 다른 결정적 벡터 (다른 행을 읽으면 바로 드러나도록)"""
+    seed = int.from_bytes(MmapEmbeddingStore.make_key(text)[:4], "little")
+    return np.random.default_rng(seed).random(DIM, dtype=np.float32)
+
+
+def put_texts(store: MmapEmbeddingStore, texts) -> None:
+    store.put_many([MmapEmbeddingStore.make_key(t) for t in texts], [vector_for(t) for t in texts])
+
+
+def assert_vectors(store: MmapEmbeddingStore, texts) -> None:
+    for text in texts:
+        vector = store.get(MmapEmbeddingStore.make_key(text))
+        assert vector is not None, text
+        np.testing.assert_array_equal(vector, vector_for(text))
+
+
+def test_get_many_reports_hits_and_misses(tmp_path):
+    store = MmapEmbeddingStore(str(tmp_path))
+    put_texts(store, ["a", "b"])
+
+    keys = [MmapEmbeddingStore.make_key(t) for t in ("b", "없음", "a")]
+    matrix, hits, misses = store.get_many(keys)
+
+    assert hits == [0, 2] and misses == [1]
+    np.testing.assert_array_equal(matrix, np.stack([vector_for("b"), vector_for("a")]))
+    store.close()
+
+
+def test_torn_matrix_tail_is_truncated(tmp_path):
+    store = MmapEmbeddingStore(str(tmp_path))
+    put_texts(store, ["a", "b", "c"])
+    store.close()
+
+    # 행렬 추가 중 죽은 흔적: 인덱스에 없는 한 행 반 분량의 꼬리
+    with open(store.matrix_path, "ab") as f:
+        f.write(b"\xff" * (DIM * 4 + 6))
+
+    reopened = MmapEmbeddingStore(str(tmp_path))
+    assert len(reopened) == 3
+    assert os.path.getsize(reopened.matrix_path) == 3 * DIM * 4
+    assert_vectors(reopened, ["a", "b", "c"])
+
+    # 잘라낸 뒤에는 새 행이 올바른 위치에 붙음
+    put_texts(reopened, ["d"])
+    assert_vectors(reopened, ["a", "b", "c", "d"])
+    reopened.close()
+
+
+def test_keys_without_header_update_are_ignored(tmp_path):
+    store = MmapEmbeddingStore(str(tmp_path))
+    put_texts(store, ["a", "b"])
+    store.close()
+
+    # 행렬과 인덱스 키는 기록했지만 헤더 행 수를 갱신하기 전에 죽은 상태
+    with open(store.matrix_path, "ab") as f:
+        f.write(vector_for("c").tobytes())
+    with open(store.index_path, "ab") as f:
+        f.write(MmapEmbeddingStore.make_key("c"))
+
+    reopened = MmapEmbeddingStore(str(tmp_path))
+    assert len(reopened) == 2
+    assert MmapEmbeddingStore.make_key("c") not in reopened
+    assert os.path.getsize(reopened.matrix_path) == 2 * DIM * 4
+
+    put_texts(reopened, ["c", "d"])
+    reopened.close()
+
+    final = MmapEmbeddingStore(str(tmp_path))
+    assert len(final) == 4
+    assert_vectors(final, ["a", "b", "c", "d"])
+    final.close()
+
+
+def test_two_instances_append_to_same_directory(tmp_path):
+    first = MmapEmbeddingStore(str(tmp_path))
+    second = MmapEmbeddingStore(str(tmp_path))
+
+    put_texts(first, ["a", "b"])
+    put_texts(second, ["c", "b"])    # b는 이미 있으므로 다시 쓰지 않음
+    put_texts(first, ["d"])          # 쓰기 전에 second가 추가한 행을 합침
+
+    assert len(first) == 4
+    assert_vectors(first, ["a", "b", "c", "d"])
+    assert_vectors(second, ["a", "b", "c"])
+    assert os.path.getsize(first.matrix_path) == 4 * DIM * 4
+    first.close()
+    second.close()
+
+
+def _put_in_process(cache_dir: str, prefix: str) -> None:
+    store = MmapEmbeddingStore(cache_dir)
+    for start in range(0, 40, 5):
+        put_texts(store, [f"{prefix}-{i}" for i in range(start, start + 5)] + ["공유"])
+    store.close()
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="fork 필요")
+def test_processes_append_under_file_lock(tmp_path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_put_in_process, args=(str(tmp_path), p)) for p in ("x", "y", "z")]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+        assert worker.exitcode == 0
+
+    store = MmapEmbeddingStore(str(tmp_path))
+    texts = [f"{p}-{i}" for p in ("x", "y", "z") for i in range(40)] + ["공유"]
+    assert len(store) == len(texts)
+    assert_vectors(store, texts)
+    store.close()
+
+
+def test_legacy_pickles_are_migrated(tmp_path):
+    existing = MmapEmbeddingStore(str(tmp_path))
+    put_texts(existing, ["z"])
+    existing.close()
+
+    for text in ("a", "b"):
+        with open(tmp_path / f"{MmapEmbeddingStore.make_key(text).hex()}.pkl", "wb") as f:
+            pickle.dump(vector_for(text).tolist(), f)
+    # 저장소와 차원이 다른 벡터는 옮기지 않음
+    with open(tmp_path / f"{MmapEmbeddingStore.make_key('c').hex()}.pkl", "wb") as f:
+        pickle.dump([0.0] * (DIM + 1), f)
+
+    store = MmapEmbeddingStore(str(tmp_path))
+    assert len(store) == 3
+    assert_vectors(store, ["z", "a", "b"])
+    assert sorted(p.name for p in tmp_path.glob("*.pkl")) == [f"{MmapEmbeddingStore.make_key('c').hex()}.pkl"]
+    store.close()
+
+
+def test_open_shares_instance_until_last_close(tmp_path):
+    store = MmapEmbeddingStore.open(str(tmp_path))
+    assert MmapEmbeddingStore.open(str(tmp_path)) is store
+
+    store.close()
+    assert MmapEmbeddingStore.open(str(tmp_path)) is store
+    store.close()
+    store.close()
+    assert MmapEmbeddingStore.open(str(tmp_path)) is not store
+    MmapEmbeddingStore.open(str(tmp_path)).close()
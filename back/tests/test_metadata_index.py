@@ -0,0 +1,75 @@
+import json
+
+from app.services.dailycare.metadata_index import MetadataBitmapIndex, MetadataFilter, extract_attributes
+
+
+CHUNKS = {
+    "dog": ("강아지 산책은 하루 두 번이 좋습니다.", {"data_type": "general_guide", "categories": '["일상관리"]'}),
+    "cat": ("고양이 화장실은 매일 청소합니다.", {"data_type": "general_guide", "categories": '["일상관리"]'}),
+    "both": ("강아지와 고양이를 함께 키울 때 주의할 점", {"data_type": "general_guide", "categories": '["합사"]'}),
+    "none": ("동물병원 예약 전에 기록을 준비하세요.", {"data_type": "general_guide"}),
+    "vaccine_med": ("종합 백신 주사제", {"data_type": "medication"}),
+    "other_med": ("피부 연고", {"data_type": "medication"}),
+}
+
+
+def build_index() -> MetadataBitmapIndex:
+    index = MetadataBitmapIndex()
+    ids = list(CHUNKS)
+    index.add(ids, [CHUNKS[i][0] for i in ids], [CHUNKS[i][1] for i in ids])
+    return index
+
+
+def kept(metadata_filter: MetadataFilter, index: MetadataBitmapIndex) -> set:
+    return set(index.ids_in(metadata_filter.mask_for(index)))
+
+
+def test_extract_attributes_labels():
+    labels = extract_attributes(*CHUNKS["both"])
+    assert {"species:dog", "species:cat", "data_type:general_guide", "category:합사"} <= labels
+    assert "topic:vaccine" in extract_attributes(*CHUNKS["vaccine_med"])
+
+
+def test_species_filter_keeps_both_and_drops_only_other_species():
+    index = build_index()
+    assert kept(MetadataFilter(species="dog"), index) == set(CHUNKS) - {"cat"}
+    assert kept(MetadataFilter(species="cat"), index) == set(CHUNKS) - {"dog"}
+
+
+def test_vaccine_filter_only_narrows_medications():
+    index = build_index()
+    assert kept(MetadataFilter(vaccine=True), index) == set(CHUNKS) - {"other_med"}
+
+
+def test_data_type_and_category_filters():
+    index = build_index()
+    assert kept(MetadataFilter(data_type="medication"), index) == {"vaccine_med", "other_med"}
+    assert kept(MetadataFilter(category="일상관리"), index) == {"dog", "cat"}
+    assert kept(MetadataFilter(species="cat", category="일상관리"), index) == {"cat"}
+
+
+def test_filter_cache_key_and_truthiness():
+    assert not MetadataFilter()
+    assert MetadataFilter(category="합사")
+    keys = {MetadataFilter(data_type=d, category=c).cache_key for d in (None, "medication") for c in (None, "합사")}
+    assert len(keys) == 4
+
+
+def test_remove_clears_bits():
+    index = build_index()
+    index.remove(["dog"])
+    assert "dog" not in kept(MetadataFilter(), index)
+    assert index.accepts(index.bitmap("species:dog"))("both")
+
+
+def test_snapshot_round_trip(tmp_path):
+    index = build_index()
+    index.remove(["none"])
+    path = tmp_path / "metadata.json"
+    index.save(path, "digest-1")
+
+    assert MetadataBitmapIndex.load(path, "digest-2") is None
+    loaded = MetadataBitmapIndex.load(path, "digest-1")
+    for metadata_filter in (MetadataFilter(species="dog"), MetadataFilter(vaccine=True), MetadataFilter(category="합사")):
+        assert kept(metadata_filter, loaded) == kept(metadata_filter, index)
+    assert json.loads(path.read_text(encoding="utf-8"))["ids"] == [i for i in CHUNKS if i != "none"]
@@ -0,0 +1,162 @@
+import os
+import shutil
+
+import pytest
+from conftest import write_guide, write_medications
+
+from back.config import Config
+from app.services.dailycare import document_loader
+from app.services.dailycare.index_manifest import IndexManifest
+
+
+@pytest.fixture
+def docs(tmp_path):
+    docs = tmp_path / "docs"
+    write_guide(docs / "walk.md", "산책은 하루 두 번이 좋습니다.", "비 오는 날은 실내 놀이로 대신합니다.")
+    write_guide(docs / "care" / "bath.md", "목욕은 한 달에 한 번 정도면 충분합니다.")
+    write_medications(docs / "meds" / "vaccines.json", "종합백신 주사제 강아지용", "광견병 백신 주사제")
+    return docs
+
+
+def sync_all(service) -> dict:
+    results = {}
+    for collection_type in service.collections:
+        store, results[collection_type] = service.sync_collection(collection_type, service.stores.get(collection_type))
+        service.stores[collection_type] = store
+    return results
+
+
+def indexed(service, collection_type: str) -> IndexManifest:
+    """Chroma ID와 매니페스트가 같은 청크 집합을 가리키는지 확인하고 매니페스트 반환"""
+    name = service.collections[collection_type]
+    manifest = IndexManifest.load(service._manifest_path(name), name)
+    ids = set(service.stores[collection_type]._collection.get()["ids"])
+    assert ids == set(manifest.chunks)
+    assert ids == {chunk_id for entry in manifest.files.values() for chunk_id in entry["chunk_ids"]}
+    return manifest
+
+
+def file_ids(manifest: IndexManifest) -> dict:
+    return {source_file: set(manifest.file_chunk_ids(source_file)) for source_file in manifest.files}
+
+
+def test_initial_sync_records_every_file(docs, vector_service):
+    service = vector_service(docs)
+    results = sync_all(service)
+
+    assert results["general_guides"]["changed_files"] == 2
+    assert results["medications"]["added"] == 2
+    guides = indexed(service, "general_guides")
+    assert sorted(guides.files) == ["care/bath.md", "walk.md"]
+    assert guides.embedding == service.embedding_signature
+    assert indexed(service, "medications").files["meds/vaccines.json"]["fingerprint"] is not None
+
+    # 바뀐 것이 없으면 다시 파싱하지 않음
+    stats = sync_all(service)["general_guides"]
+    assert (stats["changed_files"], stats["unchanged_files"], stats["added"], stats["deleted"]) == (0, 2, 0, 0)
+
+
+def test_edit_replaces_only_changed_chunks(docs, vector_service):
+    service = vector_service(docs)
+    sync_all(service)
+    before = file_ids(indexed(service, "general_guides"))
+
+    write_guide(docs / "walk.md", "산책은 하루 두 번이 좋습니다.", "비 오는 날에는 실내에서 노즈워크 놀이로 대신합니다.")
+    stats = sync_all(service)["general_guides"]
+
+    assert (stats["changed_files"], stats["unchanged_files"], stats["added"], stats["deleted"]) == (1, 1, 1, 1)
+    after = file_ids(indexed(service, "general_guides"))
+    assert after["care/bath.md"] == before["care/bath.md"]
+    assert len(after["walk.md"] & before["walk.md"]) == len(before["walk.md"]) - 1
+
+
+def test_delete_removes_file_chunks(docs, vector_service):
+    service = vector_service(docs)
+    sync_all(service)
+    removed = file_ids(indexed(service, "general_guides"))["care/bath.md"]
+
+    (docs / "care" / "bath.md").unlink()
+    stats = sync_all(service)["general_guides"]
+
+    assert (stats["removed_files"], stats["deleted"]) == (1, len(removed))
+    guides = indexed(service, "general_guides")
+    assert list(guides.files) == ["walk.md"]
+    assert not removed & set(guides.chunks)
+
+
+def test_parse_failure_keeps_existing_chunks_until_fixed(docs, vector_service):
+    service = vector_service(docs)
+    sync_all(service)
+    path = docs / "meds" / "vaccines.json"
+    original = path.read_text(encoding="utf-8")
+    before = file_ids(indexed(service, "medications"))
+
+    # 저장 도중처럼 잘린 JSON: 기존 청크를 유지하고 지문을 비워 다음 동기화 때 다시 시도
+    path.write_text(original[:len(original) // 2], encoding="utf-8")
+    stats = sync_all(service)["medications"]
+    assert (stats["failed_files"], stats["deleted"]) == (1, 0)
+    medications = indexed(service, "medications")
+    assert file_ids(medications) == before
+    assert medications.files["meds/vaccines.json"]["fingerprint"] is None
+
+    write_medications(path, "종합백신 주사제 강아지용", "광견병 백신 주사제", "켄넬코프 백신")
+    stats = sync_all(service)["medications"]
+    assert (stats["changed_files"], stats["failed_files"], stats["added"], stats["deleted"]) == (1, 0, 1, 0)
+    medications = indexed(service, "medications")
+    assert before["meds/vaccines.json"] < set(medications.chunks)
+    assert medications.files["meds/vaccines.json"]["fingerprint"] is not None
+
+
+def test_moved_documents_path_keeps_chunk_ids(docs, tmp_path, vector_service):
+    service = vector_service(docs)
+    sync_all(service)
+    before = {collection_type: file_ids(indexed(service, collection_type)) for collection_type in service.collections}
+
+    moved = tmp_path / "moved" / "docs"
+    shutil.move(str(docs), str(moved))
+    # 지문을 바꿔 모든 파일을 새 경로에서 다시 파싱하게 함 (절대 경로가 ID에 섞이면 여기서 ID가 바뀜)
+    for path in moved.rglob("*.*"):
+        os.utime(path, (1_700_000_000, 1_700_000_000))
+
+    service = vector_service(moved)
+    results = sync_all(service)
+    for collection_type, stats in results.items():
+        assert stats["changed_files"] == len(before[collection_type])
+        assert (stats["added"], stats["deleted"], stats["removed_files"]) == (0, 0, 0)
+        assert file_ids(indexed(service, collection_type)) == before[collection_type]
+
+
+def test_chunking_signature_change_reparses_all_files(docs, vector_service, monkeypatch):
+    service = vector_service(docs)
+    sync_all(service)
+    before = {collection_type: file_ids(indexed(service, collection_type)) for collection_type in service.collections}
+
+    monkeypatch.setattr(Config, "CHUNK_MAX_TOKENS", Config.CHUNK_MAX_TOKENS + 1)
+    monkeypatch.setattr(document_loader, "_text_chunker", None)
+    results = sync_all(service)
+
+    for collection_type, stats in results.items():
+        # 짧은 문서라 청크는 그대로: 모두 다시 파싱하지만 다시 임베딩/삭제할 청크는 없음
+        assert (stats["changed_files"], stats["unchanged_files"]) == (len(before[collection_type]), 0)
+        assert (stats["added"], stats["deleted"]) == (0, 0)
+        manifest = indexed(service, collection_type)
+        assert file_ids(manifest) == before[collection_type]
+        assert f"tokens:{Config.CHUNK_MAX_TOKENS}/" in manifest.chunking
+
+
+def test_embedding_signature_change_reindexes_collection(docs, vector_service, monkeypatch):
+    service = vector_service(docs)
+    sync_all(service)
+    before = {collection_type: set(indexed(service, collection_type).chunks) for collection_type in service.collections}
+
+    monkeypatch.setattr(Config, "EMBEDDING_DIMENSIONS", 16)
+    service = vector_service(docs)
+    results = sync_all(service)
+
+    for collection_type, stats in results.items():
+        assert stats["added"] == len(before[collection_type])
+        manifest = indexed(service, collection_type)
+        assert set(manifest.chunks) == before[collection_type]
+        assert manifest.embedding == "local-hashing@16"
+        vectors = service.stores[collection_type]._collection.get(include=["embeddings"])["embeddings"]
+        assert {len(vector) for vector in vectors} == {16}
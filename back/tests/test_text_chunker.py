@@ -0,0 +1,55 @@
+from app.services.dailycare.text_chunker import TokenChunker
+
+
+def sentences(count: int, words: int = 3) -> list:
+    return [" ".join(f"s{i}w{j}" for j in range(words)) + "." for i in range(count)]
+
+
+def test_split_empty_text():
+    assert TokenChunker(max_tokens=10, overlap_tokens=0).split("  \n ") == []
+
+
+def test_split_short_text_is_one_chunk(word_tokens):
+    text = "짧은 문장 하나. 두 번째 문장."
+    assert TokenChunker(max_tokens=100, overlap_tokens=10).split(text) == [(text, 6)]
+
+
+def test_split_respects_budget_without_overlap(word_tokens):
+    parts = sentences(5)
+    chunks = TokenChunker(max_tokens=6, overlap_tokens=0).split(" ".join(parts))
+
+    assert [chunk for chunk, _ in chunks] == [" ".join(parts[0:2]), " ".join(parts[2:4]), parts[4]]
+    assert [tokens for _, tokens in chunks] == [6, 6, 3]
+
+
+def test_split_overlaps_trailing_sentences(word_tokens):
+    parts = sentences(4)
+    chunks = TokenChunker(max_tokens=6, overlap_tokens=3).split(" ".join(parts))
+
+    # 다음 청크는 앞 청크의 마지막 문장부터 다시 시작
+    assert [chunk for chunk, _ in chunks] == [" ".join(parts[0:2]), " ".join(parts[1:3]), " ".join(parts[2:4])]
+    assert all(tokens <= 6 for _, tokens in chunks)
+
+
+def test_split_overlap_is_capped_at_half_budget():
+    assert TokenChunker(max_tokens=10, overlap_tokens=50).overlap_tokens == 5
+
+
+def test_split_long_sentence_is_cut_to_budget(word_tokens):
+    words = [f"w{i}" for i in range(25)]
+    chunks = TokenChunker(max_tokens=10, overlap_tokens=0).split(" ".join(words))
+
+    assert len(chunks) > 1
+    assert all(tokens <= 10 and word_tokens(chunk) == tokens for chunk, tokens in chunks)
+    # 잘린 조각을 이으면 원래 단어 순서 그대로
+    assert " ".join(chunk for chunk, _ in chunks).split() == words
+
+
+def test_split_preserves_newlines(word_tokens):
+    text = "# 제목\n첫 줄 설명입니다.\n\n- 항목 하나\n- 항목 둘"
+    assert TokenChunker(max_tokens=100, overlap_tokens=0).split(text) == [(text, word_tokens(text))]
+
+    chunks = TokenChunker(max_tokens=4, overlap_tokens=0).split(text)
+    # 여러 청크로 나뉘어도 줄바꿈은 원문 그대로 남고, 이으면 원문 단어가 모두 있음
+    assert any("\n" in chunk for chunk, _ in chunks)
+    assert " ".join(chunk for chunk, _ in chunks).split() == text.split()